@@ -64,7 +64,12 @@ from ap.common.constants import (
 from ap.common.ga import ga_info, is_app_source_dn
 from ap.common.logger import log_execution_time, logger
 from ap.common.services.http_content import json_dumps
-from ap.common.services.request_time_out_handler import RequestTimeOutAPI, set_request_g_dict
+from ap.common.services.request_time_out_handler import (
+    RequestTimeOutAPI,
+    end_cancel_token,
+    set_request_g_dict,
+    start_cancel_token,
+)
 from ap.common.trace_data_log import TraceErrKey, get_log_attr
 from ap.common.yaml_utils import (
     YAML_CONFIG_AP_FILE_NAME,
@@ -303,6 +308,7 @@ def create_app(object_name: str | Config = None) -> Flask:
         # get api request thread id
         thread_id = request.form.get(REQUEST_THREAD_ID, None)
         set_request_g_dict(thread_id)
+        start_cancel_token(thread_id)
 
         resource_type = request.base_url or ''
         is_ignore_content = any(resource_type.endswith(extension) for extension in LOG_IGNORE_CONTENTS)
@@ -460,6 +466,10 @@ def create_app(object_name: str | Config = None) -> Flask:
         response = json_dumps(e.parse())
         return Response(response=response, status=status)
 
+    @app.teardown_request
+    def teardown_request_callback(exception=None):
+        end_cancel_token()
+
     @app.teardown_appcontext
     def shutdown_session(exception=None):
         # close app db session
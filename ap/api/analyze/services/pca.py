@@ -66,11 +66,12 @@ from grpc_server.services.grpc_service_proxy import grpc_api
     (EventType.PCA, EventAction.PLOT, Target.GRAPH),
     send_ga=True,
 )
-@memoize(is_save_file=True, cache_type=CacheType.TRANSACTION_DATA)
 def run_pca(root_graph_param: DicParam, dic_param, sample_no=0):
-    """run pca package to get graph jsons"""
+    """run pca package to get graph jsons
+    fitted model is cached without `sample_no`, clicking a sample only extracts its data from the model
+    """
 
-    dic_output, dic_biplot, dic_t2q_lrn, dic_t2q_tst, errors = gen_base_object(root_graph_param, dic_param)
+    dic_output, dic_biplot, dic_t2q_lrn, dic_t2q_tst, errors = gen_pca_model(root_graph_param, dic_param)
     if errors:
         return None, errors
 
@@ -118,6 +119,19 @@ def run_pca(root_graph_param: DicParam, dic_param, sample_no=0):
     }, None
 
 
+@log_execution_time()
+@abort_process_handler()
+@memoize(is_save_file=True, cache_type=CacheType.TRANSACTION_DATA)
+def gen_pca_model(root_graph_param: DicParam, dic_param):
+    """
+    fitted pca model: trace data, biplot scores and T2/Q statistics of train and test data
+    :param root_graph_param:
+    :param dic_param:
+    :return: dic_output, dic_biplot, dic_t2q_lrn, dic_t2q_tst, errors
+    """
+    return gen_base_object(root_graph_param, dic_param)
+
+
 @log_execution_time()
 @abort_process_handler()
 def gen_base_object(root_graph_param, dic_param):
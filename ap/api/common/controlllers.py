@@ -22,7 +22,7 @@ from ap.common.services.form_env import (
     parse_request_params,
 )
 from ap.common.services.http_content import orjson_dumps
-from ap.common.services.request_time_out_handler import api_request_threads
+from ap.common.services.request_time_out_handler import cancel_request
 from ap.common.yaml_utils import TileInterfaceYaml
 from ap.tile_interface.services.utils import get_tile_master_with_lang
 
@@ -36,7 +36,7 @@ def abort_process():
     :return: {}
     """
     thread_id = request.args.get('thread_id')
-    api_request_threads.append(thread_id)
+    cancel_request(thread_id)
     return {}, 200
 
 
@@ -1,6 +1,6 @@
 import json
 from copy import deepcopy
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import pandas as pd
 
@@ -315,6 +315,27 @@ def get_config_data():
     return dic_procs, trace_graph, dic_card_orders
 
 
+def get_process_config_data(process_id) -> Optional[ShowGraphConfigData]:
+    """
+    Same config of one process as `get_config_data`, without cache.
+    For background jobs, cached config of their process may be older than the config of graph requests
+    :param process_id:
+    :return:
+    """
+    with make_session(is_new_session=True) as meta_session:
+        process = meta_session.query(CfgProcess).get(process_id)
+        if process is None:
+            return None
+
+        preprocess_process(process)
+        dic_proc = ShowGraphSchema().dump(process)
+
+        # rollback to avoid changes data to be commited to database
+        meta_session.rollback()
+
+    return ShowGraphConfigData(**dic_proc)
+
+
 def get_proc_ids_in_graph_param(graph_param: 'DicParam'):
     """
     get process
@@ -1,7 +1,9 @@
 import contextlib
+import contextvars
 import itertools
 import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from datetime import datetime
 from math import ceil
@@ -153,6 +155,8 @@ from ap.common.constants import (
     THRESH_HIGH,
     THRESH_LOW,
     TIME_COL,
+    TRACE_SQL_MAX_WORKERS,
+    TRACE_SQL_POOL_ACQUIRE_TIMEOUT,
     TIMES,
     UNIQUE_CATEGORIES,
     UNIQUE_COLOR,
@@ -181,17 +185,25 @@ from ap.common.constants import (
     FilterFunc,
     N,
     Operator,
+    RawDataTypeDB,
     RemoveOutlierType,
     YType,
 )
 from ap.common.logger import log_exec_time_inside_func, log_execution_time
-from ap.common.memoize import memoize
+from ap.common.memoize import compute_key, memoize
 from ap.common.pydn.dblib.db_common import PARAM_SYMBOL
+from ap.common.pydn.dblib.postgresql_pool import PoolTimeoutError
+from ap.common.range_cache import trace_range_cache
 from ap.common.services.ana_inf_data import calculate_kde_trace_data, detect_abnormal_count_values
 from ap.common.services.form_env import bind_dic_param_to_class
-from ap.common.services.request_time_out_handler import abort_process_handler
+from ap.common.services.request_time_out_handler import abort_process_handler, check_abort_process
 from ap.common.services.sse import MessageAnnouncer
-from ap.common.services.statistics import convert_series_to_number, get_mode
+from ap.common.services.statistics import (
+    calc_group_modes,
+    convert_series_to_number,
+    get_mode,
+    mask_infinity_by_group,
+)
 from ap.common.sigificant_digit import get_fmt_from_array, signify_digit
 from ap.common.trace_data_log import EventAction, Target, save_df_to_file, trace_log
 from ap.equations.utils import get_function_class_by_id
@@ -210,6 +222,7 @@ from ap.setting_module.schemas import TraceSchema
 from ap.trace_data.schemas import CategoryProc, ConditionProc, DicParam, EndProc
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.transaction_model import TransactionData
+from bridge.services.function_column_store import StorableFunctionColumn, get_stored_function_columns
 from bridge.services.master_catalog import MasterColumnMetaCatalog
 from bridge.services.sql.sql_generator import (
     SQL_GENERATOR_PREFIX,
@@ -1015,18 +1028,34 @@ def gen_graph_df(
     _use_expired_cache=False,
 ):
     with BridgeStationModel.get_db_proxy() as db_instance:
-        res = gen_trace_procs_df(
-            db_instance,
-            start_tm,
-            end_tm,
-            cond_procs,
-            end_procs,
-            dic_edges,
-            common_paths,
-            short_procs,
-            duplicate_serial_show,
-            duplicated_serials_count,
-        )
+        stored_function_columns = get_stored_function_columns(db_instance, end_procs)
+        if can_use_range_cache(common_paths, short_procs, cond_procs, duplicate_serial_show):
+            res = gen_trace_procs_df_by_range(
+                db_instance,
+                start_tm,
+                end_tm,
+                cond_procs,
+                end_procs,
+                dic_edges,
+                common_paths,
+                short_procs,
+                duplicated_serials_count,
+                stored_function_columns=stored_function_columns,
+            )
+        else:
+            res = gen_trace_procs_df(
+                db_instance,
+                start_tm,
+                end_tm,
+                cond_procs,
+                end_procs,
+                dic_edges,
+                common_paths,
+                short_procs,
+                duplicate_serial_show,
+                duplicated_serials_count,
+                stored_function_columns=stored_function_columns,
+            )
 
     df, actual_record_number, unique_serial = res
     if df is None:
@@ -1034,7 +1063,7 @@ def gen_graph_df(
 
     # get equation data
     for end_proc in end_procs:
-        df = get_equation_data(df, end_proc)
+        df = get_equation_data(df, end_proc, stored_function_columns.get(end_proc.proc_id))
 
     return df, actual_record_number, unique_serial
 
@@ -1057,10 +1086,11 @@ def is_show_duplicated_serials(duplicate_serial_show, duplicated_serial_count, a
 
 
 def gen_enable_postgresql_option(nestloop: bool = True, mergejoin: bool = True, hashjoin: bool = True) -> str:
+    # `set local` is reset at the end of transaction, so options do not leak into the next user of a pooled connection
     return f'''
-set enable_nestloop = {str(nestloop).lower()};
-set enable_mergejoin = {str(mergejoin).lower()};
-set enable_hashjoin = {str(hashjoin).lower()};
+set local enable_nestloop = {str(nestloop).lower()};
+set local enable_mergejoin = {str(mergejoin).lower()};
+set local enable_hashjoin = {str(hashjoin).lower()};
     '''
 
 
@@ -1118,6 +1148,101 @@ def can_calculate_unique_records_by_dataframe(
     return duplicate_serial_show == DuplicateSerialShow.SHOW_BOTH
 
 
+def gen_trace_proc_df_of_path(
+    db_instance,
+    sql: str,
+    params: Dict[str, Any],
+    sql_objs: List[SqlProcLink],
+    duplicate_serial_show: DuplicateSerialShow,
+    postgres_option: str,
+) -> Tuple[DataFrame, int, int]:
+    """Query and drop duplicates data of one trace path
+    :return: dataframe, number of non-unique link keys records, number of unique link keys records
+    """
+    # TODO: remove this test_sql after implementing
+    # test_params = {k: f"'{v}'" for k, v in params.items()}
+    # _test_sql = sql % test_params
+    func_log = log_exec_time_inside_func('SQL', 'SHOW GRAPH')
+    db_instance.execute_sql(postgres_option)
+    df = db_instance.run_sql_to_frame(sql, params=params)
+    func_log()
+    check_abort_process()
+
+    # datetime from DB is UTC, set UCT for column datetime
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], utc=True)
+
+    df = DropDuplicatesTraceProcs.drop_duplicates_by_ids(df, sql_objs)
+
+    non_unique_link_keys_records = len(df)
+    dropped_duplicates_df = DropDuplicatesTraceProcs.drop_duplicates_by_link_keys(
+        df,
+        sql_objs,
+        duplicate_serial_show,
+    )
+    unique_link_keys_records = len(dropped_duplicates_df)
+
+    if duplicate_serial_show is not DuplicateSerialShow.SHOW_BOTH:
+        df = dropped_duplicates_df
+
+    return df, non_unique_link_keys_records, unique_link_keys_records
+
+
+def gen_trace_proc_df_of_path_with_new_connection(
+    sql: str,
+    params: Dict[str, Any],
+    sql_objs: List[SqlProcLink],
+    duplicate_serial_show: DuplicateSerialShow,
+    postgres_option: str,
+) -> Tuple[DataFrame, int, int]:
+    with BridgeStationModel.get_db_proxy(pool_timeout=TRACE_SQL_POOL_ACQUIRE_TIMEOUT) as db_instance:
+        return gen_trace_proc_df_of_path(db_instance, sql, params, sql_objs, duplicate_serial_show, postgres_option)
+
+
+@log_execution_time()
+def gen_trace_procs_dfs_in_parallel(
+    db_instance,
+    queries: List[Tuple[str, Dict[str, Any], List[SqlProcLink]]],
+    duplicate_serial_show: DuplicateSerialShow,
+    postgres_option: str,
+    max_workers: int,
+) -> List[Tuple[DataFrame, int, int]]:
+    """Run sql of each trace path concurrently.
+    The first path runs on caller's connection, the others on their own pooled connections.
+    If a worker can not get a pooled connection in time, its path is run on caller's connection instead,
+    so a busy pool slows the request down but never blocks it.
+    Results are returned in the same order as `queries`.
+    Workers run in a copy of caller's context, abort / timeout of the request cancels their queries too.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers - 1, thread_name_prefix='trace_sql') as executor:
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                gen_trace_proc_df_of_path_with_new_connection,
+                *query,
+                duplicate_serial_show,
+                postgres_option,
+            )
+            for query in queries[1:]
+        ]
+        try:
+            results = [gen_trace_proc_df_of_path(db_instance, *queries[0], duplicate_serial_show, postgres_option)]
+            for future, query in zip(futures, queries[1:]):
+                try:
+                    results.append(future.result())
+                except PoolTimeoutError:
+                    results.append(
+                        gen_trace_proc_df_of_path(db_instance, *query, duplicate_serial_show, postgres_option),
+                    )
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results
+
+
 @log_execution_time()
 def gen_trace_procs_df_with_legacy_option(
     db_instance,
@@ -1125,13 +1250,18 @@ def gen_trace_procs_df_with_legacy_option(
     cond_procs: List[ConditionProc],
     duplicate_serial_show: DuplicateSerialShow,
     legacy: bool = True,
+    max_workers: int = TRACE_SQL_MAX_WORKERS,
 ) -> Tuple[DataFrame, int, int]:
+    """
+    :param max_workers: max number of paths queried concurrently. 1: query paths one by one
+    """
     df = None
     total_non_unique_link_keys_records = 0
     total_unique_link_keys_records = 0
 
     postgres_option = get_postgresql_options(duplicate_serial_show, has_filter=len(cond_procs) > 0)
 
+    queries = []
     for sql_objs in list_sql_objs:
         sql, params = gen_proc_link_from_sql(
             sql_objs,
@@ -1139,32 +1269,28 @@ def gen_trace_procs_df_with_legacy_option(
             duplicate_serial_show,
             use_row_number=legacy,
         )
-        sql = postgres_option + sql
-        # TODO: remove this test_sql after implementing
-        # test_params = {k: f"'{v}'" for k, v in params.items()}
-        # _test_sql = sql % test_params
-        func_log = log_exec_time_inside_func('SQL', 'SHOW GRAPH')
-        cols, rows = db_instance.run_sql(sql, params=params, row_is_dict=False)
-        func_log()
-
-        _df = pd.DataFrame(rows, columns=cols)
-        # datetime from DB is UTC, set UCT for column datetime
-        for col in _df.columns:
-            if pd.api.types.is_datetime64_any_dtype(_df[col]):
-                _df[col] = pd.to_datetime(_df[col], utc=True)
+        queries.append((sql, params, sql_objs))
 
-        _df = DropDuplicatesTraceProcs.drop_duplicates_by_ids(_df, sql_objs)
-
-        total_non_unique_link_keys_records += len(_df)
-        dropped_duplicates_df = DropDuplicatesTraceProcs.drop_duplicates_by_link_keys(
-            _df,
-            sql_objs,
+    max_workers = min(max_workers, len(queries))
+    if max_workers > 1:
+        results = gen_trace_procs_dfs_in_parallel(
+            db_instance,
+            queries,
             duplicate_serial_show,
+            postgres_option,
+            max_workers,
         )
-        total_unique_link_keys_records += len(dropped_duplicates_df)
+    else:
+        results = [
+            gen_trace_proc_df_of_path(db_instance, *query, duplicate_serial_show, postgres_option)
+            for query in queries
+        ]
 
-        if duplicate_serial_show is not DuplicateSerialShow.SHOW_BOTH:
-            _df = dropped_duplicates_df
+    # merge in the same order as paths, result is the same as querying one by one
+    for _df, non_unique_link_keys_records, unique_link_keys_records in results:
+        check_abort_process()
+        total_non_unique_link_keys_records += non_unique_link_keys_records
+        total_unique_link_keys_records += unique_link_keys_records
 
         if df is None:
             df = _df
@@ -1190,11 +1316,13 @@ def gen_trace_procs_df(
     short_procs,
     duplicate_serial_show: DuplicateSerialShow,
     duplicated_serials_count: DuplicateSerialCount,
+    stored_function_columns: Dict[int, Dict[int, StorableFunctionColumn]] = None,
 ):
     """Use two different ways to get dataframe from database
     The old (legacy) way: calculating using row_numbers, distinct. Drop them by sql.
     The new way: calculating without using row_numbers, distinct. Drop them by pandas.
     The only way to use legacy is: we have filter enable and we show first/last.
+    Function columns in `stored_function_columns` are read from transaction tables.
     """
     if not len(common_paths):
         return pd.DataFrame(), 0, 0
@@ -1209,6 +1337,7 @@ def gen_trace_procs_df(
             end_tm,
             end_procs,
             short_procs,
+            stored_function_columns=stored_function_columns,
         )
         list_sql_objs.append(sql_objs)
         time_cols.update(sql_obj.gen_proc_time_label(is_start_proc=idx == 0) for idx, sql_obj in enumerate(sql_objs))
@@ -1260,6 +1389,95 @@ def gen_trace_procs_df(
     return df, actual_record_number, unique_record_number
 
 
+def can_use_range_cache(
+    common_paths: List[Tuple[List[int], bool]],
+    short_procs,
+    cond_procs: List[ConditionProc],
+    duplicate_serial_show: DuplicateSerialShow,
+) -> bool:
+    """Rows of a time range are exactly the rows of its sub ranges only when
+    - data is of start process only: other processes are linked within a window around the whole range
+    - duplicated serials are shown: dropping duplicates compares rows of the whole range
+    """
+    if len(common_paths) != 1 or len(short_procs) != 1:
+        return False
+
+    if duplicate_serial_show is not DuplicateSerialShow.SHOW_BOTH:
+        return False
+
+    return all(cond_proc.proc_id in short_procs for cond_proc in cond_procs)
+
+
+@log_execution_time()
+def gen_trace_procs_df_by_range(
+    db_instance,
+    start_tm,
+    end_tm,
+    cond_procs: List[ConditionProc],
+    end_procs,
+    dic_edges,
+    common_paths: List[Tuple[List[int], bool]],
+    short_procs,
+    duplicated_serials_count: DuplicateSerialCount,
+    stored_function_columns: Dict[int, Dict[int, StorableFunctionColumn]] = None,
+):
+    """Same result as gen_trace_procs_df for requests that `can_use_range_cache`.
+    Rows of time ranges queried before are reused, only uncovered sub ranges are queried (delta fetch)
+    """
+    # segments with and without stored function columns must not be mixed
+    stored_column_names = {
+        proc_id: sorted(stored_column.name for stored_column in stored_columns.values())
+        for proc_id, stored_columns in (stored_function_columns or {}).items()
+    }
+    key = compute_key(
+        gen_trace_procs_df,
+        (end_procs, cond_procs, common_paths, sorted(short_procs), stored_column_names),
+    )
+    if key is None:
+        return gen_trace_procs_df(
+            db_instance,
+            start_tm,
+            end_tm,
+            cond_procs,
+            end_procs,
+            dic_edges,
+            common_paths,
+            short_procs,
+            DuplicateSerialShow.SHOW_BOTH,
+            duplicated_serials_count,
+            stored_function_columns=stored_function_columns,
+        )
+
+    def fetch(sub_start_tm, sub_end_tm):
+        df, *_ = gen_trace_procs_df(
+            db_instance,
+            sub_start_tm,
+            sub_end_tm,
+            cond_procs,
+            end_procs,
+            dic_edges,
+            common_paths,
+            short_procs,
+            DuplicateSerialShow.SHOW_BOTH,
+            DuplicateSerialCount.SILENT,
+            stored_function_columns=stored_function_columns,
+        )
+        return df
+
+    df = trace_range_cache.get_range(key, set(short_procs), TIME_COL, start_tm, end_tm, fetch)
+    if df.empty:
+        return df, 0, 0
+
+    actual_record_number = len(df)
+    _, for_count = is_show_duplicated_serials(
+        DuplicateSerialShow.SHOW_BOTH,
+        duplicated_serials_count,
+        actual_record_number,
+    )
+    # one process, no duplicates dropped: every record is unique
+    return df, actual_record_number, actual_record_number if for_count else None
+
+
 @log_execution_time()
 def calculate_unique_ids_using_sql(
     db_instance,
@@ -1294,6 +1512,7 @@ def calculate_unique_ids_using_sql(
         sql, params = gen_proc_link_from_sql(sql_objs, cond_procs, duplicate_serial_show, for_count=True)
         cols, rows = db_instance.run_sql(sql, params=params, row_is_dict=False)
         unique_ids.update(r[0] for r in rows)
+        check_abort_process()
     return len(unique_ids)
 
 
@@ -2361,14 +2580,21 @@ def reduce_data(df_orig: DataFrame, graph_param, dic_str_cols):
     df.set_index(group_col, inplace=True)
     total_group = len(group_counts)
 
+    # sort groups once, all columns are aggregated by group positions of rows
+    group_idxs, group_ids = pd.factorize(df.index.values, sort=True)
+    group_index = pd.Index(group_ids, name=group_col)
+
     # get category mode(most common)
     df_blank = pd.DataFrame(index=range(total_group))
     dfs = [df_blank]
     str_cols = list(set(list(dic_cate_names) + rank_cols))
     df_cates = None
     if str_cols:
-        df_temp = df[str_cols]
-        df_temp = df_temp.groupby(group_col).agg(get_mode)
+        dic_modes = {col: calc_group_modes(df[col], group_idxs, group_index) for col in str_cols}
+        other_cols = [col for col, modes in dic_modes.items() if modes is None]
+        if other_cols:
+            dic_modes.update(df[other_cols].groupby(group_col).agg(get_mode).items())
+        df_temp = pd.DataFrame({col: dic_modes[col] for col in str_cols if col in dic_modes}, index=group_index)
 
         for col in str_cols:
             if col not in df_temp.columns:
@@ -2384,36 +2610,33 @@ def reduce_data(df_orig: DataFrame, graph_param, dic_str_cols):
     # get from, to and count of each slot
     df_from_to_count = df.groupby(group_col)[TIME_COL].agg(['max', 'min', 'count'])
 
-    df_not_na = df.replace([float('-inf'), float('inf'), None], np.nan).notna()
+    # get idxs of each group, same for all end columns
+    df_idxs = df[[TIME_COL, index_col]].replace([None], np.nan).groupby(group_col).agg('min')
+
+    # min, median, max of all numeric end columns by one groupby
+    dic_masked_values = {}
+    dic_has_finite = {}
+    for sql_label in dic_end_col_names:
+        values = df[sql_label].values
+        if total_group and isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+            dic_masked_values[sql_label], dic_has_finite[sql_label] = mask_infinity_by_group(
+                values,
+                group_idxs,
+                total_group,
+            )
 
-    # select all group which has all na value
-    df_group_all_na = (~df_not_na).groupby(group_col).all()
+    agg_methods = ['min', 'median', 'max']
+    df_aggs = None
+    if dic_masked_values:
+        df_aggs = pd.DataFrame(dic_masked_values, index=df.index).groupby(group_col).agg(agg_methods)
 
     for sql_label, (proc_id, *_) in dic_end_col_names.items():
-        # replace None to nan
-        # cannot apply agg by None value
-        df_temp = df[[TIME_COL, index_col, sql_label]].replace([None], np.nan)
-
-        # get df remove -inf, inf and NA
-        df_drop = df_temp[df_not_na[sql_label]]
-
-        # get remaining group has only inf, -inf, NA
-        remaining_df = df_temp[df_group_all_na[sql_label]]
-
-        # calc min med max of 2 df and merge to one
-        agg_methods = ['min', 'median', 'max']
-        df_min_med_max_1 = pd.DataFrame(columns=agg_methods)
-        df_min_med_max_2 = pd.DataFrame(columns=agg_methods)
-        if not df_drop.empty:
-            df_min_med_max_1 = df_drop.groupby(group_col)[sql_label].agg(agg_methods)
-        if not remaining_df.empty:
-            df_min_med_max_2 = remaining_df.groupby(group_col)[sql_label].agg(agg_methods)
-        df_min_med_max = pd.concat([df_min_med_max_1, df_min_med_max_2]).sort_index()
-
-        # get idxs of each group
-        df_temp.drop(sql_label, axis=1, inplace=True)
-        df_temp = df_temp.groupby(group_col).agg('min')
-        df_temp = df_temp.rename(columns={index_col: sql_label})
+        if sql_label in dic_has_finite:
+            df_min_med_max = gen_min_med_max_df(df_aggs[sql_label], dic_has_finite[sql_label])
+        else:
+            df_min_med_max = calc_min_med_max_by_group(df, sql_label, group_col)
+
+        df_temp = df_idxs.rename(columns={index_col: sql_label})
         if len(df_temp) == 0:
             blank_vals = [None] * total_group
             df_temp[sql_label] = blank_vals
@@ -2450,6 +2673,58 @@ def reduce_data(df_orig: DataFrame, graph_param, dic_str_cols):
     return df_box, dic_cates, dic_org_cates, group_counts, df_from_to_count, dic_min_med_max
 
 
+def calc_min_med_max_by_group(df: DataFrame, sql_label, group_col):
+    """
+    min, median, max of each group for columns that are not numpy numbers (object, extension array)
+    -inf, inf, NA are ignored, except groups that have only them
+    :param df: DataFrame indexed by group
+    :param sql_label: column
+    :param group_col: name of group index
+    :return: DataFrame of min, median, max columns
+    """
+    # replace None to nan
+    # cannot apply agg by None value
+    df_temp = df[[sql_label]].replace([None], np.nan)
+    df_not_na = df[[sql_label]].replace([float('-inf'), float('inf'), None], np.nan).notna()
+
+    # select all group which has all na value
+    df_group_all_na = (~df_not_na).groupby(group_col).all()
+
+    # get df remove -inf, inf and NA
+    df_drop = df_temp[df_not_na[sql_label]]
+
+    # get remaining group has only inf, -inf, NA
+    remaining_df = df_temp[df_group_all_na[sql_label]]
+
+    # calc min med max of 2 df and merge to one
+    agg_methods = ['min', 'median', 'max']
+    df_min_med_max_1 = pd.DataFrame(columns=agg_methods)
+    df_min_med_max_2 = pd.DataFrame(columns=agg_methods)
+    if not df_drop.empty:
+        df_min_med_max_1 = df_drop.groupby(group_col)[sql_label].agg(agg_methods)
+    if not remaining_df.empty:
+        df_min_med_max_2 = remaining_df.groupby(group_col)[sql_label].agg(agg_methods)
+
+    return pd.concat([df_min_med_max_1, df_min_med_max_2]).sort_index()
+
+
+def gen_min_med_max_df(df_agg: DataFrame, has_finite):
+    """
+    Make min, median, max of masked values the same as calc_min_med_max_by_group result
+    :param df_agg: min, median, max of values masked by mask_infinity_by_group
+    :param has_finite: flags of groups that have finite values
+    :return: DataFrame of min, median, max columns
+    """
+    if has_finite.any() and not has_finite.all():
+        return df_agg
+
+    # calc_min_med_max_by_group concatenates the aggregation with an empty one when all groups are on one side,
+    # concat decides index name and dtypes of result. groups are at most THIN_DATA_CHUNK, it is cheap
+    df_blank = pd.DataFrame(columns=df_agg.columns)
+    dfs = [df_agg, df_blank] if has_finite.all() else [df_blank, df_agg]
+    return pd.concat(dfs).sort_index()
+
+
 def calc_data_per_group(min_val, max_val, box=THIN_DATA_CHUNK):
     dif_val = max_val - min_val + 1
     ele_per_box = dif_val / box
@@ -3272,9 +3547,24 @@ def sorted_function_details(cfg_process_columns: list[CfgProcessColumn]) -> list
     return sorted(cfg_function_cols, key=lambda col: col.order)
 
 
-def get_equation_data(df, end_proc: EndProc):
+def get_equation_data(df, end_proc: EndProc, stored_columns: Dict[int, StorableFunctionColumn] = None):
+    """
+    :param df:
+    :param end_proc:
+    :param stored_columns: function columns whose values were read from transaction table, not evaluated again
+    :return:
+    """
+    stored_columns = stored_columns or {}
+    for stored_column in stored_columns.values():
+        # same type as evaluated values
+        if stored_column.label in df.columns:
+            output_dtype = RawDataTypeDB.get_pandas_dtype(stored_column.output_type)
+            df[stored_column.label] = df[stored_column.label].astype(output_dtype)
+
     sorted_cfg_function_cols = sorted_function_details(end_proc.cfg_proc.get_cols(col_ids=end_proc.col_ids))
     for cfg_func_col in sorted_cfg_function_cols:
+        if cfg_func_col.process_column_id in stored_columns:
+            continue
         df = add_equation_column_to_df(df, cfg_func_col, end_proc.cfg_proc)
 
     for col in df.columns:
@@ -4023,11 +4313,24 @@ def reduce_trace_graph(dic_edges, short_procs):
     return dic_reduce
 
 
-def gen_trace_procs_sqls(path, dic_edges, start_tm, end_tm, end_procs: List[EndProc], short_procs):
+def gen_trace_procs_sqls(
+    path,
+    dic_edges,
+    start_tm,
+    end_tm,
+    end_procs: List[EndProc],
+    short_procs,
+    stored_function_columns: Dict[int, Dict[int, StorableFunctionColumn]] = None,
+):
     sql_objs: List[SqlProcLink] = []
     end_proc_start_tm, end_proc_end_tm = gen_end_proc_start_end_time(start_tm, end_tm)
     start_proc = path[0]
     dic_processes = {proc_id: TransactionData(proc_id) for proc_id in path}
+    for proc_id, stored_columns in (stored_function_columns or {}).items():
+        if proc_id in dic_processes:
+            dic_processes[proc_id].stored_function_columns = {
+                col_id: stored_column.name for col_id, stored_column in stored_columns.items()
+            }
     # create table if not exist
     with BridgeStationModel.get_db_proxy() as db_instance:
         for proc_id, trans_data in dic_processes.items():
@@ -4162,8 +4465,7 @@ def gen_trace_procs_df_detail(
 
     for sql_objs in list_sql_objs:
         sql, params = gen_proc_link_from_sql(sql_objs, cond_procs, duplicate_serial_show, for_count=for_count)
-        cols, rows = db_instance.run_sql(sql, params=params, row_is_dict=False)
-        _df = pd.DataFrame(rows, columns=cols)
+        _df = db_instance.run_sql_to_frame(sql, params=params)
         keep = 'last'
         if duplicate_serial_show is DuplicateSerialShow.SHOW_FIRST:
             keep = 'first'
@@ -4235,9 +4537,11 @@ def is_nominal_check(col_id, graph_param):
 @memoize(cache_type=CacheType.CONFIG_DATA)
 def check_path_exist(end_proc_id, start_proc_id):
     trace_graph = get_trace_configs()
-    directed_paths = trace_graph.get_all_paths(start_proc_id, end_proc_id)
-    undirected_paths = trace_graph.get_all_paths(start_proc_id, end_proc_id, undirected_graph=True)
-    return len(directed_paths) or len(undirected_paths)
+    return trace_graph.has_path(start_proc_id, end_proc_id) or trace_graph.has_path(
+        start_proc_id,
+        end_proc_id,
+        undirected_graph=True,
+    )
 
 
 @memoize(cache_type=CacheType.CONFIG_DATA)
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import threading
 import uuid
-from collections import Counter, defaultdict
-from typing import TYPE_CHECKING, Dict, Iterator, TypeVar
+from collections import Counter, OrderedDict, defaultdict, deque
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, TypeVar
 
 from flask_sqlalchemy import BaseQuery
 from sqlalchemy.dialects import sqlite
 
-from ap.common.constants import TIME_COL
+from ap.common.constants import TIME_COL, TRACE_PATH_INDEX_MAX_GRAPHS
 from ap.common.pydn.dblib.sqlite import SQLite3
 from ap.setting_module.models import CfgProcess
 
@@ -48,6 +49,72 @@ def get_col_cfg(dic_proc_cfgs: Dict[int, CfgProcess], col_id):
     return [col for col in all_cols if col.id == col_id][0]
 
 
+class TracePathIndex:
+    """
+    Reachability and enumerated paths of one trace graph topology
+    """
+
+    def __init__(self, dic_graph, dic_graph_undirected):
+        # directed: nodes reachable from each node
+        self.dic_reachable = {node: self._traverse(dic_graph, node) for node in dic_graph}
+        # undirected: connected component of each node
+        self.dic_component = {}
+        for node in dic_graph_undirected:
+            if node not in self.dic_component:
+                component = self._traverse(dic_graph_undirected, node)
+                for component_node in component:
+                    self.dic_component[component_node] = node
+
+        # (start_proc, end_proc, undirected_graph): paths
+        self.dic_paths: Dict[Tuple, List[List[int]]] = {}
+
+    @staticmethod
+    def _traverse(dic_graph, start_proc):
+        visited = {start_proc}
+        queue = deque([start_proc])
+        while queue:
+            for next_proc in dic_graph.get(queue.popleft(), []):
+                if next_proc not in visited:
+                    visited.add(next_proc)
+                    queue.append(next_proc)
+        return visited
+
+    def is_reachable(self, start_proc, end_proc, undirected_graph=None):
+        if start_proc == end_proc:
+            return True
+
+        if undirected_graph:
+            component = self.dic_component.get(start_proc)
+            return component is not None and component == self.dic_component.get(end_proc)
+
+        return end_proc in self.dic_reachable.get(start_proc, ())
+
+
+dic_trace_path_indexes: OrderedDict[Tuple, TracePathIndex] = OrderedDict()
+trace_path_index_lock = threading.Lock()
+
+
+def get_trace_path_index(trace_graph: TraceGraph) -> TracePathIndex:
+    """
+    Index is shared by graphs of same edges, a changed trace config gets a new index.
+    It is not an attribute of graph, cached config data is deep copied for each request.
+    """
+    key = trace_graph.topology_key
+    with trace_path_index_lock:
+        path_index = dic_trace_path_indexes.get(key)
+        if path_index is not None:
+            dic_trace_path_indexes.move_to_end(key)
+            return path_index
+
+    path_index = TracePathIndex(trace_graph.dic_graph, trace_graph.dic_graph_undirected)
+    with trace_path_index_lock:
+        path_index = dic_trace_path_indexes.setdefault(key, path_index)
+        while len(dic_trace_path_indexes) > TRACE_PATH_INDEX_MAX_GRAPHS:
+            dic_trace_path_indexes.popitem(last=False)
+
+    return path_index
+
+
 class TraceGraph:
     def __init__(self, edges):
         self.dic_graph = defaultdict(list)
@@ -76,9 +143,23 @@ class TraceGraph:
         self.merge_multi_nodes = [_node for _node, _count in counter_target_procs.items() if _count > 1]
         self.leaf_start_nodes = list(set_self_procs - set_target_procs)
         self.leaf_end_nodes = list(set_target_procs - set_self_procs)
+        # paths only depend on linked processes, not on link keys
+        self.topology_key = tuple(sorted(self.dic_edges))
+
+    def __cache_key__(self):
+        # other attributes are derived from edges
+        return sorted(self.dic_edges.items())
+
+    @property
+    def path_index(self) -> TracePathIndex:
+        return get_trace_path_index(self)
+
+    def has_path(self, start_proc, end_proc, undirected_graph=None):
+        """O(1) check if `get_all_paths(start_proc, end_proc, undirected_graph)` is not empty"""
+        return self.path_index.is_reachable(start_proc, end_proc, undirected_graph)
 
     # function to add an edge to graph
-    def _get_all_paths(self, start_proc, path, paths, end_proc=None, undirected_graph=None):
+    def _get_all_paths(self, start_proc, path, paths, end_proc=None, undirected_graph=None, path_index=None):
         # avoid cycle
         if start_proc in path:
             return paths
@@ -94,15 +175,43 @@ class TraceGraph:
                 paths.append(path)
         else:
             for next_proc in dic_graph[start_proc]:
-                self._get_all_paths(next_proc, path, paths, end_proc, undirected_graph)
+                # skip branches that never reach end proc
+                if path_index and not path_index.is_reachable(next_proc, end_proc, undirected_graph):
+                    continue
+                self._get_all_paths(next_proc, path, paths, end_proc, undirected_graph, path_index)
 
         return paths
 
     # Prints all paths from 's' to 'd'
     def get_all_paths(self, start_proc, end_proc=None, undirected_graph=None):
-        path = []
-        paths = []
-        return self._get_all_paths(start_proc, path, paths, end_proc, undirected_graph)
+        """
+        All simple paths from start proc (to end proc, or to leaves if end proc is None).
+        Paths are enumerated once per trace config.
+        Enumeration is still exponential in dense graphs, undirected ones above all: every process of a connected
+        component reaches end proc, so reachability can not prune any branch there. Use has_path for existence checks.
+        """
+        key = (start_proc, end_proc, bool(undirected_graph))
+        path_index = self.path_index
+        paths = path_index.dic_paths.get(key)
+        if paths is None:
+            if end_proc is not None and not path_index.is_reachable(start_proc, end_proc, undirected_graph):
+                paths = []
+            else:
+                # prune by reachability only if paths end at end proc.
+                # undirected: every neighbor is in the component of end proc, checks would prune nothing
+                is_pruned = end_proc is not None and not undirected_graph
+                paths = self._get_all_paths(
+                    start_proc,
+                    [],
+                    [],
+                    end_proc,
+                    undirected_graph,
+                    path_index if is_pruned else None,
+                )
+            path_index.dic_paths[key] = paths
+
+        # callers may change their paths
+        return [list(path) for path in paths]
 
     def get_all_paths_in_graph(self):
         paths = []
@@ -34,6 +34,7 @@ from ap.common.constants import (
 )
 from ap.common.logger import log_execution_time
 from ap.common.memoize import memoize
+from ap.common.services.penalty_path import fit_penalty_path
 from ap.common.services.request_time_out_handler import (
     abort_process_handler,
     request_timeout_handling,
@@ -315,10 +316,15 @@ class GaussianGraphicalModel:
             emp_cov = shrunk_covariance(emp_cov, shrinkage=0.8)
 
         # fit glasso along specified alphas
+        # cost of one fit grows with cube of number of variables
+        pmats = fit_penalty_path(_fit_precision_matrix, self.alphas, emp_cov, work_size=emp_cov.shape[0] ** 3)
         dic_res = {'alpha': [], 'parcor': [], 'ebic': []}
-        for alpha in self.alphas:
+        for alpha, pmat in zip(self.alphas, pmats):
+            if pmat is None:
+                print('Poorly conditioned on alpha={}. Skip'.format(alpha))
+                continue
+
             try:
-                _, pmat = graphical_lasso(emp_cov, alpha)
                 dic_res['alpha'].append(alpha)
                 dic_res['parcor'].append(self._precision2parcor(pmat))
                 dic_res['ebic'].append(self._calc_extended_bic(pmat, emp_cov, X.shape[0]))
@@ -376,6 +382,16 @@ class GaussianGraphicalModel:
         return best_alpha, best_parcor.copy()
 
 
+def _fit_precision_matrix(alpha, emp_cov):
+    """Fit graphical lasso of one alpha, None if it fails"""
+    try:
+        _, pmat = graphical_lasso(emp_cov, alpha)
+    except Exception:
+        return None
+
+    return pmat
+
+
 def _gen_node_positions(parcor, idx_target=None):
     """Generate node positions for graphical lasso"""
 
@@ -641,18 +641,16 @@ def calc_emd_for_ridgeline(data, group_id, num_bins, signed=True, diff=False):
 
     # calculate emd sequence in each sensor
     for sensor in np.arange(num_sensors):
-        dens_mat = np.zeros((num_groups, num_bins))
         x = data[:, sensor]
 
         # generate bins for histograms
-        x_wo_none = x[x != None]
+        is_not_none = x != None
+        x_wo_none = x[is_not_none].astype(float)
 
         # if there is no data , quit ( avoid error )
         if not len(x_wo_none):
             continue
 
-        group_id_wo_none = np.delete(group_id, np.where(x == None))
-
         x_min = np.nanmin(x_wo_none)
         x_max = np.nanmax(x_wo_none)
         # in case of 0 standard deviation
@@ -662,9 +660,8 @@ def calc_emd_for_ridgeline(data, group_id, num_bins, signed=True, diff=False):
         bins = np.linspace(x_min, x_max, num=num_bins + 1)
 
         # histogram for all group_ids
-        for g, grp in enumerate(np.unique(group_id_wo_none)):
-            bin_count, _ = np.histogram(x_wo_none[group_id_wo_none == grp], bins=bins)
-            dens_mat[g, :] = bin_count / np.sum(bin_count)
+        _, group_idx = np.unique(group_id[is_not_none], return_inverse=True)
+        dens_mat = calc_group_densities(x_wo_none, group_idx, bins, num_groups)
 
         # reference density (first density or previous density)
         if diff:
@@ -676,14 +673,10 @@ def calc_emd_for_ridgeline(data, group_id, num_bins, signed=True, diff=False):
         if signed:
             emd = (dens_mat - ref_density) @ np.arange(1, num_bins + 1).reshape(-1, 1)
         else:
-            emd = np.zeros(num_groups)
-            for g, _ in enumerate(np.unique(group_id_wo_none)):
-                # exact 1D EMD
-                # https://en.wikipedia.org/wiki/Earth_mover%27s_distance#Computing_the_EMD
-                emd_1d = np.zeros(num_bins + 1)
-                for bin_idx in range(1, num_bins + 1):
-                    emd_1d[bin_idx] = ref_density[g, bin_idx - 1] - dens_mat[g, bin_idx - 1] + emd_1d[bin_idx - 1]
-                emd[g] = np.sum(np.abs(emd_1d))
+            # exact 1D EMD: sum of absolute cumulative difference along bins
+            # https://en.wikipedia.org/wiki/Earth_mover%27s_distance#Computing_the_EMD
+            emd = np.abs(np.cumsum(ref_density - dens_mat, axis=1)).sum(axis=1)
+            emd[group_idx.max() + 1 :] = 0
 
         # scale emd to have original unit
         emd = emd / (num_bins - 1) * (x_max - x_min)
@@ -692,6 +685,35 @@ def calc_emd_for_ridgeline(data, group_id, num_bins, signed=True, diff=False):
     return emd_mat
 
 
+def calc_group_densities(x, group_idx, bins, num_groups):
+    """
+    Histogram density of each group in one pass, same as np.histogram for each group
+    (bins are [left, right), the last one is [left, right])
+
+    Inputs:
+        x          [1d numpy array] values without None
+        group_idx  [1d numpy array] index of sorted group of each value (0, 1, ...)
+        bins       [1d numpy array] increasing bin edges
+        num_groups [integer] number of rows of result
+    Returns:
+        dens_mat [2d numpy array] (num_groups x num_bins), rows of groups without value are 0
+    """
+    num_bins = len(bins) - 1
+    bin_idx = np.digitize(x, bins) - 1
+    # right edge of the last bin is included
+    bin_idx[x == bins[-1]] = num_bins - 1
+
+    # values out of bins (nan) are not counted
+    is_in_bins = (bin_idx >= 0) & (bin_idx < num_bins)
+    flat_idx = group_idx[is_in_bins] * num_bins + bin_idx[is_in_bins]
+    bin_count = np.bincount(flat_idx, minlength=num_groups * num_bins).reshape(num_groups, num_bins)
+
+    dens_mat = np.zeros((num_groups, num_bins))
+    valid_count = bin_count[: group_idx.max() + 1]
+    dens_mat[: len(valid_count)] = valid_count / valid_count.sum(axis=1, keepdims=True)
+    return dens_mat
+
+
 @log_execution_time()
 def gen_term_groups(terms_obj):
     if 'Z' not in terms_obj['start_dt']:
@@ -15,11 +15,14 @@ from sklearn.metrics import (
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+from ap.common.services.penalty_path import fit_penalty_path
+
 # - preprocess_skdpage()
 #   # group lasso
 #   - calc_coef_and_group_order()
 #       - fit_grplasso()
-#           - calc_bic()
+#           - _fit_grplasso_one() (in worker processes)
+#               - calc_bic()
 #       - determine_group_order()
 #       - fit_ridge()
 #   # generate dict for skd and barchart
@@ -287,16 +290,10 @@ def fit_grplasso(X, y, grps, penalty_factors=[0.01, 0.1, 1.0, 10.0, 100.0], is_b
         'tol': 1e-2,
     }
 
-    for i, rho in enumerate(penalty_factors):
-        if is_binary:
-            gl = LogisticGroupLasso(group_reg=rho, **params)
-            gl.fit(X, y)
-            coef_history[i, :] = gl.coef_[:, 1].flatten() - gl.coef_[:, 0].flatten()
-        else:
-            gl = GroupLasso(group_reg=rho, frobenius_lipschitz=False, **params)
-            gl.fit(X, y)
-            coef_history[i, :] = gl.coef_.flatten()
-        bic[i] = calc_bic(gl.predict(X).flatten(), y, gl.coef_)
+    results = fit_penalty_path(_fit_grplasso_one, penalty_factors, X, y, params, is_binary, work_size=X.size)
+    for i, (rho, (coef, bic_value)) in enumerate(zip(penalty_factors, results)):
+        coef_history[i, :] = coef
+        bic[i] = bic_value
 
         if verbose:
             print('==========')
@@ -307,6 +304,29 @@ def fit_grplasso(X, y, grps, penalty_factors=[0.01, 0.1, 1.0, 10.0, 100.0], is_b
     return coef_history, bic
 
 
+def _fit_grplasso_one(rho, X, y, params, is_binary):
+    """
+    Fit group lasso of one penalty factor.
+
+    Returns
+    ----------
+    coef : 1d NumpyArray
+        Regression coefficients.
+    bic : float
+        BIC of fitted model.
+    """
+    if is_binary:
+        gl = LogisticGroupLasso(group_reg=rho, **params)
+        gl.fit(X, y)
+        coef = gl.coef_[:, 1].flatten() - gl.coef_[:, 0].flatten()
+    else:
+        gl = GroupLasso(group_reg=rho, frobenius_lipschitz=False, **params)
+        gl.fit(X, y)
+        coef = gl.coef_.flatten()
+
+    return coef, calc_bic(gl.predict(X).flatten(), y, gl.coef_)
+
+
 def calc_bic(y_est, y_true, coef):
     # calc_bic(mse, sample_size, coef):
     """
@@ -101,8 +101,9 @@ from ap.common.constants import (
 )
 from ap.common.cryptography_utils import encrypt
 from ap.common.logger import logger
-from ap.common.memoize import clear_cache
+from ap.common.memoize import clear_cache, get_cache_stats
 from ap.common.pydn.dblib.db_proxy_readonly import check_db_con
+from ap.common.pydn.dblib.postgresql_pool import get_pool_stats
 from ap.common.scheduler import JobType, multiprocessingLock, remove_jobs, threadingLock
 from ap.common.services.http_content import json_dumps, orjson_dumps
 from ap.common.services.import_export_config_and_master_data import (
@@ -189,8 +190,10 @@ from bridge.services.data_import import MASTER_COL_TYPES
 from bridge.services.etl_services.etl_db_service import (
     get_n_save_partition_range_time_from_factory_db,
 )
+from bridge.services.function_column_store import add_backfill_function_columns_job
 from bridge.services.master_catalog import MasterColumnMetaCatalog
 from bridge.services.proc_link_simulation import sim_gen_global_id
+from config import is_persist_function_columns
 from grpc_server.connection import check_connection_to_server
 
 api_setting_module_blueprint = Blueprint('api_setting_module', __name__, url_prefix='/ap/api/setting')
@@ -959,6 +962,10 @@ def post_function_config():
                 CfgProcessColumn.delete_by_ids([func_col.process_column_id], session=meta_session)
                 MData.delete_by_ids([func_col.process_column_id], session=meta_session)
 
+    if is_persist_function_columns():
+        # store new/changed function columns into transaction table, outdated ones are dropped
+        add_backfill_function_columns_job(proc_id)
+
     cfg_col_ids = CfgProcessFunctionColumn.get_all_cfg_col_ids()
 
     return jsonify({'cfg_col_ids': cfg_col_ids, 'dict_rename_col_id': dict_rename_col_id}), 200
@@ -2115,3 +2122,12 @@ def clear_cache_api():
     """[Summary] delete cache in backend, only used for test"""
     clear_cache()
     return json_dumps({}), 200
+
+
+@api_setting_module_blueprint.route('/cache_stats', methods=['GET'])
+def cache_stats_api():
+    """[Summary] memoize hit/miss counters (current process) and memory/disk usage per cache type,
+    usage/wait counters of postgres connection pools (current process)"""
+    dic_stats = get_cache_stats()
+    dic_stats['DB_POOL'] = get_pool_stats()
+    return json_dumps(dic_stats), 200
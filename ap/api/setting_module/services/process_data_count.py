@@ -10,6 +10,7 @@ from ap import log_execution_time
 from ap.common.common_utils import get_current_timestamp
 from ap.common.constants import CacheType
 from ap.common.memoize import set_all_cache_expired
+from ap.common.range_cache import invalidate_range_cache
 from ap.trace_data.models import ProcDataCount
 
 
@@ -86,6 +87,8 @@ def save_proc_data_count_multiple_dfs(
     db_instance.bulk_insert(ProcDataCount.get_table_name(), aggregated_df.columns, aggregated_df.values.tolist())
 
     # clear cache
+    hours = aggregated_df[ProcDataCount.datetime.key]
+    invalidate_range_cache(proc_id, hours.min(), hours.max() + pd.Timedelta(hours=1))
     set_all_cache_expired(CacheType.TRANSACTION_DATA)
 
 
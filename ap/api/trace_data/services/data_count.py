@@ -35,7 +35,7 @@ def get_data_count_by_time_range(proc_id, start_date, end_date, query_type, loca
     df_sum[date_time_col] = pd.to_datetime(df_sum[date_time_col])
     df_sum[count_col] = 0
 
-    df_sum = df_sum.append(df)
+    df_sum = pd.concat([df_sum, df])
     date_time_series = df_sum[date_time_col].dt.strftime(DATE_FORMAT_FOR_ONE_HOUR)
     df_sum[date_time_col] = pd.to_datetime(date_time_series)
     df_sum = df_sum.groupby(pd.Grouper(key=date_time_col, freq=freq))[count_col].sum().reset_index()
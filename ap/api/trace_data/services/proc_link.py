@@ -23,7 +23,7 @@ from ap.setting_module.services.background_process import send_processing_info
 from ap.trace_data.models import ProcDataCount
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.transaction_model import TransactionData
-from bridge.services.proc_link import gen_proc_link_of_edge
+from bridge.services.proc_link import ProcLinkWatermark, gen_proc_link_of_edge_incremental
 
 # 2 proc join key string
 JOIN_KEY = 'key'
@@ -180,21 +180,62 @@ def show_proc_link_info():
 #     return dic_proc_cnt
 
 
+def get_proc_link_watermarks():
+    """
+    Count and watermark of previous count of each edge
+    :return: {(self_proc_id, target_proc_id): (matched_count, watermark)}
+    """
+    dic_watermark = {}
+    counted_edges = set()
+    duplicated_edges = set()
+    for rec in ProcLinkCount.get_all():
+        edge = (rec.process_id, rec.target_process_id)
+        if edge in counted_edges:
+            duplicated_edges.add(edge)
+        counted_edges.add(edge)
+        if rec.trace_fingerprint is None:
+            continue
+        watermark = ProcLinkWatermark(
+            trace_fingerprint=rec.trace_fingerprint,
+            self_max_id=rec.self_max_id,
+            self_row_count=rec.self_row_count,
+            target_max_id=rec.target_max_id,
+            target_row_count=rec.target_row_count,
+        )
+        dic_watermark[edge] = (rec.matched_count, watermark)
+
+    # count of edge is summed from many records, not resumable
+    for edge in duplicated_edges:
+        dic_watermark.pop(edge, None)
+
+    return dic_watermark
+
+
 def count_proc_links():
+    """
+    Count matched rows of each edge, only rows imported after previous count are joined
+    :return: {edge: count}, {edge: watermark}
+    """
     edges = CfgTrace.get_all()
+    dic_prev_watermark = get_proc_link_watermarks()
     dic_count = {}
+    dic_watermark = {}
     with BridgeStationModel.get_db_proxy() as db_instance:
         for edge in edges:
-            edge_cnt = gen_proc_link_of_edge(db_instance, edge, limit=None)
-            dic_count[(edge.self_process_id, edge.target_process_id)] = edge_cnt
+            edge_key = (edge.self_process_id, edge.target_process_id)
+            counted, watermark = dic_prev_watermark.get(edge_key, (None, None))
+            edge_cnt, watermark = gen_proc_link_of_edge_incremental(db_instance, edge, watermark, counted)
+            dic_count[edge_key] = edge_cnt
+            dic_watermark[edge_key] = watermark
             logger.debug(
                 f'[ProcLinkCount] Self proc id {edge.self_process_id} - Target proc id {edge.target_process_id}:'
                 f' {edge_cnt}',
             )
-    return dic_count
+    return dic_count, dic_watermark
 
 
-def update_proc_link_count(dic_count):
+def update_proc_link_count(dic_count, dic_watermark=None):
+    dic_watermark = dic_watermark or {}
     with make_session() as meta_session:
         ProcLinkCount.delete_all(meta_session)
         for (self_proc, target_proc), matched_count in dic_count.items():
@@ -202,6 +243,13 @@ def update_proc_link_count(dic_count):
             rec.process_id = self_proc
             rec.target_process_id = target_proc
             rec.matched_count = matched_count
+            watermark: ProcLinkWatermark = dic_watermark.get((self_proc, target_proc))
+            if watermark is not None:
+                rec.trace_fingerprint = watermark.trace_fingerprint
+                rec.self_max_id = watermark.self_max_id
+                rec.self_row_count = watermark.self_row_count
+                rec.target_max_id = watermark.target_max_id
+                rec.target_row_count = watermark.target_row_count
             meta_session.merge(rec)
     logger.debug('[ProcLinkCount] Done Update proc link count proc id')
 
@@ -251,9 +299,9 @@ def proc_link_count(_job_id=None, _job_name=None):
 
 def proc_link_count_main():
     yield 0
-    dic_count = count_proc_links()
+    dic_count, dic_watermark = count_proc_links()
     yield 80
-    update_proc_link_count(dic_count)
+    update_proc_link_count(dic_count, dic_watermark)
     yield 100
 
 
@@ -0,0 +1,192 @@
+import dataclasses
+import pickle
+import struct
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from ap.common.constants import COLUMNAR_CACHE_COMPRESSION
+from ap.common.logger import logger
+
+# columnar cache file: MAGIC | sidecar length (uint64) | pickled sidecar | arrow ipc file of each DataFrame
+COLUMNAR_CACHE_MAGIC = b'APARROW1'
+COLUMNAR_CACHE_HEADER = struct.Struct('<Q')
+# extension dtypes that arrow restores as they are (pandas metadata of ipc file)
+EXACT_ARROW_EXTENSION_DTYPES = (
+    pd.StringDtype,
+    pd.BooleanDtype,
+    pd.DatetimeTZDtype,
+    pd.Int8Dtype,
+    pd.Int16Dtype,
+    pd.Int32Dtype,
+    pd.Int64Dtype,
+    pd.UInt8Dtype,
+    pd.UInt16Dtype,
+    pd.UInt32Dtype,
+    pd.UInt64Dtype,
+    pd.Float32Dtype,
+    pd.Float64Dtype,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class FramePlaceholder:
+    """
+    Stand-in for a DataFrame of cached value in pickled sidecar, `position` is its order in the cache file
+    """
+
+    position: int
+
+
+def extract_frames(value, frames: List[pd.DataFrame]):
+    """
+    Replace DataFrames in (nested) tuple/list/dict by FramePlaceholder, DataFrames are appended to `frames`
+    """
+    if type(value) is pd.DataFrame:
+        frames.append(value)
+        return FramePlaceholder(len(frames) - 1)
+
+    if isinstance(value, tuple) and not hasattr(value, '_fields'):
+        return tuple(extract_frames(val, frames) for val in value)
+
+    if type(value) is list:
+        return [extract_frames(val, frames) for val in value]
+
+    if type(value) is dict:
+        return {key: extract_frames(val, frames) for key, val in value.items()}
+
+    return value
+
+
+def restore_frames(value, frames: List[pd.DataFrame]):
+    if isinstance(value, FramePlaceholder):
+        return frames[value.position]
+
+    if isinstance(value, tuple) and not hasattr(value, '_fields'):
+        return tuple(restore_frames(val, frames) for val in value)
+
+    if type(value) is list:
+        return [restore_frames(val, frames) for val in value]
+
+    if type(value) is dict:
+        return {key: restore_frames(val, frames) for key, val in value.items()}
+
+    return value
+
+
+def is_exact_arrow_values(values) -> bool:
+    """
+    Values (Series / Index) come back from arrow with the same dtype and values
+    Object values must be strings with None as null: ints/None come back as float, NaN comes back as None
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return is_exact_arrow_values(dtype.categories)
+
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return isinstance(dtype, EXACT_ARROW_EXTENSION_DTYPES)
+
+    if dtype == object:
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            return False
+
+        return all(val is None for val in values[pd.isna(values)])
+
+    return dtype.kind in 'biufMm'
+
+
+def is_columnar_frame(df: pd.DataFrame) -> bool:
+    """
+    DataFrame is restored from arrow exactly (same labels, dtypes and values as by pickle)
+    """
+    if df.attrs or not isinstance(df.index, pd.RangeIndex) or isinstance(df.columns, pd.MultiIndex):
+        return False
+
+    if not all(isinstance(col, str) for col in df.columns) or not df.columns.is_unique:
+        return False
+
+    return all(is_exact_arrow_values(df.iloc[:, col_idx]) for col_idx in range(df.shape[1]))
+
+
+def frame_to_ipc(df: pd.DataFrame) -> pa.Buffer:
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=COLUMNAR_CACHE_COMPRESSION)
+    with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode_cache_value(value, is_columnar=False) -> Tuple[List[bytes], bool]:
+    """
+    Serialize a cached value.
+    Columnar: DataFrames are written as LZ4 arrow ipc files, the rest of value is a small pickled sidecar.
+    Fallback to pickle if value has no DataFrame or a DataFrame can not be restored from arrow exactly
+    (see is_columnar_frame), a decoded value is always the same as the pickled one.
+    :return: chunks of file content, is columnar
+    """
+    if is_columnar:
+        frames = []
+        skeleton = extract_frames(value, frames)
+        if frames and not all(is_columnar_frame(df) for df in frames):
+            logger.info('[CACHE] DataFrame can not be restored from arrow exactly, use pickle')
+        elif frames:
+            try:
+                ipc_buffers = [frame_to_ipc(df) for df in frames]
+            except (pa.ArrowException, TypeError, ValueError) as e:
+                logger.info(f'[CACHE] can not write columnar cache, use pickle. {e}')
+            else:
+                positions = []
+                offset = 0
+                for buffer in ipc_buffers:
+                    positions.append((offset, buffer.size))
+                    offset += buffer.size
+
+                sidecar = pickle.dumps({'skeleton': skeleton, 'frames': positions}, protocol=pickle.HIGHEST_PROTOCOL)
+                header = COLUMNAR_CACHE_MAGIC + COLUMNAR_CACHE_HEADER.pack(len(sidecar))
+                return [header, sidecar, *ipc_buffers], True
+
+    return [pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)], False
+
+
+def read_cache_value(source: pa.NativeFile) -> Tuple[Any, Optional[bytes]]:
+    """
+    Read a value written by encode_cache_value from an arrow random access file
+    :return: cached value, content if it is pickled (None for columnar content)
+    """
+    if source.read(len(COLUMNAR_CACHE_MAGIC)) != COLUMNAR_CACHE_MAGIC:
+        source.seek(0)
+        data = source.read()
+        return pickle.loads(data), data
+
+    (sidecar_size,) = COLUMNAR_CACHE_HEADER.unpack(source.read(COLUMNAR_CACHE_HEADER.size))
+    sidecar = pickle.loads(source.read(sidecar_size))
+    base_offset = len(COLUMNAR_CACHE_MAGIC) + COLUMNAR_CACHE_HEADER.size + sidecar_size
+    frames = []
+    for offset, size in sidecar['frames']:
+        buffer = source.read_at(size, base_offset + offset)
+        table = pa.ipc.open_file(buffer).read_all()
+        frames.append(table.to_pandas())
+
+    return restore_frames(sidecar['skeleton'], frames), None
+
+
+def decode_cache_file(file_name) -> Tuple[Any, Optional[bytes]]:
+    """
+    Read a cache file written by encode_cache_value.
+    Columnar file is memory-mapped, arrow buffers are read without copying file content into python bytes.
+    :return: cached value, file content if it is a pickle file (None for columnar file)
+    """
+    with pa.memory_map(file_name, 'r') as source:
+        return read_cache_value(source)
+
+
+def decode_cache_bytes(data: bytes) -> Any:
+    """
+    Read a value written by encode_cache_value from memory (ex: payload of gRPC response)
+    """
+    with pa.BufferReader(pa.py_buffer(data)) as source:
+        value, _ = read_cache_value(source)
+
+    return value
@@ -20,7 +20,7 @@ from io import IOBase
 from itertools import chain, permutations
 from multiprocessing import Manager
 from pathlib import Path
-from typing import IO, List, TextIO, Tuple, Union
+from typing import IO, List, Optional, TextIO, Tuple, Union
 
 import chardet
 import numpy as np
@@ -1649,6 +1649,144 @@ def convert_nan_to_none(df: DataFrame, convert_to_list: bool = False):
     return df
 
 
+def convert_nan_to_na(df: DataFrame):
+    """
+    Same null rule as convert_nan_to_none, but keep columnar dtypes and mark null values as NA.
+    Use before PostgreSQL.bulk_copy
+    """
+    df = df.convert_dtypes().reset_index(drop=True)
+    null_values = [str(pd.NaT), str(pd.NA), str(np.NAN), EMPTY_STRING, np.inf, -np.inf]
+
+    for col in df.columns:
+        s: Series = df[col]
+        if is_numeric_dtype(s) or is_datetime64_any_dtype(s):
+            continue
+
+        is_null = s.isin(null_values)
+        if is_null.any():
+            df[col] = s.mask(is_null)
+
+    return df
+
+
+class ChunkAccumulator:
+    """
+    Collect DataFrame/Series chunks in a list and concat them once, instead of calling `append` per chunk
+    (each `append` copies all rows accumulated so far).
+
+    - `len(accumulator)` is the number of rows collected, use it to check the flush threshold
+    - `dedup_columns`: drop rows whose values of these columns were already seen (keep first), same result as
+      `drop_duplicates(subset=dedup_columns)` on the concatenated frame, but only the new chunk is hashed.
+      Rows with a seen 64-bit hash are compared with the seen row before being dropped: a hash collision never
+      drops a distinct row (at worst it keeps a duplicate)
+    """
+
+    def __init__(self, dedup_columns: Optional[List[str]] = None, ignore_index: bool = True):
+        self.dedup_columns = dedup_columns
+        self.ignore_index = ignore_index
+        self._chunks: List[Union[DataFrame, Series]] = []
+        self._row_count = 0
+        self._reset_seen_rows()
+
+    def __len__(self):
+        return self._row_count
+
+    def append(self, chunk: Union[DataFrame, Series]):
+        if self.dedup_columns:
+            chunk = self._drop_seen_rows(chunk)
+
+        if len(chunk) or not self._chunks:
+            # keep empty chunk only when it's the first one, so `concat` still returns its columns
+            self._chunks.append(chunk)
+            self._row_count += len(chunk)
+
+    def concat(self) -> Union[DataFrame, Series, None]:
+        """
+        Concat collected chunks, the result is cached until next `append`
+        :return: None if nothing was appended
+        """
+        if not self._chunks:
+            return None
+
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks, ignore_index=self.ignore_index)]
+
+        return self._chunks[0]
+
+    def pop(self) -> DataFrame:
+        """
+        Concat collected chunks and reset accumulator (seen keys included)
+        :return: empty DataFrame if nothing was appended
+        """
+        result = self.concat()
+        self._chunks = []
+        self._row_count = 0
+        self._reset_seen_rows()
+        return pd.DataFrame() if result is None else result
+
+    def _reset_seen_rows(self):
+        # row hash -> position of its row in kept key rows
+        self._seen_keys = {}
+        # values of dedup columns of kept rows (to confirm hash matches), capacity grows by doubling
+        self._key_values: Optional[np.ndarray] = None
+        self._key_row_count = 0
+
+    def _drop_seen_rows(self, df: DataFrame) -> DataFrame:
+        if df.empty:
+            return df
+
+        # missing columns are all NA, same as they are after concat
+        df_keys = df.reindex(columns=self.dedup_columns)
+        keys = pd.util.hash_pandas_object(df_keys, index=False).to_numpy()
+
+        # equal rows have equal hashes, so only rows sharing a hash are compared
+        is_new = np.ones(len(df), dtype=bool)
+        is_dup_key = pd.Series(keys).duplicated(keep=False).to_numpy()
+        if is_dup_key.any():
+            is_new[is_dup_key] = ~df_keys[is_dup_key].duplicated().to_numpy()
+
+        if self._seen_keys:
+            get_position = self._seen_keys.get
+            seen_positions = np.array([get_position(key, -1) for key in keys.tolist()], dtype=np.int64)
+            is_seen_key = is_new & (seen_positions >= 0)
+            if is_seen_key.any():
+                is_new[is_seen_key] = ~self._is_seen_row(df_keys[is_seen_key], seen_positions[is_seen_key])
+
+        if is_new.any():
+            new_positions = range(self._key_row_count, self._key_row_count + int(is_new.sum()))
+            # on hash collision, the hash points to the latest row: a duplicate of the other row may be kept
+            self._seen_keys.update(zip(keys[is_new].tolist(), new_positions))
+            self._add_key_values(df_keys[is_new].to_numpy(dtype=object))
+
+        return df if is_new.all() else df[is_new]
+
+    def _add_key_values(self, values: np.ndarray):
+        row_count = self._key_row_count + len(values)
+        if self._key_values is None or row_count > len(self._key_values):
+            key_values = np.empty((max(row_count, 2 * self._key_row_count), values.shape[1]), dtype=object)
+            if self._key_values is not None:
+                key_values[: self._key_row_count] = self._key_values[: self._key_row_count]
+            self._key_values = key_values
+
+        self._key_values[self._key_row_count : row_count] = values
+        self._key_row_count = row_count
+
+    def _is_seen_row(self, df_keys: DataFrame, positions: np.ndarray) -> np.ndarray:
+        """
+        Compare rows with kept rows at `positions`, NA equals NA (same as `duplicated`)
+        """
+        rows = df_keys.to_numpy(dtype=object)
+        seen_rows = self._key_values[positions]
+        is_na, is_seen_na = pd.isna(rows), pd.isna(seen_rows)
+        # compare not NA values only, `==` with pd.NA is not a bool
+        is_equal = np.where(
+            is_na | is_seen_na,
+            is_na & is_seen_na,
+            np.where(is_na, None, rows) == np.where(is_seen_na, None, seen_rows),
+        )
+        return is_equal.all(axis=1)
+
+
 def get_none_series(len_series):
     """
     Add None add cast to type Int64
@@ -24,6 +24,23 @@ MULTIPLE_VALUES_CONNECTOR = '|'
 SQL_IN_MAX = 900
 FEATHER_MAX_RECORD = 5_000_000
 DATABASE_LOGIN_TIMEOUT = 3  # seconds
+DB_POOL_MAX_SIZE = 30  # waitress threads (20) + scheduler jobs
+DB_POOL_ACQUIRE_TIMEOUT = 60  # seconds
+DB_POOL_HEALTH_CHECK_INTERVAL = 30  # seconds, ping connection idle longer than this before reuse
+DB_POOL_MAX_LIFETIME = 60 * 60  # seconds
+CSV_READ_MAX_WORKERS = 4  # worker processes reading csv files in parallel, 1: read in scheduler process
+CSV_READ_MAX_MEMORY = 1_000_000_000  # bytes, estimated memory of files being read ahead
+CSV_READ_MEMORY_FACTOR = 5  # estimated DataFrame size / csv file size
+# max number of trace paths queried concurrently (each on its own pooled connection) in one graph request
+# set 1 to query paths one by one
+TRACE_SQL_MAX_WORKERS = 4
+TRACE_SQL_POOL_ACQUIRE_TIMEOUT = 1  # seconds, path falls back to caller's connection when pool is busy
+# worker processes (shared by requests) fitting penalty factors of (group) lasso in parallel, 1: fit in request thread
+PENALTY_PATH_MAX_WORKERS = 4
+PENALTY_PATH_MIN_PARALLEL_WORK = 1_000_000  # estimated work of one fit, smaller fits are faster without worker
+SYNC_TRANSACTION_MAX_WORKERS = 4  # processes synced from bridge station at the same time
+SYNC_TRANSACTION_CHUNK_ROWS = 100_000  # transaction rows synced and committed at a time, sync resumes after a chunk
+SYNC_TRANSACTION_DATA = False  # copy transaction rows from bridge station to edge server, only factory imports if off
 VAR_X = 'X'
 VAR_Y = 'Y'
 DEFAULT_NONE_VALUE = pd.NA
@@ -332,6 +349,16 @@ dict_data_type_db = {
     RawDataTypeDB.TIME.value: 'time',
 }
 
+# REAL values of function columns are double precision in pandas, `real` would round them
+dict_function_column_data_type_db = {
+    RawDataTypeDB.INTEGER.value: 'integer',
+    RawDataTypeDB.REAL.value: 'double precision',
+    RawDataTypeDB.TEXT.value: 'text',
+    RawDataTypeDB.BOOLEAN.value: 'boolean',
+    RawDataTypeDB.SMALL_INT.value: 'smallint',
+    RawDataTypeDB.BIG_INT.value: 'bigint',
+}
+
 dict_invalid_data_type_regex = {
     RawDataTypeDB.INTEGER.value: r'[^-0-9]+',
     RawDataTypeDB.REAL.value: r'[^-0-9\.eg-]+',
@@ -1069,6 +1096,14 @@ DATABASE_HOST_ENV = 'DATABASE_HOST_ENV'
 DATABASE_PORT_ENV = 'DATABASE_PORT_ENV'
 DATABASE_USERNAME_ENV = 'DATABASE_USERNAME_ENV'
 DATABASE_PASSWORD_ENV = 'DATABASE_PASSWORD_ENV'
+DATABASE_POOL_SIZE_ENV = 'DATABASE_POOL_SIZE_ENV'
+CSV_READ_WORKERS_ENV = 'CSV_READ_WORKERS_ENV'
+CSV_READ_MAX_MEMORY_ENV = 'CSV_READ_MAX_MEMORY_ENV'
+PULL_DB_CHUNK_MEMORY_ENV = 'PULL_DB_CHUNK_MEMORY_ENV'
+PERSIST_FUNCTION_COLUMNS_ENV = 'PERSIST_FUNCTION_COLUMNS_ENV'
+PENALTY_PATH_WORKERS_ENV = 'PENALTY_PATH_WORKERS_ENV'
+SYNC_TRANSACTION_WORKERS_ENV = 'SYNC_TRANSACTION_WORKERS_ENV'
+SYNC_TRANSACTION_DATA_ENV = 'SYNC_TRANSACTION_DATA_ENV'
 
 
 class AppEnv(Enum):
@@ -2223,6 +2258,7 @@ class JobType(Enum):
     CLEAN_ZIP = auto()
     CLEAN_EXPIRED_REQUEST = auto()
     PULL_FOR_AUTO_LINK = auto()
+    BACKFILL_FUNCTION_COLUMNS = auto()
 
     @classmethod
     def transaction_import_job_id(cls, process_id: int, is_past: bool = True) -> str:
@@ -2261,6 +2297,14 @@ MAX_IMPORT_CYCLE = 2_000_000
 JOB_DONE = 100  # percent
 PAST_YEARS_BACKWARD = -3
 FETCH_MANY_SIZE = 1_000_000
+PULL_DB_CHUNK_MEMORY = 500 * 1024 * 1024  # bytes, estimated DataFrame size of one chunk pulled from factory db
+PULL_DB_FIRST_CHUNK_ROWS = 10_000  # rows of first chunk, used to estimate memory usage per row
+PULL_DB_ROW_HASH_MEMORY = 100  # bytes, memory of one row hash kept to drop duplicate rows across chunks of a pull
+COPY_READ_BLOCK_SIZE = 8 * 1024 * 1024  # bytes
+COPY_BUFFER_IN_MEMORY_SIZE = 512 * 1024 * 1024  # bytes, COPY output larger than this is spilled to temp file
+COPY_CHUNK_SIZE = 200_000  # rows per COPY FROM STDIN
+COPY_NULL = ''  # null marker of COPY csv (unquoted empty value), non-null text is always quoted
+COPY_NA_REP = '\x00'  # written for null then replaced by COPY_NULL, postgres text can not hold NUL
 TIME_ANCHORS = ('030000', '090000', '120000', '150000', '190000')  # hhmmss
 DAY_ANCHORS = ('02', '06', '10', '14', '18', '22', '26')  # day
 EFA_LIMIT_SCAN_MASTER = 500  # sql limit when select datetime by time range
@@ -2405,6 +2449,47 @@ class CacheType(Enum):
     OTHER = 4
 
 
+# memoize byte budgets, least recently used entries are evicted when a tier is over its budget
+MEMOIZE_MEMORY_BUDGET = {
+    CacheType.CONFIG_DATA: 64 * 1024 * 1024,
+    CacheType.TRANSACTION_DATA: 512 * 1024 * 1024,
+    CacheType.JUMP_FUNC: 64 * 1024 * 1024,
+    CacheType.OTHER: 128 * 1024 * 1024,
+}
+MEMOIZE_DISK_BUDGET = {
+    CacheType.CONFIG_DATA: 1024 * 1024 * 1024,
+    CacheType.TRANSACTION_DATA: 10 * 1024 * 1024 * 1024,
+    CacheType.JUMP_FUNC: 2 * 1024 * 1024 * 1024,
+    CacheType.OTHER: 1024 * 1024 * 1024,
+}
+MEMOIZE_DISK_INDEX_FILE_NAME = 'cache_index.sqlite3'
+MEMOIZE_ORPHAN_FILE_GRACE_SECONDS = 10 * 60  # cache file without index row is deleted after this
+MEMOIZE_SINGLE_FLIGHT_TIMEOUT = 10 * 60  # seconds an identical call waits for the running one before computing itself
+MEMOIZE_SINGLE_FLIGHT_POLL_INTERVAL = 0.5  # seconds between checks of abort / result of other process
+# time range cache of single process trace data (delta fetch), see ap.common.range_cache
+TRACE_RANGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+TRACE_RANGE_CACHE_MAX_SEGMENTS = 48
+TRACE_RANGE_CACHE_TTL = 30 * 60  # seconds, segments are fetched again after it
+# imported data count is per hour in data time zone, drop a wider window than the imported hours
+TRACE_RANGE_CACHE_INVALIDATE_MARGIN = pd.Timedelta(days=1)
+COLUMNAR_CACHE_COMPRESSION = 'lz4'  # arrow ipc compression of DataFrames in TRANSACTION_DATA cache files
+# channel to bridge station, see grpc_server.services.grpc_service_proxy
+GRPC_MAX_MESSAGE_LENGTH = -1  # unlimited
+GRPC_KEEPALIVE_TIME_MS = 30 * 1000  # ping bridge station after the connection is idle this long
+GRPC_KEEPALIVE_TIMEOUT_MS = 10 * 1000  # connection is closed if a ping is not acknowledged in this time
+GRPC_RESULT_CHUNK_SIZE = 1024 * 1024  # bytes of an encoded result per streamed message
+# request/response metadata of generic gRPC methods, see grpc_server.services.grpc_payload
+GRPC_RESULT_ENCODING_KEY = 'ap-result-encoding'
+GRPC_RESULT_ENCODING_COLUMNAR = 'columnar'
+GRPC_RESULT_MODE_KEY = 'ap-result-mode'
+GRPC_RESULT_MODE_VALUE = 'value'  # stream the whole return value of a unary function in chunks
+TRACE_PATH_INDEX_MAX_GRAPHS = 8  # reachability/path indexes of trace graphs kept in memory, one per trace config
+# function columns stored in transaction tables at import time, see bridge.services.function_column_store
+PERSIST_FUNCTION_COLUMNS = False
+FUNCTION_COLUMN_PREFIX = 'fn_'
+FUNCTION_COLUMN_BACKFILL_DAYS = 7  # days of data evaluated and committed at a time by backfill job
+
+
 FACET_PER_ROW = 8
 FACET_ROW = 'facet_row'
 SENSORS = 'sensors'
@@ -2518,6 +2603,7 @@ class ListenNotifyType(BaseEnum):
     SHUTDOWN = auto()
     CATEGORY_ERROR = auto()
     RUNNING_JOB = auto()
+    CLEAR_RANGE_CACHE = auto()
 
 
 SEQUENCE_CACHE = 1000
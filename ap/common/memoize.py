@@ -1,40 +1,272 @@
 import contextlib
+import dataclasses
 import hashlib
+import io
 import os
 import pickle
 import shutil
+import sqlite3
+import sys
 import time
+import uuid
 from collections import OrderedDict
 from copy import deepcopy
+from datetime import date, datetime
+from decimal import Decimal
 from functools import wraps
-from threading import Lock
-from typing import Any
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 from flask_babel import get_locale
 
 from ap import PROCESS_QUEUE, ListenNotifyType, dic_config
+from ap.common.cache_codec import decode_cache_bytes, decode_cache_file, encode_cache_value
 from ap.common.common_utils import (
     check_exist,
     delete_file,
     get_cache_path,
+    get_data_path,
     get_process_queue,
-    read_pickle_file,
     resource_path,
-    write_to_pickle,
 )
-from ap.common.constants import AbsPath, CacheType, FlaskGKey, MemoizeKey
+from ap.common.constants import (
+    MEMOIZE_DISK_BUDGET,
+    MEMOIZE_DISK_INDEX_FILE_NAME,
+    MEMOIZE_MEMORY_BUDGET,
+    MEMOIZE_ORPHAN_FILE_GRACE_SECONDS,
+    MEMOIZE_SINGLE_FLIGHT_POLL_INTERVAL,
+    MEMOIZE_SINGLE_FLIGHT_TIMEOUT,
+    AbsPath,
+    CacheType,
+    FlaskGKey,
+    MemoizeKey,
+)
 from ap.common.logger import logger
-
-dic_config_cache = OrderedDict()
-dic_transaction_cache = OrderedDict()
-dic_jump_func_cache = OrderedDict()
-dic_other_cache = OrderedDict()
+from ap.common.range_cache import get_range_cache_stats, trace_range_cache
+from ap.common.services.request_time_out_handler import RequestTimeOutAPI, check_abort_process
 
 lock = Lock()
 USE_EXPIRED_CACHE_PARAM_NAME = '_use_expired_cache'
 JUMP_KEY_PARAM_NAME = 'jump_key'
 
 
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_evictions: int = 0
+    # identical concurrent calls served by the result of a running call
+    coalesced: int = 0
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with a byte budget.
+    Entry is a dict: {'value' or 'data' (pickled bytes), 'time', 'expired'}
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: Dict[str, Any], size: int) -> int:
+        """
+        :return: number of evicted entries
+        """
+        self.pop(key)
+        if size > self.max_bytes:
+            # too big for memory, it is only kept on disk (if any)
+            return 0
+
+        self.entries[key] = entry
+        self.sizes[key] = size
+        self.total_bytes += size
+
+        evicted = 0
+        while self.total_bytes > self.max_bytes:
+            old_key, _ = self.entries.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(old_key)
+            evicted += 1
+
+        return evicted
+
+    def pop(self, key):
+        if self.entries.pop(key, None) is not None:
+            self.total_bytes -= self.sizes.pop(key)
+
+    def expire(self):
+        for entry in self.entries.values():
+            entry['expired'] = True
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.total_bytes = 0
+
+
+class InflightCall:
+    """
+    A running computation of one cache key in this process, identical calls wait for its result
+    """
+
+    def __init__(self):
+        self.done = Event()
+        # snapshot of result taken before it is returned to caller of the running call, see entry_value
+        self.entry: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class DiskCacheIndex:
+    """
+    Index of cache files, stored in a sqlite file so that it is kept after restart and shared by all processes.
+    Each operation opens its own connection, sqlite locks the file between processes.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entry ('
+            'key TEXT PRIMARY KEY, cache_type TEXT NOT NULL, file TEXT NOT NULL, size INTEGER NOT NULL, '
+            'time REAL NOT NULL, accessed_at REAL NOT NULL, expired INTEGER NOT NULL DEFAULT 0)',
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entry_lru ON cache_entry (cache_type, accessed_at)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_lease (key TEXT PRIMARY KEY, owner TEXT NOT NULL, started_at REAL NOT NULL)',
+        )
+        return conn
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        with contextlib.closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM cache_entry WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            conn.execute('UPDATE cache_entry SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            return dict(row)
+
+    def put(self, key, cache_type: CacheType, file, size, max_bytes) -> List[str]:
+        """
+        Add an entry and evict least recently used entries of same cache type over `max_bytes`
+        :return: files of evicted entries, caller deletes them
+        """
+        now = time.time()
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entry (key, cache_type, file, size, time, accessed_at, expired) '
+                    'VALUES (?, ?, ?, ?, ?, ?, 0)',
+                    (key, cache_type.name, file, size, now, now),
+                )
+                total_bytes = conn.execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM cache_entry WHERE cache_type = ?',
+                    (cache_type.name,),
+                ).fetchone()[0]
+
+                evicted_keys = []
+                evicted_files = []
+                if total_bytes > max_bytes:
+                    rows = conn.execute(
+                        'SELECT key, file, size FROM cache_entry WHERE cache_type = ? AND key <> ? '
+                        'ORDER BY accessed_at',
+                        (cache_type.name, key),
+                    )
+                    for row in rows:
+                        if total_bytes <= max_bytes:
+                            break
+                        evicted_keys.append((row['key'],))
+                        evicted_files.append(row['file'])
+                        total_bytes -= row['size']
+
+                    conn.executemany('DELETE FROM cache_entry WHERE key = ?', evicted_keys)
+
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        return evicted_files
+
+    def delete(self, key):
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+
+    def acquire_lease(self, key, owner, timeout) -> bool:
+        """
+        Mark `key` as being computed by `owner`, so other processes wait for its cache file.
+        A lease older than `timeout` seconds is taken over (its process died or hung)
+        :return: True if lease is acquired
+        """
+        now = time.time()
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT started_at FROM cache_lease WHERE key = ?', (key,)).fetchone()
+                is_acquired = row is None or now - row['started_at'] > timeout
+                if is_acquired:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO cache_lease (key, owner, started_at) VALUES (?, ?, ?)',
+                        (key, owner, now),
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        return is_acquired
+
+    def release_lease(self, key, owner):
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('DELETE FROM cache_lease WHERE key = ? AND owner = ?', (key, owner))
+
+    def expire(self, cache_type: CacheType):
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('UPDATE cache_entry SET expired = 1 WHERE cache_type = ?', (cache_type.name,))
+
+    def clear(self):
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute('DELETE FROM cache_entry')
+            conn.execute('DELETE FROM cache_lease')
+
+    def get_files(self) -> Dict[str, str]:
+        with contextlib.closing(self._connect()) as conn:
+            return {row['file']: row['key'] for row in conn.execute('SELECT key, file FROM cache_entry')}
+
+    def get_usage(self) -> Dict[str, Dict[str, int]]:
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT cache_type, COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes '
+                'FROM cache_entry GROUP BY cache_type',
+            )
+            return {row['cache_type']: {'entries': row['entries'], 'bytes': row['bytes']} for row in rows}
+
+
+dic_memory_cache: Dict[CacheType, MemoryCache] = {
+    cache_type: MemoryCache(MEMOIZE_MEMORY_BUDGET[cache_type]) for cache_type in CacheType
+}
+dic_cache_stats: Dict[CacheType, CacheStats] = {cache_type: CacheStats() for cache_type in CacheType}
+dic_inflight_calls: Dict[str, InflightCall] = {}
+disk_cache_index = DiskCacheIndex(resource_path(get_data_path(), MEMOIZE_DISK_INDEX_FILE_NAME, level=AbsPath.SHOW))
+is_orphan_files_cleaned = False
+
+
 def is_obsolete(entry, duration=None):
     if duration:
         return time.time() - entry['time'] > duration
@@ -45,9 +277,140 @@ def is_obsolete(entry, duration=None):
     return False
 
 
-def compute_key(fn, args, kwargs=None, locale=None):
-    key = pickle.dumps((fn.__name__, args, kwargs, locale))
-    return hashlib.sha1(key).hexdigest()
+# type -> function returning a small picklable value that identifies content of an argument in cache key
+dic_cache_key_funcs: Dict[type, Callable[[Any], Any]] = {}
+IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, datetime, date, Decimal)
+
+
+def register_cache_key(cls):
+    """
+    Decorator, register function that derives cache key of `cls` arguments.
+    Classes that own their arguments can define `__cache_key__(self)` instead.
+    """
+
+    def decorator(fn):
+        dic_cache_key_funcs[cls] = fn
+        return fn
+
+    return decorator
+
+
+@register_cache_key(np.ndarray)
+def ndarray_cache_key(arr: np.ndarray):
+    if arr.dtype.hasobject:
+        # python objects, pickle them as is
+        raise TypeError('object array')
+
+    # hash raw memory instead of pickling a copy of it
+    digest = hashlib.sha1(np.ascontiguousarray(arr).reshape(-1).view(np.uint8).data).hexdigest()
+    return arr.dtype.str, arr.shape, digest
+
+
+@register_cache_key(pd.DataFrame)
+def data_frame_cache_key(df: pd.DataFrame):
+    # numpy columns are fingerprinted by ndarray_cache_key
+    values = [df.iloc[:, idx].values for idx in range(df.shape[1])]
+    return list(df.columns), [str(dtype) for dtype in df.dtypes], df.index, values
+
+
+@register_cache_key(pd.Series)
+def series_cache_key(series: pd.Series):
+    return series.name, str(series.dtype), series.index, series.values
+
+
+class CacheKeyPickler(pickle.Pickler):
+    """
+    Pickle arguments for cache key: big arrays/frames are replaced by their content fingerprint,
+    objects with `__cache_key__` by its result
+    """
+
+    def reducer_override(self, obj):
+        cls = type(obj)
+        key_func = dic_cache_key_funcs.get(cls) or getattr(cls, '__cache_key__', None)
+        if key_func is None:
+            return NotImplemented
+
+        try:
+            key = key_func(obj)
+        except TypeError:
+            # e.g. unhashable values in DataFrame, pickle it as is
+            return NotImplemented
+
+        return tuple, ((f'{cls.__module__}.{cls.__qualname__}', key),)
+
+
+def compute_key(fn, args, kwargs=None, locale=None) -> Optional[str]:
+    """
+    :return: cache key, None if an argument can not be used in cache key (result is not cached)
+    """
+    buffer = io.BytesIO()
+    try:
+        CacheKeyPickler(buffer).dump((fn.__name__, args, kwargs, locale))
+    except (pickle.PicklingError, TypeError, AttributeError, ValueError) as e:
+        logger.debug(f'[CACHE] {fn.__name__} is not cached, argument can not be used in cache key. {e}')
+        return None
+
+    return hashlib.sha1(buffer.getbuffer()).hexdigest()
+
+
+def is_immutable(value) -> bool:
+    if isinstance(value, IMMUTABLE_TYPES):
+        return True
+
+    if type(value) in (tuple, frozenset):
+        return all(is_immutable(val) for val in value)
+
+    return False
+
+
+def get_block_arrays(value) -> List[Any]:
+    if isinstance(value, np.ndarray):
+        return [value]
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # datetime / categorical extension arrays keep their data in a numpy array `_ndarray`
+        return [getattr(block.values, '_ndarray', block.values) for block in value._mgr.blocks]
+
+    return []
+
+
+def is_read_only(value) -> bool:
+    """
+    ndarray / DataFrame / Series that can not be written in place: numpy memory with writeable flag off.
+    Object arrays are excluded, their items are mutable python objects.
+    """
+    arrays = get_block_arrays(value)
+    if not arrays:
+        return False
+
+    return all(
+        isinstance(arr, np.ndarray) and not arr.dtype.hasobject and not arr.flags.writeable for arr in arrays
+    )
+
+
+def freeze_value(value):
+    """
+    Read-only copy of a ndarray / DataFrame / Series result.
+    Memoized functions can return it so that memory cache hits are served without deepcopy, see read_only_view
+    """
+    value = value.copy()
+    for arr in get_block_arrays(value):
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+
+    return value
+
+
+def read_only_view(value):
+    """
+    New object sharing memory of a read-only cached value, writing to that memory raises ValueError.
+    Columns can be added to a returned DataFrame without touching cached one,
+    existing columns are written in place by pandas (ValueError), copy the frame before changing them.
+    """
+    if isinstance(value, np.ndarray):
+        return value.view()
+
+    return value.copy(deep=False)
 
 
 def create_cache_file_path(key):
@@ -67,10 +430,292 @@ def clear_cache_files():
         shutil.rmtree(folder_path)
 
 
+def estimate_size(value) -> int:
+    """
+    Estimated memory size (bytes) of a cached value
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(val) for val in value)
+
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def write_cache_file(file_name, chunks: List[bytes]):
+    # write to temp file then rename, other processes never read a partial file
+    tmp_file_name = f'{file_name}.{os.getpid()}.tmp'
+    with open(tmp_file_name, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_file_name, file_name)
+
+
+def clean_orphan_cache_files(grace_seconds=MEMOIZE_ORPHAN_FILE_GRACE_SECONDS):
+    """
+    Delete cache files that are not in disk index (older than `grace_seconds`, they may be being written),
+    and index entries whose file was deleted
+    """
+    folder_path = resource_path(get_cache_path(), level=AbsPath.SHOW)
+    if not check_exist(folder_path):
+        return
+
+    dic_indexed_files = disk_cache_index.get_files()
+    now = time.time()
+    for file_name in os.listdir(folder_path):
+        file_path = os.path.join(folder_path, file_name)
+        if file_path in dic_indexed_files or not os.path.isfile(file_path):
+            continue
+
+        with contextlib.suppress(Exception):
+            if now - os.path.getmtime(file_path) > grace_seconds:
+                os.remove(file_path)
+
+    for file_path, key in dic_indexed_files.items():
+        if not check_exist(file_path):
+            disk_cache_index.delete(key)
+
+
+def get_from_disk(key, duration=None, is_use_expired=False):
+    """
+    :return: (entry, cached value, pickled data) of cache file, pickled data is None for columnar file.
+    (None, None, None) if not found
+    """
+    global is_orphan_files_cleaned
+    if not is_orphan_files_cleaned:
+        is_orphan_files_cleaned = True
+        with contextlib.suppress(Exception):
+            clean_orphan_cache_files()
+
+    try:
+        entry = disk_cache_index.get(key)
+    except sqlite3.Error as e:
+        logger.info(e)
+        return None, None, None
+
+    if entry is None or not (is_use_expired or not is_obsolete(entry, duration)):
+        return None, None, None
+
+    try:
+        value, data = decode_cache_file(entry['file'])
+    except FileNotFoundError:
+        # file was deleted by clean cache job
+        with contextlib.suppress(sqlite3.Error):
+            disk_cache_index.delete(key)
+        return None, None, None
+
+    return entry, value, data
+
+
+def save_to_disk(key, cache_type: CacheType, chunks: List[bytes]):
+    file_name = create_cache_file_path(key)
+    size = sum(len(chunk) for chunk in chunks)
+    try:
+        write_cache_file(file_name, chunks)
+    except OSError as e:
+        # e.g. file is being read by another process on Windows, keep it in memory only
+        logger.info(e)
+        return
+
+    try:
+        evicted_files = disk_cache_index.put(key, cache_type, file_name, size, MEMOIZE_DISK_BUDGET[cache_type])
+    except sqlite3.Error as e:
+        logger.info(e)
+        return
+
+    for evicted_file in evicted_files:
+        delete_cache_file(evicted_file)
+
+    with lock:
+        dic_cache_stats[cache_type].disk_evictions += len(evicted_files)
+
+
+def get_cached_value(fn, key, cache_type: CacheType, duration=None, is_use_expired=False, is_save_file=False):
+    """
+    :return: (is hit, cached value)
+    """
+    cache = dic_memory_cache[cache_type]
+    stats = dic_cache_stats[cache_type]
+    with lock:
+        entry = cache.get(key)
+
+    if entry is not None and (is_use_expired or not is_obsolete(entry, duration)):
+        logger.debug(f'used cache: {fn.__name__}')
+        with lock:
+            stats.hits += 1
+
+        return True, entry_value(entry)
+
+    if is_save_file:
+        entry, value, data = get_from_disk(key, duration, is_use_expired)
+        if entry is not None:
+            logger.debug(f'used cache file: {fn.__name__}')
+            with lock:
+                stats.disk_hits += 1
+                if data is not None:
+                    memory_entry = {'data': data, 'time': entry['time'], 'expired': bool(entry['expired'])}
+                    stats.evictions += cache.put(key, memory_entry, len(data))
+            return True, value
+
+    return False, None
+
+
+def entry_value(entry: dict):
+    """
+    A new copy of value of a memory cache entry (or snapshot of an inflight call)
+    """
+    if 'data' in entry:
+        return pickle.loads(entry['data'])
+
+    if 'chunks' in entry:
+        return decode_cache_bytes(b''.join(entry['chunks']))
+
+    if entry.get('is_immutable'):
+        return entry['value']
+
+    if entry.get('is_read_only'):
+        return read_only_view(entry['value'])
+
+    # Must use deepcopy to avoid reference value will be overwritten later
+    return deepcopy(entry['value'])
+
+
+def wait_inflight_call(call: InflightCall, timeout=MEMOIZE_SINGLE_FLIGHT_TIMEOUT):
+    """
+    Wait for result of an identical call running in another thread.
+    Error of that call is raised here too, except abort / timeout of its own request.
+    :return: (is done, result). not done: caller computes by itself
+    """
+    deadline = time.monotonic() + timeout
+    while not call.done.wait(MEMOIZE_SINGLE_FLIGHT_POLL_INTERVAL):
+        check_abort_process()
+        if time.monotonic() > deadline:
+            return False, None
+
+    if isinstance(call.error, (BrokenPipeError, RequestTimeOutAPI)):
+        return False, None
+
+    if call.error is not None:
+        raise call.error
+
+    # no snapshot: result was read from cache file of other process, read it again
+    if call.entry is None:
+        return False, None
+
+    # caller of the running call may be changing its result already, copy from the snapshot
+    return True, entry_value(call.entry)
+
+
+def acquire_disk_lease(fn, key, cache_type: CacheType, duration=None, is_use_expired=False, owner=None):
+    """
+    Wait until no other process is computing `key`, and mark it as being computed by this call.
+    :return: (is hit, cached value saved by other process, is lease acquired)
+    """
+    deadline = time.monotonic() + MEMOIZE_SINGLE_FLIGHT_TIMEOUT
+    while True:
+        try:
+            if disk_cache_index.acquire_lease(key, owner, MEMOIZE_SINGLE_FLIGHT_TIMEOUT):
+                return False, None, True
+        except sqlite3.Error as e:
+            logger.info(e)
+            return False, None, False
+
+        if time.monotonic() > deadline:
+            return False, None, False
+
+        check_abort_process()
+        time.sleep(MEMOIZE_SINGLE_FLIGHT_POLL_INTERVAL)
+        is_hit, value = get_cached_value(fn, key, cache_type, duration, is_use_expired, is_save_file=True)
+        if is_hit:
+            return True, value, False
+
+
+def compute_and_cache(
+    fn,
+    args,
+    kwargs,
+    key,
+    cache_type: CacheType,
+    duration=None,
+    is_use_expired=False,
+    is_save_file=False,
+    is_use_cache=True,
+):
+    """
+    Run `fn` and save its result to cache
+    :param is_use_cache: False: do not wait for cache file of other process (caller asked not to use cache)
+    :return: result, snapshot entry of result for identical waiting calls (None if read from cache file)
+    """
+    stats = dic_cache_stats[cache_type]
+    lease_owner = None
+    if is_save_file and is_use_cache:
+        # cache file is shared by all processes, the other processes wait for it
+        lease_owner = uuid.uuid4().hex
+        is_hit, value, is_lease_acquired = acquire_disk_lease(fn, key, cache_type, duration, is_use_expired, lease_owner)
+        if is_hit:
+            with lock:
+                stats.coalesced += 1
+            return value, None
+
+        if not is_lease_acquired:
+            lease_owner = None
+
+    try:
+        with lock:
+            stats.misses += 1
+
+        check_abort_process()
+        result = fn(*args, **kwargs)
+        # request was aborted while computing, stop before caching and returning
+        check_abort_process()
+
+        if is_save_file:
+            chunks, is_columnar = encode_cache_value(result, is_columnar=cache_type is CacheType.TRANSACTION_DATA)
+            save_to_disk(key, cache_type, chunks)
+            if is_columnar:
+                # columnar file is memory-mapped on read, no need to keep another copy in memory
+                return result, {'chunks': chunks}
+
+            memory_entry = {'data': chunks[0], 'time': time.time()}
+            size = len(chunks[0])
+        else:
+            if is_immutable(result):
+                memory_entry = {'value': result, 'time': time.time(), 'is_immutable': True}
+            elif is_read_only(result):
+                # no deepcopy, caller of this call gets a view too
+                memory_entry = {'value': result, 'time': time.time(), 'is_read_only': True}
+                result = read_only_view(result)
+            else:
+                memory_entry = {'value': deepcopy(result), 'time': time.time()}
+            size = estimate_size(result)
+
+        with lock:
+            stats.evictions += dic_memory_cache[cache_type].put(key, memory_entry, size)
+
+        return result, memory_entry
+    finally:
+        if lease_owner is not None:
+            with contextlib.suppress(sqlite3.Error):
+                disk_cache_index.release_lease(key, lease_owner)
+
+
 def memoize(is_save_file=False, duration=None, cache_type: CacheType = CacheType.OTHER):
     """
     memoize function
-    :param is_save_file:
+    :param is_save_file: also save result to a cache file, shared by all processes and kept after restart
     :param duration: seconds. if None , cache will be clear when db changed.
     :param cache_type:
     :return:
@@ -105,6 +750,8 @@ def memoize(is_save_file=False, duration=None, cache_type: CacheType = CacheType
                                 break
 
                     key = compute_key(fn, jump_key)
+                    if key is None:
+                        return fn(*args, **kwargs)
             else:
                 try:
                     locale = get_locale()
@@ -112,38 +759,54 @@ def memoize(is_save_file=False, duration=None, cache_type: CacheType = CacheType
                     locale = None
 
                 key = compute_key(fn, args, kwargs, locale)
-                is_stop_using_cache = get_cache_attr(MemoizeKey.STOP_USING_CACHE)
+                if key is None:
+                    return fn(*args, **kwargs)
 
-            cache, cache_max_size = get_dic_cache_by_type(cache_type)
-            if not is_stop_using_cache and key in cache and (is_use_expired or not is_obsolete(cache[key], duration)):
-                logger.debug(f'used cache: {fn.__name__}')
-                if is_save_file:
-                    file_name = cache[key]['file']
-                    if check_exist(file_name):
-                        return read_pickle_file(file_name)
-                else:
-                    # Must use deepcopy to avoid reference value will be overwritten later
-                    return deepcopy(cache[key]['value'])
+                is_stop_using_cache = get_cache_attr(MemoizeKey.STOP_USING_CACHE)
 
-            result = fn(*args, **kwargs)
+            if not is_stop_using_cache:
+                is_hit, value = get_cached_value(fn, key, cache_type, duration, is_use_expired, is_save_file)
+                if is_hit:
+                    return value
 
-            if is_save_file:
-                file_name = create_cache_file_path(key)
-                write_to_pickle(result, file_name)
-                with lock:
-                    cache[key] = {'file': file_name, 'time': time.time()}
-            else:
-                with lock:
-                    cache[key] = {'value': deepcopy(result), 'time': time.time()}
-
-            # resize
+            # single flight: identical concurrent calls wait for the first one instead of computing again
             with lock:
-                while len(cache) > cache_max_size:
-                    key, dic_val = cache.popitem(last=False)
-                    if dic_val.get('file'):
-                        delete_cache_file(key)
-
-            return result
+                call = dic_inflight_calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = dic_inflight_calls[key] = InflightCall()
+
+            if not is_leader:
+                is_done, value = wait_inflight_call(call)
+                if is_done:
+                    with lock:
+                        dic_cache_stats[cache_type].coalesced += 1
+                    return value
+
+            try:
+                result, entry = compute_and_cache(
+                    fn,
+                    args,
+                    kwargs,
+                    key,
+                    cache_type,
+                    duration,
+                    is_use_expired,
+                    is_save_file,
+                    is_use_cache=not is_stop_using_cache,
+                )
+                if is_leader:
+                    call.entry = entry
+                return result
+            except BaseException as e:
+                if is_leader:
+                    call.error = e
+                raise
+            finally:
+                if is_leader:
+                    with lock:
+                        dic_inflight_calls.pop(key, None)
+                    call.done.set()
 
         return memoize2
 
@@ -155,9 +818,14 @@ def clear_cache():
     delete physical cache file/data
     :return:
     """
-    for cache_type in CacheType:
-        cache, _ = get_dic_cache_by_type(cache_type)
-        cache.clear()
+    with lock:
+        for cache in dic_memory_cache.values():
+            cache.clear()
+
+    trace_range_cache.clear()
+
+    with contextlib.suppress(sqlite3.Error):
+        disk_cache_index.clear()
 
     clear_cache_files()
     print('CLEAR ALL CACHE')
@@ -175,26 +843,46 @@ def set_all_cache_expired(cache_type: CacheType, is_main: bool = False):
 
         return
 
-    cache, _ = get_dic_cache_by_type(cache_type)
-    for dic_val in cache.values():
-        dic_val['expired'] = True
-
-    print(f'CACHE EXPIRED: {cache_type.name}')
+    if cache_type is CacheType.TRANSACTION_DATA:
+        # range segments hold rows read before data changed, recomputed results must not reuse them
+        trace_range_cache.clear()
 
+    with lock:
+        dic_memory_cache[cache_type].expire()
 
-def get_dic_cache_by_type(cache_type: CacheType) -> tuple[OrderedDict[str, Any], int]:
-    cache_max_size = 50
-    jump_cache_max_size = 200
-    if cache_type is CacheType.CONFIG_DATA:
-        return dic_config_cache, cache_max_size
+    with contextlib.suppress(sqlite3.Error):
+        disk_cache_index.expire(cache_type)
 
-    if cache_type is CacheType.TRANSACTION_DATA:
-        return dic_transaction_cache, cache_max_size
+    print(f'CACHE EXPIRED: {cache_type.name}')
 
-    if cache_type is CacheType.JUMP_FUNC:
-        return dic_jump_func_cache, jump_cache_max_size
 
-    return dic_other_cache, cache_max_size
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Hit/miss counters of current process and memory/disk usage per cache type
+    """
+    try:
+        dic_disk_usage = disk_cache_index.get_usage()
+    except sqlite3.Error as e:
+        logger.info(e)
+        dic_disk_usage = {}
+
+    dic_stats = {}
+    with lock:
+        for cache_type in CacheType:
+            cache = dic_memory_cache[cache_type]
+            disk_usage = dic_disk_usage.get(cache_type.name, {})
+            dic_stats[cache_type.name] = {
+                **dataclasses.asdict(dic_cache_stats[cache_type]),
+                'memory_entries': len(cache.entries),
+                'memory_bytes': cache.total_bytes,
+                'memory_budget': cache.max_bytes,
+                'disk_entries': disk_usage.get('entries', 0),
+                'disk_bytes': disk_usage.get('bytes', 0),
+                'disk_budget': MEMOIZE_DISK_BUDGET[cache_type],
+            }
+
+    dic_stats['TRACE_RANGE'] = get_range_cache_stats()
+    return dic_stats
 
 
 def get_cache_g_dict():
@@ -16,9 +16,10 @@ from ap.common.pydn.dblib.mssqlserver import MSSQLServer
 from ap.common.pydn.dblib.mysql import MySQL
 from ap.common.pydn.dblib.oracle import Oracle
 from ap.common.pydn.dblib.postgresql import PostgreSQL
+from ap.common.pydn.dblib.postgresql_pool import PooledPostgreSQL
 from ap.common.pydn.dblib.sqlite import SQLite3
 from ap.setting_module.models import CfgDataSource, CfgDataSourceDB
-from config import get_db_mode
+from config import get_db_mode, get_db_pool_size
 
 
 class DbProxy:
@@ -31,9 +32,22 @@ class DbProxy:
     db_detail: CfgDataSourceDB
     dic_last_connect_failed_time = {}
 
-    def __init__(self, data_src, immediate_isolation_level=False, force_connect=False):
+    def __init__(
+        self,
+        data_src,
+        immediate_isolation_level=False,
+        force_connect=False,
+        pool_size=None,
+        pool_timeout=None,
+    ):
+        """
+        :param pool_size: borrow PostgreSQL connection from a bounded pool of this size instead of opening a new one
+        :param pool_timeout: seconds to wait for a free pooled connection, default DB_POOL_ACQUIRE_TIMEOUT
+        """
         self.isolation_level = immediate_isolation_level
         self.force_connect = force_connect
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
         self.data_src = data_src
         if isinstance(data_src, CfgDataSource):
             self.db_basic = data_src
@@ -92,12 +106,22 @@ class DbProxy:
         else:
             raise Exception(MSG_NOT_SUPPORT_DB)
 
-        db_instance = target_db_class(
-            self.db_detail.host,
-            self.db_detail.dbname,
-            self.db_detail.username,
-            self.db_detail.get_password(True),
-        )
+        if target_db_class is PostgreSQL and self.pool_size:
+            db_instance = PooledPostgreSQL(
+                self.db_detail.host,
+                self.db_detail.dbname,
+                self.db_detail.username,
+                self.db_detail.get_password(True),
+                pool_size=self.pool_size,
+                pool_timeout=self.pool_timeout,
+            )
+        else:
+            db_instance = target_db_class(
+                self.db_detail.host,
+                self.db_detail.dbname,
+                self.db_detail.username,
+                self.db_detail.get_password(True),
+            )
 
         # use custom port or default port
         if self.db_detail.port:
@@ -148,10 +172,11 @@ def gen_data_source_of_bridge_webpage():
     return db_src
 
 
-def get_db_proxy():
+def get_db_proxy(pool_timeout=None):
     """
     Connect to db.session.
     Use when need handle by raw sql
+    Connections are borrowed from a per-process pool, see PostgreSQLPool
     """
 
-    return DbProxy(gen_data_source_of_bridge_webpage())
+    return DbProxy(gen_data_source_of_bridge_webpage(), pool_size=get_db_pool_size(), pool_timeout=pool_timeout)
@@ -237,7 +237,7 @@ class MySQL:
         cols = [column[0] for column in cur.description]
         yield cols
         while True:
-            rows = cur.fetchmany(size)
+            rows = cur.fetchmany(size() if callable(size) else size)
             if not rows:
                 break
 
@@ -262,7 +262,7 @@ class Oracle:
             cols = [column[0] for column in cursor.description]
             yield cols
             while True:
-                rows = cur.fetchmany(size)
+                rows = cur.fetchmany(size() if callable(size) else size)
                 if not rows:
                     break
 
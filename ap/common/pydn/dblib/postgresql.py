@@ -3,17 +3,77 @@
 # Author: Masato Yasuda (2018/01/04)
 # Copy from analysis_interface, sprint 83 commit d2da6c71305fba1d8f867cffacbcdf46874577aa (2021/02/10)
 
+import csv
+import io
 import select
+import tempfile
+from contextlib import contextmanager
 
+import numpy as np
+import pandas as pd
 import psycopg2
 import psycopg2.extras
+import pyarrow as pa
 from apscheduler.schedulers.base import STATE_STOPPED
+from pandas import DataFrame
+from pyarrow import csv as pa_csv
 from psycopg2.extras import execute_values
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql import Select
 
 from ap.common.common_utils import strip_all_quote
+from ap.common.constants import (
+    COPY_BUFFER_IN_MEMORY_SIZE,
+    COPY_CHUNK_SIZE,
+    COPY_NA_REP,
+    COPY_NULL,
+    COPY_READ_BLOCK_SIZE,
+)
 from ap.common.logger import log_execution_time, logger
+from ap.common.services.request_time_out_handler import cancellable_connection, check_abort_process
+
+# postgres type oid -> arrow type that run_sql_to_frame parses COPY output to.
+# Result frame has the same dtypes as pd.DataFrame(run_sql(...)) for these types
+PG_OID_TO_ARROW_TYPE = {
+    16: pa.bool_(),  # boolean
+    20: pa.int64(),  # bigint
+    21: pa.int64(),  # smallint
+    23: pa.int64(),  # integer
+    26: pa.int64(),  # oid
+    700: pa.float64(),  # real
+    701: pa.float64(),  # double precision
+    19: pa.string(),  # name
+    25: pa.string(),  # text
+    705: pa.string(),  # unknown (string literal)
+    1042: pa.string(),  # character
+    1043: pa.string(),  # character varying
+    1082: pa.date32(),  # date
+    1083: pa.time64('us'),  # time
+    1114: pa.timestamp('us'),  # timestamp
+    1184: pa.timestamp('us', tz='UTC'),  # timestamp with time zone
+}
+
+# pass to run_sql_to_frame to keep null-able integer and boolean without casting to float/object
+NULLABLE_TYPES_MAPPER = {
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}.get
+
+# values of object columns that bulk_copy can write as CSV text exactly (see pandas.api.types.infer_dtype)
+COPY_SAFE_INFERRED_TYPES = {
+    'empty',
+    'string',
+    'integer',
+    'mixed-integer',
+    'floating',
+    'mixed-integer-float',
+    'decimal',
+    'boolean',
+    'datetime64',
+    'datetime',
+    'date',
+    'time',
+}
 
 
 class PostgreSQL:
@@ -247,24 +307,111 @@ class PostgreSQL:
         # カラム名がRenameされた場合も対応出来る形に処理を変更
 
         logger.debug(sql)
-        if params is None:
-            cur.execute(sql)
-        else:
-            cur.execute(sql, params)
-        # cursor.descriptionはcolumnの配列
-        # そこから配列名(column[0])を取り出して配列columnsに代入
-        if not cur.description:
-            return [], []
+        with self._cancellable():
+            if params is None:
+                cur.execute(sql)
+            else:
+                cur.execute(sql, params)
+            # cursor.descriptionはcolumnの配列
+            # そこから配列名(column[0])を取り出して配列columnsに代入
+            if not cur.description:
+                return [], []
 
-        cols = [column[0] for column in cur.description]
-        # columnsは取得したカラム名、rowはcolumnsをKeyとして持つ辞書型の配列
-        # rowは取得したカラムに対応する値が順番にrow[0], row[1], ...として入っている
-        # それをdictでまとめてrowsに取得
-        rows = [dict(zip(cols, row)) for row in cur.fetchall()] if row_is_dict else cur.fetchall()
+            cols = [column[0] for column in cur.description]
+            # columnsは取得したカラム名、rowはcolumnsをKeyとして持つ辞書型の配列
+            # rowは取得したカラムに対応する値が順番にrow[0], row[1], ...として入っている
+            # それをdictでまとめてrowsに取得
+            rows = [dict(zip(cols, row)) for row in cur.fetchall()] if row_is_dict else cur.fetchall()
 
         cur.close()
         return cols, rows
 
+    @log_execution_time(prefix='POSTGRES')
+    def run_sql_to_frame(self, sql, params=None, types_mapper=None, as_object=False) -> DataFrame:
+        """Run a SELECT and return a dataframe without materializing python row tuples.
+        Result is streamed by `COPY (sql) TO STDOUT` as CSV (spilled to a temp file when large)
+        and parsed straight into typed columnar arrays by pyarrow.
+        Falls back to run_sql when the result has a type that can not be parsed exactly.
+        Column order and names (duplicated names also) are the same as run_sql.
+        :param sql: a single SELECT statement
+        :param params:
+        :param types_mapper: arrow type -> pandas dtype, ex: NULLABLE_TYPES_MAPPER
+        :param as_object: object columns of python values and None for null (types_mapper is ignored),
+            same as pd.DataFrame(rows, dtype='object') from run_sql
+        :return:
+        """
+        if not self._check_connection():
+            return None
+
+        sql = sql.strip().rstrip(';')
+        logger.debug(sql)
+        with self._cancellable(), self.connection.cursor() as cur:
+            # get column names and types without fetching any row
+            describe_sql = f'SELECT * FROM ({sql}) AS __describe__ LIMIT 0'
+            cur.execute(describe_sql, params)
+            cols = [column[0] for column in cur.description]
+            arrow_types = [PG_OID_TO_ARROW_TYPE.get(column[1]) for column in cur.description]
+
+            if any(arrow_type is None for arrow_type in arrow_types):
+                return self._run_sql_to_frame_by_rows(sql, params, as_object)
+
+            copy_sql = f'COPY ({sql}) TO STDOUT WITH (FORMAT csv)'
+            if params is not None:
+                copy_sql = cur.mogrify(copy_sql, params)
+
+            with tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_IN_MEMORY_SIZE) as buffer:
+                cur.copy_expert(copy_sql, buffer, size=COPY_READ_BLOCK_SIZE)
+                is_empty = not buffer.tell()
+                buffer.seek(0)
+                try:
+                    table = self._read_copy_csv(buffer, arrow_types, is_empty)
+                    df = self._table_to_object_frame(table) if as_object else table.to_pandas(types_mapper=types_mapper)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    logger.debug(e)
+                    return self._run_sql_to_frame_by_rows(sql, params, as_object)
+
+        df.columns = cols
+        return df
+
+    @staticmethod
+    def _read_copy_csv(buffer, arrow_types, is_empty) -> pa.Table:
+        # use position as name, sql result can have duplicated column names
+        names = [str(idx) for idx in range(len(arrow_types))]
+        if is_empty:
+            return pa.table([pa.array([], type=arrow_type) for arrow_type in arrow_types], names=names)
+
+        read_options = pa_csv.ReadOptions(column_names=names, block_size=COPY_READ_BLOCK_SIZE)
+        parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+        # COPY csv: NULL is an unquoted empty value, empty text is a quoted empty value
+        convert_options = pa_csv.ConvertOptions(
+            column_types=dict(zip(names, arrow_types)),
+            null_values=[''],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=['t'],
+            false_values=['f'],
+        )
+        return pa_csv.read_csv(
+            buffer,
+            read_options=read_options,
+            parse_options=parse_options,
+            convert_options=convert_options,
+        )
+
+    @staticmethod
+    def _table_to_object_frame(table: pa.Table) -> DataFrame:
+        # same python values as psycopg2 rows: int, float (NaN is kept), str, bool, datetime, date, time and None
+        data = {}
+        for name, column in zip(table.column_names, table.columns):
+            values = np.empty(len(column), dtype=object)
+            values[:] = column.to_pylist()
+            data[name] = values
+        return pd.DataFrame(data, columns=table.column_names, dtype='object')
+
+    def _run_sql_to_frame_by_rows(self, sql, params=None, as_object=False) -> DataFrame:
+        cols, rows = self.run_sql(sql, row_is_dict=False, params=params)
+        return pd.DataFrame(rows, columns=cols, dtype='object' if as_object else None)
+
     def fetch_many_by_condition(self, tblname, condition_columns, condition_values, select_cols=None, size=10_000):
         if select_cols is None:
             select_cols = '*'
@@ -281,7 +428,7 @@ class PostgreSQL:
             return False
 
         logger.debug(sql)
-        with self.connection.cursor() as cur:
+        with self._cancellable(), self.connection.cursor() as cur:
             if params:
                 logger.debug(params)
                 cur.execute(sql, params)
@@ -291,7 +438,7 @@ class PostgreSQL:
             cols = [column[0] for column in cur.description]
             yield cols
             while True:
-                rows = cur.fetchmany(size)
+                rows = cur.fetchmany(size() if callable(size) else size)
                 if not rows:
                     break
 
@@ -309,11 +456,12 @@ class PostgreSQL:
         logger.debug(sql)
         cur = self.connection.cursor()
 
-        if params is None:
-            res = cur.execute(sql)
-        else:
-            logger.debug(params)
-            res = cur.execute(sql, params)
+        with self._cancellable():
+            if params is None:
+                res = cur.execute(sql)
+            else:
+                logger.debug(params)
+                res = cur.execute(sql, params)
         cur.close()
 
         return res
@@ -332,6 +480,19 @@ class PostgreSQL:
             return None
 
     # private functions
+    @contextmanager
+    def _cancellable(self):
+        """
+        Cancel running query when current request is aborted or timed out
+        """
+        with cancellable_connection(self.connection):
+            try:
+                yield
+            except psycopg2.extensions.QueryCanceledError:
+                # raise abort / timeout error of request instead of database error
+                check_abort_process()
+                raise
+
     def _check_connection(self):
         if self.is_connected:
             return True
@@ -380,6 +541,62 @@ class PostgreSQL:
 
         return True
 
+    @log_execution_time(prefix='POSTGRES')
+    def bulk_copy(self, tblname, df: DataFrame, chunk_size=COPY_CHUNK_SIZE):
+        """
+        Insert dataframe by `COPY FROM STDIN` (CSV), written straight from columnar data without building row lists.
+        Null: None, NaN, NaT, NA. Non-null text is quoted, so empty string and `\\N` are kept as they are.
+        Falls back to bulk_insert when an object column has values that can not be written as CSV text.
+        Same as bulk_insert, call PostgresSequence.set_last_id_by_table_name if `id` is inserted.
+        :param tblname:
+        :param df: columns of df are columns of table
+        :param chunk_size: number of rows sent by one COPY
+        :return: number of inserted rows
+        """
+        if not self._check_connection():
+            return False
+
+        if df.empty:
+            return 0
+
+        if not self.can_bulk_copy(df):
+            rows = df.astype('object').where(df.notna(), None).values.tolist()
+            self.bulk_insert(tblname, df.columns, rows)
+            return len(rows)
+
+        # float columns that hold only integers (null-able integer columns) must be written as integer text
+        df = df.convert_dtypes(infer_objects=False, convert_string=False, convert_boolean=False)
+
+        cols = ','.join([f'"{col}"' for col in df.columns])
+        sql = f"COPY {tblname} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        logger.debug(sql)
+        null_field = f'"{COPY_NA_REP}"'
+        with self.connection.cursor() as cur:
+            for start in range(0, len(df), chunk_size):
+                # QUOTE_NONNUMERIC quotes null too, so nulls are written as a marker and unquoted afterward
+                text = df.iloc[start : start + chunk_size].to_csv(
+                    header=False,
+                    index=False,
+                    na_rep=COPY_NA_REP,
+                    quoting=csv.QUOTE_NONNUMERIC,
+                )
+                buffer = io.StringIO(text.replace(null_field, COPY_NULL))
+                cur.copy_expert(sql, buffer, size=COPY_READ_BLOCK_SIZE)
+
+        return len(df)
+
+    @staticmethod
+    def can_bulk_copy(df: DataFrame):
+        for col_idx in range(df.shape[1]):
+            series = df.iloc[:, col_idx]
+            if series.dtype.kind != 'O':
+                continue
+
+            if pd.api.types.infer_dtype(series, skipna=True) not in COPY_SAFE_INFERRED_TYPES:
+                return False
+
+        return True
+
     def chanel_listen(self, sche):
         self.connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
         cur = self.connection.cursor()
@@ -0,0 +1,358 @@
+import dataclasses
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from ap.common.constants import (
+    DB_POOL_ACQUIRE_TIMEOUT,
+    DB_POOL_HEALTH_CHECK_INTERVAL,
+    DB_POOL_MAX_LIFETIME,
+    DB_POOL_MAX_SIZE,
+)
+from ap.common.logger import logger
+from ap.common.pydn.dblib.postgresql import PostgreSQL
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no pooled connection becomes free within the acquire timeout
+    """
+
+
+@dataclasses.dataclass
+class PooledConnection:
+    connection: psycopg2.extensions.connection
+    # schema / search_path is resolved once when the physical connection is opened
+    schema: str
+    created_at: float
+    last_used_at: float
+
+
+class PostgreSQLPool:
+    """
+    Bounded pool of psycopg2 connections, shared by all threads of one process.
+
+    - at most `max_size` connections are open (idle + in use) at any time
+    - `acquire` blocks until a connection is free, raises PoolTimeoutError after `timeout` seconds
+    - a connection idle longer than `health_check_interval` is pinged before being handed out
+    - a connection older than `max_lifetime` is closed instead of being reused
+    """
+
+    _pools: Dict[Tuple, 'PostgreSQLPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(
+        self,
+        host,
+        port,
+        dbname,
+        username,
+        password,
+        schema=None,
+        read_only=False,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_ACQUIRE_TIMEOUT,
+        health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+    ):
+        self.host = host
+        self.port = port
+        self.dbname = dbname
+        self.username = username
+        self.password = password
+        self.schema = schema
+        self.read_only = read_only
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+
+        self._idle: Deque[PooledConnection] = deque()
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._counters = {
+            'acquired': 0,
+            'reused': 0,
+            'created': 0,
+            'discarded': 0,
+            'health_check_failed': 0,
+            'waited': 0,
+            'timeouts': 0,
+            'wait_seconds': 0.0,
+        }
+
+    @classmethod
+    def get_pool(cls, db_instance: PostgreSQL, max_size=None) -> 'PostgreSQLPool':
+        """
+        Get (or create) the pool of current process for the database of `db_instance`.
+        Pools are keyed by pid so forked scheduler workers never share sockets with their parent.
+        """
+        key = (
+            os.getpid(),
+            db_instance.host,
+            str(db_instance.port),
+            db_instance.dbname,
+            db_instance.username,
+            db_instance.schema,
+            db_instance.read_only,
+        )
+        pool = cls._pools.get(key)
+        if pool is not None:
+            return pool
+
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls(
+                    db_instance.host,
+                    db_instance.port,
+                    db_instance.dbname,
+                    db_instance.username,
+                    db_instance.password,
+                    schema=db_instance.schema,
+                    read_only=db_instance.read_only,
+                    max_size=max_size or DB_POOL_MAX_SIZE,
+                )
+                cls._pools[key] = pool
+
+        return pool
+
+    @classmethod
+    def get_all_stats(cls) -> List[Dict]:
+        pid = os.getpid()
+        return [pool.get_stats() for key, pool in list(cls._pools.items()) if key[0] == pid]
+
+    @classmethod
+    def close_all(cls):
+        pid = os.getpid()
+        with cls._pools_lock:
+            for key in [key for key in cls._pools if key[0] == pid]:
+                cls._pools.pop(key).close()
+
+    def acquire(self, timeout=None) -> Optional[PooledConnection]:
+        """
+        Borrow a connection from pool
+        :param timeout: seconds to wait for a free connection, default is pool's timeout
+        :return: PooledConnection, None if a new connection can not be opened
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters['waited'] += 1
+
+            if not self._slots.acquire(timeout=timeout):
+                with self._lock:
+                    self._counters['timeouts'] += 1
+                raise PoolTimeoutError(
+                    f'No free connection to {self.host}:{self.port}/{self.dbname} after {timeout} seconds. '
+                    f'Pool size: {self.max_size}',
+                )
+
+        try:
+            pooled_conn = self._get_idle_connection() or self._open_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        if pooled_conn is None:
+            self._slots.release()
+            return None
+
+        with self._lock:
+            self._in_use += 1
+            self._counters['acquired'] += 1
+            self._counters['wait_seconds'] += time.monotonic() - start
+
+        return pooled_conn
+
+    def release(self, pooled_conn: PooledConnection, discard=False):
+        """
+        Give back a borrowed connection. Pending transaction is rolled back and session settings
+        changed by borrower (autocommit, isolation level) are restored.
+        """
+        try:
+            conn = pooled_conn.connection
+            if not discard and not conn.closed:
+                try:
+                    status = conn.info.transaction_status
+                    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                        discard = True
+                    else:
+                        if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                            conn.rollback()
+
+                        if conn.autocommit or conn.isolation_level is not None or conn.readonly != self.read_only:
+                            conn.set_session(isolation_level='DEFAULT', readonly=self.read_only, autocommit=False)
+                except Exception as e:
+                    logger.info(e)
+                    discard = True
+
+            if discard or conn.closed or self._is_expired(pooled_conn):
+                self._close(pooled_conn)
+            else:
+                pooled_conn.last_used_at = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled_conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle_conns = list(self._idle)
+            self._idle.clear()
+
+        for pooled_conn in idle_conns:
+            self._close(pooled_conn)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                'host': self.host,
+                'port': self.port,
+                'dbname': self.dbname,
+                'schema': self.schema,
+                'pid': os.getpid(),
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                **self._counters,
+            }
+
+        stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+        return stats
+
+    def _get_idle_connection(self) -> Optional[PooledConnection]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # LIFO: the most recently used connection is the least likely to be stale
+                pooled_conn = self._idle.pop()
+
+            if pooled_conn.connection.closed or self._is_expired(pooled_conn):
+                self._close(pooled_conn)
+                continue
+
+            if time.monotonic() - pooled_conn.last_used_at > self.health_check_interval and not self._is_alive(
+                pooled_conn,
+            ):
+                with self._lock:
+                    self._counters['health_check_failed'] += 1
+                self._close(pooled_conn)
+                continue
+
+            with self._lock:
+                self._counters['reused'] += 1
+
+            return pooled_conn
+
+    def _open_connection(self) -> Optional[PooledConnection]:
+        # reuse PostgreSQL.connect, it resolves schema and sets search_path for new connection
+        db_instance = PostgreSQL(
+            self.host,
+            self.dbname,
+            self.username,
+            self.password,
+            port=self.port,
+            read_only=self.read_only,
+        )
+        db_instance.schema = self.schema
+        conn = db_instance.connect()
+        if not conn or not db_instance.is_connected:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._counters['created'] += 1
+
+        return PooledConnection(connection=conn, schema=db_instance.schema, created_at=now, last_used_at=now)
+
+    def _is_expired(self, pooled_conn: PooledConnection):
+        return time.monotonic() - pooled_conn.created_at > self.max_lifetime
+
+    @staticmethod
+    def _is_alive(pooled_conn: PooledConnection):
+        conn = pooled_conn.connection
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.info(e)
+            return False
+
+    def _close(self, pooled_conn: PooledConnection):
+        with self._lock:
+            self._counters['discarded'] += 1
+        try:
+            pooled_conn.connection.close()
+        except Exception as e:
+            logger.info(e)
+
+
+class PooledPostgreSQL(PostgreSQL):
+    """
+    PostgreSQL that borrows its connection from PostgreSQLPool.
+    `connect` acquires a connection and `disconnect` gives it back, so `with DbProxy(...)` callers do not change.
+    """
+
+    def __init__(
+        self,
+        host,
+        dbname,
+        username,
+        password,
+        port=5432,
+        read_only=False,
+        pool_size=None,
+        pool_timeout=None,
+    ):
+        super().__init__(host, dbname, username, password, port=port, read_only=read_only)
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.pool: Optional[PostgreSQLPool] = None
+        self.pooled_conn: Optional[PooledConnection] = None
+
+    def connect(self):
+        if self.is_connected:
+            return self.connection
+
+        self.pool = PostgreSQLPool.get_pool(self, max_size=self.pool_size)
+        self.pooled_conn = self.pool.acquire(timeout=self.pool_timeout)
+        if self.pooled_conn is None:
+            return False
+
+        self.connection = self.pooled_conn.connection
+        self.schema = self.pooled_conn.schema
+        self.is_connected = True
+        return self.connection
+
+    def disconnect(self):
+        if not self.is_connected:
+            return False
+
+        pooled_conn = self.pooled_conn
+        self.pooled_conn = None
+        self.connection = None
+        self.is_connected = False
+        self.pool.release(pooled_conn)
+        return True
+
+
+def get_pool_stats() -> List[Dict]:
+    """
+    Statistics of all connection pools of current process
+    """
+    return PostgreSQLPool.get_all_stats()
@@ -256,7 +256,7 @@ class SQLite3:
         cols = [column[0] for column in cur.description]
         yield cols
         while True:
-            rows = cur.fetchmany(size)
+            rows = cur.fetchmany(size() if callable(size) else size)
             if not rows:
                 break
 
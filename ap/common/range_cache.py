@@ -0,0 +1,265 @@
+import contextlib
+import dataclasses
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Set, Tuple, Union
+
+import pandas as pd
+from pandas import DataFrame
+
+from ap import PROCESS_QUEUE, ListenNotifyType, dic_config
+from ap.common.common_utils import get_process_queue
+from ap.common.constants import (
+    TRACE_RANGE_CACHE_INVALIDATE_MARGIN,
+    TRACE_RANGE_CACHE_MAX_BYTES,
+    TRACE_RANGE_CACHE_MAX_SEGMENTS,
+    TRACE_RANGE_CACHE_TTL,
+)
+from ap.common.logger import logger
+
+
+def to_utc_timestamp(value) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        # transaction time columns are `timestamp` (without time zone) in UTC
+        return timestamp.tz_localize('UTC')
+
+    return timestamp.tz_convert('UTC')
+
+
+@dataclasses.dataclass
+class RangeSegment:
+    """
+    Rows of [start, end) of one query, sorted by time
+    """
+
+    start: pd.Timestamp
+    end: pd.Timestamp
+    # original value of boundaries, passed to sql as is
+    start_tm: str
+    end_tm: str
+    df: DataFrame
+    size: int
+    # time.time() when query of rows started
+    fetched_at: float
+
+    def slice(self, start: pd.Timestamp, end: pd.Timestamp, time_col: str) -> DataFrame:
+        if start <= self.start and self.end <= end:
+            return self.df
+
+        times = self.df[time_col]
+        return self.df[(times >= start) & (times < end)]
+
+
+@dataclasses.dataclass
+class RangeCacheEntry:
+    proc_ids: Set[int]
+    time_col: str
+    segments: List[RangeSegment] = dataclasses.field(default_factory=list)
+    # increased by invalidation, a range fetched before it must not be stored
+    version: int = 0
+
+
+class TimeRangeCache:
+    """
+    In-process cache of time-sorted DataFrame segments of a query without its time range.
+    Segments of a key never overlap. A request for [start, end) reuses covered parts of segments
+    and fetches only the uncovered sub ranges, then splices them in time order.
+    Only for queries whose rows in [a, c) are exactly rows in [a, b) + rows in [b, c).
+    """
+
+    def __init__(self, max_bytes: int, max_segments: int, ttl: float):
+        """
+        :param ttl: seconds a segment is reused, changes without invalidation (ex: master remapping) are seen after it
+        """
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self.ttl = ttl
+        self.entries: OrderedDict[str, RangeCacheEntry] = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get_range(
+        self,
+        key: str,
+        proc_ids: Set[int],
+        time_col: str,
+        start_tm: str,
+        end_tm: str,
+        fetch: Callable[[str, str], DataFrame],
+    ) -> DataFrame:
+        """
+        :param key: key of query without time range
+        :param proc_ids: processes whose data is in result, for invalidation
+        :param time_col: time column that query range is applied to
+        :param fetch: function(start_tm, end_tm) that queries [start_tm, end_tm) from database
+        :return: rows of [start_tm, end_tm) sorted by time
+        """
+        start = to_utc_timestamp(start_tm)
+        end = to_utc_timestamp(end_tm)
+        plan, entry, version = self._plan(key, proc_ids, time_col, start, end, start_tm, end_tm)
+
+        dfs = []
+        for piece in plan:
+            if isinstance(piece, RangeSegment):
+                dfs.append(piece.slice(start, end, time_col))
+                continue
+
+            gap_start, gap_end, gap_start_tm, gap_end_tm = piece
+            fetched_at = time.time()
+            df = fetch(gap_start_tm, gap_end_tm)
+            segment = RangeSegment(gap_start, gap_end, gap_start_tm, gap_end_tm, df, estimate_df_size(df), fetched_at)
+            self._put(key, segment, entry, version)
+            dfs.append(df)
+
+        if len(dfs) == 1:
+            # cached frames are shared, caller may add columns to result
+            return dfs[0].copy()
+
+        # segments may have different dtypes (ex: all null column), concat handles them
+        return pd.concat(dfs, ignore_index=True)
+
+    def _plan(
+        self,
+        key,
+        proc_ids,
+        time_col,
+        start,
+        end,
+        start_tm,
+        end_tm,
+    ) -> Tuple[List[Union[RangeSegment, Tuple]], RangeCacheEntry, int]:
+        """
+        :return: cached segments and uncovered sub ranges (start, end, start_tm, end_tm) in time order,
+        entry and its version
+        """
+        plan = []
+        cursor, cursor_tm = start, start_tm
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = RangeCacheEntry(set(proc_ids), time_col)
+            self.entries.move_to_end(key)
+            self._drop_expired(entry)
+            version = entry.version
+
+            for segment in entry.segments:
+                if segment.end <= cursor:
+                    continue
+                if segment.start >= end:
+                    break
+                if segment.start > cursor:
+                    plan.append((cursor, segment.start, cursor_tm, segment.start_tm))
+                plan.append(segment)
+                cursor, cursor_tm = segment.end, segment.end_tm
+
+        if cursor < end:
+            plan.append((cursor, end, cursor_tm, end_tm))
+
+        return plan, entry, version
+
+    def _drop_expired(self, entry: RangeCacheEntry):
+        expired_at = time.time() - self.ttl
+        if all(segment.fetched_at > expired_at for segment in entry.segments):
+            return
+
+        entry.version += 1
+        keep_segments = []
+        for segment in entry.segments:
+            if segment.fetched_at > expired_at:
+                keep_segments.append(segment)
+            else:
+                self.total_bytes -= segment.size
+        entry.segments = keep_segments
+
+    def _put(self, key, segment: RangeSegment, entry: RangeCacheEntry, version: int):
+        with self.lock:
+            # entry was cleared (and maybe created again) while fetching
+            if self.entries.get(key) is not entry or entry.version != version:
+                return
+
+            # other thread may have fetched an overlapped range meanwhile
+            if any(seg.start < segment.end and segment.start < seg.end for seg in entry.segments):
+                return
+
+            entry.segments.append(segment)
+            entry.segments.sort(key=lambda seg: seg.start)
+            self.total_bytes += segment.size
+
+            # drop the farthest segments from the newest one, a rolling window leaves its past behind
+            while len(entry.segments) > self.max_segments:
+                farthest = max(entry.segments, key=lambda seg: abs(seg.start - segment.start))
+                entry.segments.remove(farthest)
+                self.total_bytes -= farthest.size
+
+            while self.total_bytes > self.max_bytes and self.entries:
+                old_key, old_entry = next(iter(self.entries.items()))
+                if old_key == key and len(self.entries) == 1:
+                    break
+                self.entries.pop(old_key)
+                self.total_bytes -= sum(seg.size for seg in old_entry.segments)
+
+    def invalidate(self, proc_id, start_tm=None, end_tm=None):
+        """
+        Drop segments of `proc_id` overlapping [start_tm, end_tm], all segments of `proc_id` if no time range
+        """
+        start = to_utc_timestamp(start_tm) if start_tm is not None else None
+        end = to_utc_timestamp(end_tm) if end_tm is not None else None
+        with self.lock:
+            for entry in self.entries.values():
+                if proc_id not in entry.proc_ids:
+                    continue
+
+                entry.version += 1
+                keep_segments = []
+                for segment in entry.segments:
+                    is_overlapped = (start is None or start < segment.end) and (end is None or segment.start <= end)
+                    if is_overlapped:
+                        self.total_bytes -= segment.size
+                    else:
+                        keep_segments.append(segment)
+                entry.segments = keep_segments
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+def estimate_df_size(df: DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+trace_range_cache = TimeRangeCache(TRACE_RANGE_CACHE_MAX_BYTES, TRACE_RANGE_CACHE_MAX_SEGMENTS, TRACE_RANGE_CACHE_TTL)
+
+
+def invalidate_range_cache(proc_id, start_tm=None, end_tm=None, is_main=False):
+    """
+    Drop cached segments of `proc_id` around [start_tm, end_tm] after its data was imported or deleted
+    :param is_main: False: send to main process, the process that serves requests
+    """
+    if start_tm is not None:
+        start_tm = to_utc_timestamp(start_tm) - TRACE_RANGE_CACHE_INVALIDATE_MARGIN
+    if end_tm is not None:
+        end_tm = to_utc_timestamp(end_tm) + TRACE_RANGE_CACHE_INVALIDATE_MARGIN
+
+    if not is_main:
+        dic_config[PROCESS_QUEUE] = get_process_queue()
+        with contextlib.suppress(Exception):
+            dic_config[PROCESS_QUEUE][ListenNotifyType.CLEAR_RANGE_CACHE.name][(proc_id, start_tm, end_tm)] = True
+
+        return
+
+    trace_range_cache.invalidate(proc_id, start_tm, end_tm)
+    logger.debug(f'RANGE CACHE INVALIDATED: {proc_id} {start_tm} - {end_tm}')
+
+
+def get_range_cache_stats() -> Dict[str, int]:
+    with trace_range_cache.lock:
+        return {
+            'entries': len(trace_range_cache.entries),
+            'segments': sum(len(entry.segments) for entry in trace_range_cache.entries.values()),
+            'bytes': trace_range_cache.total_bytes,
+            'budget': trace_range_cache.max_bytes,
+        }
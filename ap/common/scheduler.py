@@ -18,6 +18,7 @@ from ap.common.logger import (
     logger,
 )
 from bridge.common.server_config import ServerConfig
+from config import get_sync_transaction_workers
 
 # RESCHEDULE_SECONDS
 RESCHEDULE_SECONDS = 10
@@ -35,6 +36,9 @@ multiprocessingLock = multiprocessing.Lock()
 
 FREE_JOBS = {JobType.PROCESS_COMMUNICATE.name, JobType.IDLE_MONITORING.name}
 
+# jobs of the same name that run in parallel (with different ids) up to a limit
+LIMITED_JOBS = {JobType.SYNC_TRANSACTION.name: get_sync_transaction_workers}
+
 EXCLUSIVE_JOBS = {
     JobType.DATABASE_MAINTENANCE.name,
     JobType.SCAN_MASTER.name,
@@ -167,6 +171,9 @@ def scheduler_check_before_run(job_id, job_name):
         if pair1 in CONFLICT_PAIR or pair2 in CONFLICT_PAIR:
             return False
 
+    if job_name in LIMITED_JOBS and list(dic_jobs.values()).count(job_name) >= LIMITED_JOBS[job_name]():
+        return False
+
     if job_name not in FREE_JOBS:
         dic_config[PROCESS_QUEUE][ListenNotifyType.RUNNING_JOB.name][job_id] = job_name
 
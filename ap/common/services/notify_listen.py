@@ -8,6 +8,7 @@ from ap.common.common_utils import get_process_queue
 from ap.common.constants import NOTIFY_DELAY_TIME, JobType
 from ap.common.logger import logger
 from ap.common.memoize import memoize, set_all_cache_expired
+from ap.common.range_cache import invalidate_range_cache
 from ap.common.services.sse import background_announcer
 from bridge.services.data_import import handle_category_error
 
@@ -75,6 +76,7 @@ def listener(_job_id=None, _job_name=None):
     dic_add_job = process_queue[ListenNotifyType.ADD_JOB.name]
     dic_modify_job = process_queue[ListenNotifyType.RESCHEDULE_JOB.name]
     dic_clear_cache = process_queue[ListenNotifyType.CLEAR_CACHE.name]
+    dic_clear_range_cache = process_queue[ListenNotifyType.CLEAR_RANGE_CACHE.name]
     dic_shutdown = process_queue[ListenNotifyType.SHUTDOWN.name]
     dic_category_error = process_queue[ListenNotifyType.CATEGORY_ERROR.name]
 
@@ -107,6 +109,11 @@ def listener(_job_id=None, _job_name=None):
             _, (dic_job, job_event) = dic_progress.popitem()
             background_announcer.announce(dic_job, job_event, is_main=True)
 
+        # before expiring memoize cache, recomputed results must not reuse invalidated ranges
+        for _ in range(len(dic_clear_range_cache)):
+            (proc_id, start_tm, end_tm), _ = dic_clear_range_cache.popitem()
+            invalidate_range_cache(proc_id, start_tm, end_tm, is_main=True)
+
         for _ in range(len(dic_clear_cache)):
             cache_type, _ = dic_clear_cache.popitem()
             set_all_cache_expired(cache_type, is_main=True)
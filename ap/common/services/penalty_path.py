@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, List, Optional
+
+from ap.common.constants import PENALTY_PATH_MIN_PARALLEL_WORK
+from ap.common.logger import log_execution_time, logger
+from config import get_penalty_path_workers
+
+# worker processes are kept for the next requests, starting them costs more than a small fit
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = Lock()
+
+
+def init_penalty_path_worker(blas_threads: int):
+    """
+    Limit BLAS/OpenMP threads of a worker, so that workers * threads does not exceed cpu count
+    """
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=blas_threads)
+
+
+def get_penalty_path_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Long-lived worker processes shared by requests.
+    Workers are started by forkserver (spawn on Windows) instead of fork: forking a threaded server copies its locks
+    (logging, db connections) in whatever state other threads hold them.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            blas_threads = max((os.cpu_count() or 1) // workers, 1)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=init_penalty_path_worker,
+                initargs=(blas_threads,),
+            )
+            _executor_workers = workers
+
+        return _executor
+
+
+def reset_penalty_path_executor(executor: ProcessPoolExecutor):
+    """
+    Drop a broken pool (e.g. a worker was killed), next call starts new workers
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+    executor.shutdown(wait=False)
+
+
+@log_execution_time()
+def fit_penalty_path(fit_one: Callable, penalties: List, *args, work_size: int = 0) -> List:
+    """
+    Fit a model for each penalty factor.
+    Fits of a regularization path are independent, they are fanned out to worker processes
+    if they are heavy enough to pay for sending inputs to workers. Each fit runs the same code with the same inputs,
+    results are the same as fitting one by one.
+    :param fit_one: picklable (module level) function(penalty, *args)
+    :param penalties: penalty factors
+    :param args: inputs of every fit, sent to worker processes
+    :param work_size: estimated work of one fit, compared with PENALTY_PATH_MIN_PARALLEL_WORK
+    :return: result of each penalty, in order of `penalties`
+    """
+    max_workers = get_penalty_path_workers()
+    workers = min(max_workers, len(penalties))
+    if workers <= 1 or work_size < PENALTY_PATH_MIN_PARALLEL_WORK:
+        return [fit_one(penalty, *args) for penalty in penalties]
+
+    logger.info(f'[PenaltyPath] fit {len(penalties)} penalties in {workers} worker processes')
+    executor = get_penalty_path_executor(max_workers)
+    try:
+        futures = [executor.submit(fit_one, penalty, *args) for penalty in penalties]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        reset_penalty_path_executor(executor)
+        raise
@@ -1,10 +1,16 @@
+import contextvars
 import os
+import threading
 import time
+from contextlib import contextmanager
+from enum import Enum, auto
 from functools import wraps
+from typing import Dict, Optional
 
-from flask import g
+from flask import g, has_app_context
 
 from ap.common.constants import ANALYSIS_INTERFACE_ENV, AppEnv, FlaskGKey
+from ap.common.logger import logger
 
 api_request_threads = []
 
@@ -26,6 +32,150 @@ class RequestTimeOutAPI(Exception):
         return rv
 
 
+class CancelReason(Enum):
+    ABORT = auto()
+    TIMEOUT = auto()
+
+
+class CancelToken:
+    """
+    Cancel state of one api request, shared by every thread working for the request.
+    Database connections running a query for the request are registered while the query runs,
+    so abort / timeout cancels the query in database server instead of waiting until it finishes.
+    """
+
+    def __init__(self, thread_id=None):
+        self.thread_id = thread_id
+        self.reason: Optional[CancelReason] = None
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def is_cancelled(self):
+        return self.reason is not None
+
+    def cancel(self, reason=CancelReason.ABORT):
+        # lock is held while cancel requests are sent: a connection can not leave `watch` (and run a query of
+        # another request) before the cancel request for its query is sent
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+
+            for connection in self._connections:
+                try:
+                    # psycopg2: send cancel request for the backend of this connection (same as pg_cancel_backend)
+                    connection.cancel()
+                except Exception as e:
+                    logger.info(f'[CANCEL] can not cancel running query. {e}')
+
+    def raise_if_cancelled(self):
+        if self.reason is CancelReason.TIMEOUT:
+            raise RequestTimeOutAPI('Request timeout')
+
+        if self.reason is CancelReason.ABORT:
+            raise BrokenPipeError('PROCESS KILLED')
+
+    @contextmanager
+    def watch(self, connection):
+        """
+        Register `connection` while a query runs on it
+        """
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            # cancel may come before the connection is registered
+            self.raise_if_cancelled()
+            yield
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+
+    def start_timer(self, seconds) -> bool:
+        """
+        Cancel request after `seconds`
+        :return: False if a timer is already running (outer decorated function owns it)
+        """
+        with self._lock:
+            if self._timer is not None:
+                return False
+
+            self._timer = threading.Timer(max(seconds, 0), self.cancel, args=(CancelReason.TIMEOUT,))
+            self._timer.daemon = True
+            self._timer.start()
+            return True
+
+    def stop_timer(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+
+        if timer is not None:
+            timer.cancel()
+
+
+# token of the request being served by current thread.
+# thread pools working for a request must run their tasks in `contextvars.copy_context()`
+current_cancel_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar(
+    'current_cancel_token',
+    default=None,
+)
+dic_cancel_tokens: Dict[str, CancelToken] = {}
+dic_cancel_tokens_lock = threading.Lock()
+
+
+def start_cancel_token(thread_id=None) -> CancelToken:
+    token = CancelToken(thread_id)
+    if thread_id:
+        with dic_cancel_tokens_lock:
+            dic_cancel_tokens[thread_id] = token
+
+    current_cancel_token.set(token)
+    return token
+
+
+def end_cancel_token():
+    token = current_cancel_token.get()
+    if token is None:
+        return
+
+    token.stop_timer()
+    if token.thread_id:
+        with dic_cancel_tokens_lock:
+            if dic_cancel_tokens.get(token.thread_id) is token:
+                dic_cancel_tokens.pop(token.thread_id)
+
+    current_cancel_token.set(None)
+
+
+def cancel_request(thread_id):
+    """
+    Abort request of `thread_id`, its running queries are cancelled in database
+    """
+    with dic_cancel_tokens_lock:
+        token = dic_cancel_tokens.get(thread_id)
+
+    if token is None:
+        # request is not running in this process (yet)
+        api_request_threads.append(thread_id)
+        return
+
+    token.cancel(CancelReason.ABORT)
+
+
+@contextmanager
+def cancellable_connection(connection):
+    """
+    Let abort / timeout of current request cancel the query running on `connection`
+    """
+    token = current_cancel_token.get()
+    if token is None:
+        yield
+        return
+
+    with token.watch(connection):
+        yield
+
+
 def request_timeout_handling(max_timeout=10):
     """Decorator to log function run time
     Arguments:
@@ -38,10 +188,21 @@ def request_timeout_handling(max_timeout=10):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            result = fn(*args, **kwargs)
-
             current_env = os.environ.get(ANALYSIS_INTERFACE_ENV, AppEnv.PRODUCTION.value)
-            if current_env == AppEnv.PRODUCTION.value:
+            is_production = current_env == AppEnv.PRODUCTION.value
+            token = current_cancel_token.get()
+            is_timer_owner = False
+            if is_production and token is not None:
+                request_start_time = getattr(g, 'request_start_time', None) or time.time()
+                is_timer_owner = token.start_timer(request_start_time + max_timeout * 60 - time.time())
+
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                if is_timer_owner:
+                    token.stop_timer()
+
+            if is_production:
                 start_func_time = time.time()
                 request_start_time = getattr(g, 'request_start_time', None)
                 if request_start_time:
@@ -65,7 +226,15 @@ def set_request_g_dict(value):
 
 
 def check_abort_process():
-    thread_id = get_request_g_dict()
+    token = current_cancel_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+        thread_id = token.thread_id
+    elif has_app_context():
+        thread_id = get_request_g_dict()
+    else:
+        return
+
     if thread_id and thread_id in api_request_threads:
         api_request_threads.remove(thread_id)
         raise BrokenPipeError('PROCESS KILLED')
@@ -368,6 +368,93 @@ def get_mode(series: Series):
         return None
 
 
+def calc_group_modes(series: Series, group_idxs: np.ndarray, group_index: pd.Index):
+    """
+    Mode of each group, same result as `series.groupby(...).agg(get_mode)` without calling get_mode per group.
+    Values are factorized once, codes are counted per group by bincount.
+    :param series: values, in the same order as `group_idxs`
+    :param group_idxs: group position of each value, 0 ... len(group_index) - 1
+    :param group_index: group ids
+    :return: modes indexed by `group_index`. None if dtype is not supported (extension array, mixed types, ...)
+    """
+    values = series.values
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in 'fiubO':
+        return None
+
+    n_groups = len(group_index)
+    codes, uniques = pd.factorize(values)
+    if values.dtype.kind == 'O' and pd.api.types.infer_dtype(uniques, skipna=True) not in (
+        'string',
+        'integer',
+        'floating',
+        'mixed-integer-float',
+        'empty',
+    ):
+        return None
+
+    # Series.mode returns sorted modes, get_mode takes the smallest one
+    try:
+        sorted_positions = np.argsort(uniques, kind='stable')
+    except TypeError:
+        return None
+
+    ranks = np.empty(len(uniques), dtype=np.int64)
+    ranks[sorted_positions] = np.arange(len(uniques))
+    is_valid = codes >= 0
+    value_ranks = ranks[codes[is_valid]]
+    value_groups = group_idxs[is_valid]
+
+    n_uniques = len(uniques)
+    if n_groups * n_uniques <= len(values):
+        counts = np.bincount(value_groups * n_uniques + value_ranks, minlength=n_groups * n_uniques)
+        counts = counts.reshape(n_groups, n_uniques)
+        mode_ranks = counts.argmax(axis=1) if n_uniques else np.zeros(n_groups, dtype=np.int64)
+        has_mode = counts.max(axis=1, initial=0) > 0
+    else:
+        # too many (group, value) pairs for a dense table
+        keys, counts = np.unique(value_groups * n_uniques + value_ranks, return_counts=True)
+        key_groups, key_ranks = np.divmod(keys, n_uniques)
+        # most common first, then smallest value
+        order = np.lexsort((key_ranks, -counts, key_groups))
+        sorted_groups = key_groups[order]
+        firsts = order[np.r_[True, sorted_groups[1:] != sorted_groups[:-1]][: len(order)]]
+        mode_ranks = np.zeros(n_groups, dtype=np.int64)
+        mode_ranks[key_groups[firsts]] = key_ranks[firsts]
+        has_mode = np.zeros(n_groups, dtype=bool)
+        has_mode[key_groups[firsts]] = True
+
+    mode_values = uniques[sorted_positions[mode_ranks[has_mode]]] if n_uniques else uniques[:0]
+    if values.dtype.kind == 'O':
+        modes = np.full(n_groups, None, dtype=object)
+        modes[has_mode] = mode_values
+        # let pandas infer dtype from python values like groupby aggregation does (ex: int and None -> float)
+        return pd.Series(modes.tolist(), index=group_index, dtype=None if n_groups else np.float64)
+
+    if has_mode.all():
+        return pd.Series(mode_values, index=group_index, dtype=values.dtype)
+
+    modes = np.full(n_groups, np.nan, dtype=values.dtype)
+    modes[has_mode] = mode_values
+    return pd.Series(modes, index=group_index)
+
+
+def mask_infinity_by_group(values: np.ndarray, group_idxs: np.ndarray, n_groups: int):
+    """
+    Replace -inf, inf by NaN in groups that have finite values. Aggregations of a group skip NaN, so they use
+    finite values of the group, or -inf, inf if the group has no finite value.
+    :param values: int or float values
+    :param group_idxs: group position of each value, 0 ... n_groups - 1
+    :param n_groups: number of groups
+    :return: masked values, flags of groups that have finite values
+    """
+    if values.dtype.kind != 'f':
+        return values, np.ones(n_groups, dtype=bool)
+
+    is_finite = np.isfinite(values)
+    has_finite = np.bincount(group_idxs[is_finite], minlength=n_groups) > 0
+    return np.where(is_finite | ~has_finite[group_idxs], values, np.nan), has_finite
+
+
 def convert_series_to_number(s):
     if not pd.api.types.is_numeric_dtype(s):
         try:
@@ -181,6 +181,7 @@ class BasicConfigYaml(YamlConfig):
     DBNAME = 'dbname'
     USERNAME = 'username'
     PASSWORD = 'password'
+    POOL_SIZE = 'pool_size'
     EDGE_PORT = 'port-no'
     PROXY = 'proxy'
     FILE_MODE = 'file_mode'
@@ -236,6 +237,10 @@ class BasicConfigYaml(YamlConfig):
         password = self.get_node([self.DATABASE, self.PASSWORD])
         return password
 
+    def get_db_pool_size(self):
+        pool_size = self.get_node([self.DATABASE, self.POOL_SIZE])
+        return pool_size
+
     def get_bridge_station_host(self):
         return YamlConfig.get_node(self.dic_config, [self.BRIDGE_STATION, self.HOST])
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import contextlib
 import re
+import string
 from abc import abstractmethod
 from typing import Any, ClassVar, Optional
 
@@ -86,6 +87,48 @@ def cast_value_based_on_series(series: pd.Series, value: Any) -> tuple[Any, bool
     return value, False
 
 
+def format_field(value: Any, format_spec: str, conversion: str | None) -> str | None:
+    """
+    Same as a replacement field of `str.format`, None if value can not be formatted
+    """
+    with contextlib.suppress(TypeError, ValueError):
+        if conversion == 'r':
+            value = repr(value)
+        elif conversion == 's':
+            value = str(value)
+        elif conversion == 'a':
+            value = ascii(value)
+        return format(value, format_spec)
+
+    return None
+
+
+def format_series_field(series: pd.Series, format_spec: str, conversion: str | None) -> np.ndarray:
+    """
+    Format each value of series by a replacement field, NA is formatted as empty string.
+    Each distinct value is formatted once, unless equal values can have different texts (ex: 1 and 1.0 in object
+    series, -0.0 and 0.0)
+    @return: object array of str, None if value can not be formatted
+    """
+    codes, uniques = pd.factorize(series)
+    is_deduplicable = not pd.api.types.is_object_dtype(series) or pd.api.types.infer_dtype(uniques) == 'string'
+    if is_deduplicable and pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        is_deduplicable = not (np.signbit(values) & (values == 0)).any()
+
+    if not is_deduplicable:
+        values = [EMPTY_STRING if pd.isna(value) else value for value in series]
+        return np.array([format_field(value, format_spec, conversion) for value in values], dtype=object)
+
+    unique_codes, first_positions = np.unique(codes, return_index=True)
+    # iterate series to get the same python values as iterating whole series
+    unique_values = series.iloc[first_positions[unique_codes >= 0]]
+    texts = [format_field(value, format_spec, conversion) for value in unique_values]
+    # NA code is -1, the last one
+    texts.append(format_field(EMPTY_STRING, format_spec, conversion))
+    return np.array(texts, dtype=object)[codes]
+
+
 def try_cast_series_pd_types(series: pd.Series, pd_types: list[pd.ExtensionType]) -> pd.Series | None:
     for dtype in pd_types:
         result_series = series.replace(BOOLEAN_DICT_VALUES) if pd.api.types.is_bool_dtype(dtype) else series
@@ -132,6 +175,9 @@ def get_data_encoding_type_from_series(series: pd.Series) -> DataTypeEncode:
 
 class BaseFunction(BaseModel):
     EXCLUDE_VARS: ClassVar[list[str]] = ['type_cast']
+    # value of a row depends only on that row and output type does not depend on data,
+    # result can be evaluated once at import time and stored
+    ROW_WISE: ClassVar[bool] = True
     type_cast: Optional[str] = None
 
     @classmethod
@@ -585,6 +631,74 @@ class CategoryGeneration(BaseFunction):
 
         return None
 
+    def parse_template(self) -> list[str | tuple[int, str, str | None]] | None:
+        """
+        Split s into literal texts and fields (argument position, format spec, conversion)
+        None if s has a field that can not be formatted per argument (named, nested, attribute, mixed numbering)
+        """
+        try:
+            parsed = list(string.Formatter().parse(self.s))
+        except ValueError:
+            return None
+
+        parts = []
+        auto_position = 0
+        is_auto = None
+        for literal, field_name, format_spec, conversion in parsed:
+            if literal:
+                parts.append(literal)
+
+            if field_name is None:
+                continue
+
+            if field_name == EMPTY_STRING:
+                position = auto_position
+                auto_position += 1
+            elif field_name in ('0', '1'):
+                position = int(field_name)
+            else:
+                return None
+
+            if is_auto is not None and is_auto != (field_name == EMPTY_STRING):
+                return None
+
+            is_auto = field_name == EMPTY_STRING
+            if position > 1 or '{' in format_spec:
+                return None
+
+            parts.append((position, format_spec, conversion))
+
+        return parts
+
+    def format_series(self, series_x: pd.Series, series_y: pd.Series) -> pd.Series:
+        """
+        Vectorized apply_format of all rows: each distinct value of X, Y is formatted once per field,
+        then texts are concatenated
+        """
+        parts = self.parse_template()
+        if parts is None or not len(series_x):
+            return pd.Series([self.apply_format(x, y) for x, y in zip(series_x, series_y)])
+
+        arguments = (series_x, series_y)
+        result = np.full(len(series_x), EMPTY_STRING, dtype=object)
+        is_error = np.zeros(len(series_x), dtype=bool)
+        for part in parts:
+            if isinstance(part, str):
+                result += part
+                continue
+
+            position, format_spec, conversion = part
+            texts = format_series_field(arguments[position], format_spec, conversion)
+            is_text_error = pd.isna(texts)
+            if is_text_error.any():
+                is_error |= is_text_error
+                texts[is_text_error] = EMPTY_STRING
+
+            result += texts
+
+        result[is_error] = None
+        return pd.Series(result)
+
     def eval_to_series(
         self,
         *,
@@ -594,7 +708,7 @@ class CategoryGeneration(BaseFunction):
         self.custom_validate()
         self.set_type_cast(self.t)
 
-        result = pd.Series([self.apply_format(x, y) for x, y in zip(series_x, series_y)])
+        result = self.format_series(series_x, series_y)
         type_converter = TypeConvert.from_kwargs(t=self.type_cast)
         return type_converter.eval_to_series(series_x=result)
 
@@ -658,6 +772,8 @@ class DatetimeFromDateAndTime(BaseFunction):
 
 
 class DateExtraction(BaseFunction):
+    ROW_WISE: ClassVar[bool] = False
+
     s: str
 
     def eval_to_series(
@@ -910,6 +1026,8 @@ class LogicalAnd(BaseFunction):
 
 
 class RegexExtraction(BaseFunction):
+    ROW_WISE: ClassVar[bool] = False
+
     s: str
     t: Optional[str]
 
@@ -954,6 +1072,8 @@ class RegexExtraction(BaseFunction):
 
 
 class RegexRemoval(BaseFunction):
+    ROW_WISE: ClassVar[bool] = False
+
     s: str
     t: Optional[str]
 
@@ -1118,6 +1238,8 @@ class TypeConvert(BaseFunction):
 
 
 class Shift(BaseFunction):
+    ROW_WISE: ClassVar[bool] = False
+
     s: str
     t: str
 
@@ -1166,6 +1288,8 @@ class Shift(BaseFunction):
 
 
 class FillNa(BaseFunction):
+    ROW_WISE: ClassVar[bool] = False
+
     s: Optional[str] = None
     t: str
 
@@ -848,6 +848,12 @@ class ProcLinkCount(db.Model):
     target_process_id = db.Column(db.Integer(), primary_key=True)
     matched_count = db.Column(db.Integer(), default=0)
     job_id = db.Column(db.Integer(), db.ForeignKey('t_job_management.id'), index=True)
+    # watermark of incremental count: rows of id <= max id were counted with trace config of fingerprint
+    trace_fingerprint = db.Column(db.Text())
+    self_max_id = db.Column(db.Integer())
+    self_row_count = db.Column(db.Integer())
+    target_max_id = db.Column(db.Integer())
+    target_row_count = db.Column(db.Integer())
     created_at = db.Column(db_timestamp(), default=get_current_timestamp)
     updated_at = db.Column(db_timestamp(), default=get_current_timestamp, onupdate=get_current_timestamp)
     # TODO: add migration
@@ -12,6 +12,7 @@ from ap.setting_module.services.backup_and_restore.duplicated_check import (
 )
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.transaction_model import TransactionData
+from bridge.services.function_column_store import fill_imported_function_columns
 
 
 def restore_db_data(process_id, start_time, end_time):
@@ -79,12 +80,12 @@ def restore_db_data_from_file(
             transaction_data.remove_by_ids(db_instance, duplicated_ids.tolist())
 
         if not df_insert.empty:
-            param_marker = BridgeStationModel.get_parameter_marker()
-            db_instance.bulk_insert(
-                transaction_data.table_name,
-                df_insert.columns,
-                df_insert.values.tolist(),
-                parameter_marker=param_marker,
+            db_instance.bulk_copy(transaction_data.table_name, df_insert)
+            fill_imported_function_columns(
+                db_instance,
+                transaction_data,
+                df_insert[get_date_col].min(),
+                df_insert[get_date_col].max(),
             )
 
         save_proc_data_count_multiple_dfs(
@@ -371,6 +371,20 @@ class DicParam:
         self.trace_graph = trace_graph
         self.dic_card_orders = dic_card_orders
 
+    def __cache_key__(self):
+        """
+        Stable memoize key, does not depend on insertion order of config dicts
+        """
+        return (
+            self.chart_count,
+            self.common,
+            self.array_formval,
+            self.cyclic_terms,
+            sorted(self.dic_card_orders.items(), key=str) if self.dic_card_orders else self.dic_card_orders,
+            sorted(self.dic_proc_cfgs.items()),
+            self.trace_graph,
+        )
+
     def search_end_proc(self, proc_id):
         for idx, proc in enumerate(self.array_formval):
             if proc.proc_id == proc_id:
@@ -54,10 +54,10 @@ class ServerConfig:
         cls.dic_config[cls.METADATA_FILE] = os.path.join(instance_dir, cls.METADATA_FILE_NAME)
 
     @classmethod
-    def get_db_proxy(cls):
+    def get_db_proxy(cls, **kwargs):
         db_proxy_func = cls.dic_config.get(ServerConfig.DB_PROXY, None)
         if db_proxy_func:
-            return db_proxy_func()
+            return db_proxy_func(**kwargs)
         sample = 'ServerConfig.set_server_config(dic_config={ServerConfig.DB_PROXY: DbProxy})'
         raise Exception(f'DbProxy was not set. Sample: {sample}')
 
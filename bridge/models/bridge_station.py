@@ -571,10 +571,10 @@ class BridgeStationModel:
         cls._get_db_proxy = func
 
     @classmethod
-    def get_db_proxy(cls, db_instance=None) -> PostgreSQL:
+    def get_db_proxy(cls, db_instance=None, **kwargs) -> PostgreSQL:
         if db_instance is not None:
             return db_instance
-        return ServerConfig.get_db_proxy()
+        return ServerConfig.get_db_proxy(**kwargs)
 
     @classmethod
     def set_col_value(cls, dict_data: Dict, col, value):
@@ -16,6 +16,7 @@ from ap import dic_config, log_execution_time, logger
 from ap.common.common_utils import (
     DATE_FORMAT_STR_FACTORY_DB,
     chunks,
+    convert_nan_to_na,
     convert_nan_to_none,
     convert_nullable_int64_to_numpy_int64,
     convert_type_base_df,
@@ -183,6 +184,8 @@ class TransactionData:
     unique_serial_number: int = None
     duplicate_serial_number: int = None
     df: DataFrame = None
+    # function column id -> column of its stored values, see bridge.services.function_column_store
+    stored_function_columns: dict[int, str] = None
 
     def __init__(self, process_id: int, db_instance: PostgreSQL = None):
         if not db_instance:
@@ -195,6 +198,7 @@ class TransactionData:
 
         self.process_id = process_id
         self.table_name = self.cfg_process.table_name
+        self.stored_function_columns = {}
 
         self.cfg_process_columns = self.cfg_process.columns
         self.category_text_columns, self.boolean_columns = [], []
@@ -397,6 +401,8 @@ FROM
         return {
             MultipleIndexes([SingleIndex(self.factory_machine_id_col_name)]),
             MultipleIndexes([SingleIndex(self.prod_part_id_col_name)]),
+            # rows imported after a watermark of incremental proc link count
+            MultipleIndexes([SingleIndex(self.id_col_name)]),
         }
 
     def __create_index(self, db_instance: PostgreSQL, set_multiple_indexes: set[MultipleIndexes]) -> None:
@@ -877,16 +883,20 @@ FROM
             for col in self.cfg_process_columns
             if col.bridge_column_name in insert_df
         ]
-        rows = convert_nan_to_none(insert_df[columns], convert_to_list=True)
-        param_marker = BridgeStationModel.get_parameter_marker()
-        db_instance.bulk_insert(self.table_name, columns, rows, parameter_marker=param_marker)
+        if isinstance(db_instance, PostgreSQL):
+            inserted_rows = db_instance.bulk_copy(self.table_name, convert_nan_to_na(insert_df[columns]))
+        else:
+            rows = convert_nan_to_none(insert_df[columns], convert_to_list=True)
+            param_marker = BridgeStationModel.get_parameter_marker()
+            db_instance.bulk_insert(self.table_name, columns, rows, parameter_marker=param_marker)
+            inserted_rows = len(rows)
         # ↑====== Insert new data into DB ======↑
 
         _, max_id = db_instance.run_sql(f'SELECT MAX(id) FROM {self.table_name}', row_is_dict=False)
 
         # remove merge records from `insert_df` to avoid duplication in `t_proc_data_count`
         insert_df = insert_df[insert_df.index.isna()]
-        return len(rows), max_id[0][0], insert_df
+        return inserted_rows, max_id[0][0], insert_df
 
     def __write_duplicated_ids(self, duplicated_df: pd.DataFrame) -> None:
         now = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -1113,9 +1123,9 @@ FROM
             LIMIT {sql_limit};
         '''
         # params = (start_dt, end_dt)
-        cols, rows = db_instance.run_sql(sql, row_is_dict=False, params=params)
-
-        df = pd.DataFrame(rows, columns=cols, dtype='object')
+        # object columns as before, types are corrected by column_type_dicts below
+        df = db_instance.run_sql_to_frame(sql, params=params, as_object=True)
+        cols = df.columns.tolist()
         # df = format_df(df)
         # ↑====== Collect data ======↑
 
@@ -1237,6 +1247,9 @@ FROM
             sql_type = sa.Integer if data_type in [data_type.INTEGER, data_type.REAL] else sa.String
             columns.append(sa.Column(column_name, sql_type))
 
+        for stored_column_name in self.stored_function_columns.values():
+            columns.append(sa.Column(stored_column_name, sa.String))
+
         return sa.Table(self.table_name, sa.MetaData(), *columns)
 
     def get_all(self, db_instance: Union[PostgreSQL], order_by_time=False):
@@ -1257,8 +1270,8 @@ FROM
             LIMIT {limit};
         '''
         params = (start_time, end_time)
-        cols, rows = db_instance.run_sql(sql, params=params, row_is_dict=False)
-        df = pd.DataFrame(rows, columns=cols, dtype='object')
+        # keep python objects and None for null, this frame is inserted back by bulk_insert
+        df = db_instance.run_sql_to_frame(sql, params=params, as_object=True)
         return df
 
     def get_total_imported_row(self, db_instance, import_type):
@@ -1358,6 +1371,62 @@ def determine_data_type_for_update(to_raw_data_type: str = None):
     return db_data_type, to_raw_data_type
 
 
+def gen_row_key_codes(left_df: pd.DataFrame, right_df: pd.DataFrame, on: list[str]) -> tuple[np.array, np.array]:
+    """
+    Encode `on` columns of both dataframes to one integer key per row.
+    Rows having equal values in all `on` columns get the same code, rows having a null value in `on` get -1
+    (null never matches, same as comparing by `==`).
+    Codes are numbered by first appearance, rows of `left_df` first.
+    """
+    col_codes = []
+    for col in on:
+        values = pd.concat([left_df[col], right_df[col]], ignore_index=True)
+        codes, _ = pd.factorize(values)
+        col_codes.append(codes)
+
+    if len(col_codes) == 1:
+        key_codes = col_codes[0]
+    else:
+        df_codes = pd.DataFrame(np.column_stack(col_codes))
+        group_codes = df_codes.groupby(df_codes.columns.tolist(), sort=False).ngroup().to_numpy()
+        key_codes = np.where((df_codes == -1).any(axis=1).to_numpy(), -1, group_codes)
+
+    return key_codes[: len(left_df)], key_codes[len(left_df) :]
+
+
+def match_rows_one_by_one(
+    left_df: pd.DataFrame,
+    right_df: pd.DataFrame,
+    on: list[str],
+) -> tuple[np.array, np.array]:
+    """
+    Match the n-th row of `left_df` with the n-th row of `right_df` having the same `on` values.
+    It is a hash join on (key, n-th occurrence of key), cost is linear in number of rows.
+    Returns:
+        positions of matched rows in `left_df`
+        positions of matched rows in `right_df`
+        pairs are sorted by key (first appearance in `left_df`) then by n-th
+    """
+    left_keys, right_keys = gen_row_key_codes(left_df, right_df, on)
+    left_nth = pd.Series(left_keys).groupby(left_keys).cumcount().to_numpy()
+    right_nth = pd.Series(right_keys).groupby(right_keys).cumcount().to_numpy()
+
+    # combine (key, n-th) to one unique integer
+    stride = max(len(left_df), len(right_df)) + 1
+    left_valid_pos = np.flatnonzero(left_keys >= 0)
+    right_valid_pos = np.flatnonzero(right_keys >= 0)
+    left_ids = left_keys[left_valid_pos].astype(np.int64) * stride + left_nth[left_valid_pos]
+    right_ids = right_keys[right_valid_pos].astype(np.int64) * stride + right_nth[right_valid_pos]
+
+    indexer = pd.Index(right_ids).get_indexer(left_ids)
+    is_matched = indexer >= 0
+    order = np.argsort(left_ids[is_matched], kind='stable')
+    left_pos = left_valid_pos[is_matched][order]
+    right_pos = right_valid_pos[indexer[is_matched]][order]
+
+    return left_pos, right_pos
+
+
 def merge_rows_one_by_one(
     left_df: pd.DataFrame,
     right_df: pd.DataFrame,
@@ -1365,7 +1434,8 @@ def merge_rows_one_by_one(
     right_columns: list[str],
 ) -> pd.DataFrame:
     """
-    Perform merge one by one rows
+    Perform merge one by one rows: the n-th row of `left_df` takes `right_columns` of the n-th row of `right_df`
+    having the same `on` values. Not matched rows get None
     For example:
     >>> df1 = pd.DataFrame({'a': [2, 2, 3, 3], 'b': [2, 2, 3, 3]})
     >>> df2 = pd.DataFrame({'a': [2, 2, 3], 'b': [2, 2, 3], 'c': ['x', 'y', 'z']})
@@ -1380,10 +1450,14 @@ def merge_rows_one_by_one(
     # set new columns to None
     left_df[right_columns] = None
 
-    for keys in right_df[on].drop_duplicates().values:
-        left_mask = np.all([left_df[col] == value for col, value in zip(on, keys)], axis=0)
-        right_mask = np.all([right_df[col] == value for col, value in zip(on, keys)], axis=0)
-        left_df.loc[left_mask, right_columns] = right_df.loc[right_mask, right_columns]
+    left_pos, right_pos = match_rows_one_by_one(left_df, right_df, on)
+    if not len(left_pos):
+        return left_df
+
+    for col in right_columns:
+        values = np.full(len(left_df), None, dtype=object)
+        values[left_pos] = right_df[col].to_numpy(dtype=object)[right_pos]
+        left_df[col] = values
 
     return left_df
 
@@ -1395,7 +1469,8 @@ def combine_rows_one_by_one(
 ) -> tuple[pd.DataFrame, np.array, np.array]:
     """
     Perform combine one by one rows, both of dataframe must have the same column
-    Each matching row in `right_df` will overwrite row in `left_df` if they are not `None`
+    The n-th row of `right_df` is combined with the n-th row of `left_df` having the same `on` values,
+    values of `right_df` row are kept if they are not `None`, otherwise they are taken from `left_df` row
     For example:
     >>> df1 = pd.DataFrame({'id': [1, 2, 3, 4, 5], 'a': [2, 2, 3, 4, 5], 'b': [None, None, 'c', 'd', 'e']})
           id a b
@@ -1419,7 +1494,7 @@ def combine_rows_one_by_one(
         2 8  3 z
         3 9  4
     Returns:
-        matched dataframe
+        matched dataframe (index of `right_df`), sorted by key (first appearance in `left_df`) then by n-th
         boolean array indicate which rows are used from `left_df`
         boolean array indicate which rows are used from `right_df`
     """
@@ -1430,26 +1505,16 @@ def combine_rows_one_by_one(
     if left_df.empty or right_df.empty:
         return left_df[left_used], left_used, right_used
 
-    combined_dfs = []
-
-    for keys in left_df[on].drop_duplicates().values:
-        left_mask = np.all([left_df[col] == value for col, value in zip(on, keys)], axis=0)
-        right_mask = np.all([right_df[col] == value for col, value in zip(on, keys)], axis=0)
-
-        # reduce the mask
-        # for example: if left mask = [False, False, True, False], and right mask = [False, False, True, True]
-        # we want to reduce the right mask to [False, False, True, False] (Because there is only 1 `True` on left mask)
-        left_mask_cum_sum = left_mask.cumsum()
-        right_mask_cum_sum = right_mask.cumsum()
-        # because we checked empty above, hence these will not raise exception
-        total_true = min(left_mask_cum_sum[-1], right_mask_cum_sum[-1])
-        # mark all values exceeded `total_true` to False
-        left_mask[left_mask_cum_sum.searchsorted(total_true) + 1 :] = False
-        right_mask[right_mask_cum_sum.searchsorted(total_true) + 1 :] = False
-
-        combined_dfs.append(right_df.loc[right_mask].combine_first(left_df.loc[left_mask]))
+    left_pos, right_pos = match_rows_one_by_one(left_df, right_df, on)
+    left_used[left_pos] = True
+    right_used[right_pos] = True
 
-        left_used |= left_mask
-        right_used |= right_mask
+    # align matched pairs by position, then combine all pairs at once
+    matched_right_df = right_df.iloc[right_pos]
+    right_index = matched_right_df.index
+    matched_right_df = matched_right_df.reset_index(drop=True)
+    matched_left_df = left_df.iloc[left_pos].reset_index(drop=True)
+    combined_df = matched_right_df.combine_first(matched_left_df)
+    combined_df.index = right_index
 
-    return pd.concat(combined_dfs), left_used, right_used
+    return combined_df, left_used, right_used
@@ -136,6 +136,7 @@ from bridge.redis_utils.db_changed import (
     publish_master_config_changed,
     publish_transaction_changed,
 )
+from bridge.services.function_column_store import fill_imported_function_columns
 from bridge.services.transaction_data_import import (
     gen_transaction_partition_table,
     get_all_sensor_models,
@@ -658,6 +659,7 @@ def import_trans_data_per_process(
 
         start_tm, end_tm = df[time_col].min(), df[time_col].max()
         inserted_count, inserted_id, insert_df = transaction_data_obj.import_data(db_instance, df, cfg_data_table)
+        fill_imported_function_columns(db_instance, transaction_data_obj, start_tm, end_tm)
         save_proc_data_count(
             db_instance,
             insert_df,
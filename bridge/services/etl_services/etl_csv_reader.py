@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import codecs
+import mmap
+import re
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas import DataFrame
+from pyarrow import csv as pa_csv
+
+from ap.common.constants import EMPTY_STRING
+from ap.common.logger import logger
+from bridge.services.data_import import PANDAS_DEFAULT_NA
+
+# pandas infers compression from these extensions, pyarrow does not support all of them
+COMPRESSED_FILE_EXTENSIONS = ('.zip', '.gz', '.bz2', '.xz')
+PANDAS_ONLY_PARAMS = ('nrows', 'skipfooter', 'converters', 'parse_dates', 'comment', 'thousands', 'index_col')
+
+
+def read_csv_file(file_path: str, chunk_size: int, **params) -> list[DataFrame]:
+    """
+    Read a whole csv file as chunks of `chunk_size` rows. Runs in worker process of csv reader pool.
+    Use pyarrow csv reader when `params` allow it, otherwise pandas.
+    :param file_path: csv file path
+    :param chunk_size: number of rows of each chunk
+    :param params: pd.read_csv params, built by EtlCsvService.get_alternative_params
+    :return: chunks in file order
+    """
+    if can_read_by_pyarrow(file_path, params):
+        try:
+            df = read_csv_by_pyarrow(file_path, params)
+            return [df.iloc[start : start + chunk_size] for start in range(0, len(df), chunk_size)] or [df]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, KeyError, UnicodeError) as e:
+            # bad lines, missing columns, ... pandas handles them
+            logger.info(f'[ReadFile] pyarrow can not read {file_path}, use pandas. {e}')
+
+    return list(pd.read_csv(file_path, chunksize=chunk_size, **params))
+
+
+def can_read_by_pyarrow(file_path: str, params: dict[str, Any]) -> bool:
+    if file_path.lower().endswith(COMPRESSED_FILE_EXTENSIONS):
+        return False
+
+    if any(params.get(key) is not None for key in PANDAS_ONLY_PARAMS):
+        return False
+
+    sep = params.get('sep')
+    if not sep or len(sep) != 1:
+        return False
+
+    skip_rows = params.get('skiprows')
+    if skip_rows is not None and not isinstance(skip_rows, int):
+        return False
+
+    if params.get('header', 'infer') not in ('infer', 0, None):
+        return False
+
+    try:
+        codecs.lookup(params.get('encoding') or 'utf-8')
+    except LookupError:
+        return False
+
+    # pyarrow keeps spaces before a field, they are trimmed after parsing if they do not change quoting
+    if params.get('skipinitialspace') and not can_trim_initial_spaces(file_path, sep, params.get('encoding')):
+        return False
+
+    # pyarrow result is string only, other dtypes are inferred by pandas
+    columns = params.get('usecols') or params.get('names')
+    dtype = params.get('dtype') or {}
+    if not isinstance(columns, (list, tuple)) or not isinstance(dtype, dict):
+        return False
+
+    if not columns or len(set(columns)) != len(columns):
+        return False
+
+    return all(isinstance(dtype.get(col), pd.StringDtype) for col in columns)
+
+
+def can_trim_initial_spaces(file_path: str, sep: str, encoding: str = None) -> bool:
+    """
+    Trimming leading spaces of parsed values is the same as `skipinitialspace` of pandas
+    if no quote follows leading spaces (pandas reads it as quoted value) and no quoted value starts with a space.
+    Bytes are searched as is, so encoding must write these characters as ascii
+    """
+    encoding = codecs.lookup(encoding or 'utf-8').name
+    if encoding == 'utf-8-sig':
+        # BOM is matched as start of the first field
+        encoding = 'utf-8'
+
+    probe = f'{sep} "\n'
+    try:
+        if probe.encode(encoding) != probe.encode('ascii'):
+            return False
+    except UnicodeError:
+        return False
+
+    field_start = b'(?:^|\\A\xef\xbb\xbf|' + re.escape(sep.encode('ascii')) + b')'
+    pattern = re.compile(field_start + b'(?: +"|" )', re.MULTILINE)
+    with open(file_path, 'rb') as file:
+        if not file.seek(0, 2):
+            return True
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return pattern.search(data) is None
+
+
+def read_csv_by_pyarrow(file_path: str, params: dict[str, Any]) -> DataFrame:
+    """
+    Same result as `pd.read_csv(file_path, **params)` for string columns
+    """
+    encoding = codecs.lookup(params.get('encoding') or 'utf-8').name
+    if encoding in ('utf-8', 'utf-8-sig'):
+        # pyarrow skips utf-8 BOM
+        encoding = 'utf8'
+
+    names = params.get('names')
+    columns = params.get('usecols') or names
+    sep = params['sep']
+    read_options = pa_csv.ReadOptions(
+        encoding=encoding,
+        skip_rows=params.get('skiprows') or 0,
+        column_names=names,
+        use_threads=False,  # already run in a worker process per file
+    )
+    parse_options = pa_csv.ParseOptions(
+        delimiter=sep,
+        newlines_in_values=True,
+        ignore_empty_lines=params.get('skip_blank_lines', True),
+    )
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: pa.string() for col in columns},
+        strings_can_be_null=False,
+        quoted_strings_can_be_null=False,
+    )
+    table = pa_csv.read_csv(
+        file_path,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options,
+    )
+
+    na_values = pa.array(sorted(set(params.get('na_values') or []) | PANDAS_DEFAULT_NA | {EMPTY_STRING}))
+    arrays = []
+    for array in table.columns:
+        if params.get('skipinitialspace'):
+            # same as pandas: only spaces, checked by can_trim_initial_spaces
+            array = pc.utf8_ltrim(array, characters=' ')
+        array = pc.if_else(pc.is_in(array, value_set=na_values), pa.scalar(None, pa.string()), array)
+        arrays.append(array)
+
+    table = pa.table(arrays, names=table.column_names)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype()}.get)
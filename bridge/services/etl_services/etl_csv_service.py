@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Iterator, Optional, Tuple, Type, Union
 
 import numpy as np
@@ -9,15 +11,18 @@ from pandas import DataFrame
 
 from ap.api.setting_module.services.show_latest_record import gen_dummy_header
 from ap.common.common_utils import (
+    ChunkAccumulator,
     add_months,
     calculator_month_ago,
     check_exist,
     convert_time,
+    get_file_size,
 )
 from ap.common.constants import (
     COLUMN_CONVERSION,
     CSV_HORIZONTAL_ROW_INDEX_COL,
     CSV_INDEX_COL,
+    CSV_READ_MEMORY_FACTOR,
     DATETIME_DUMMY,
     DEFAULT_NONE_VALUE,
     DF_CHUNK_SIZE,
@@ -42,7 +47,9 @@ from ap.setting_module.models import (
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.t_csv_management import CsvManagement
 from bridge.services.data_import import NA_VALUES
+from bridge.services.etl_services.etl_csv_reader import read_csv_file
 from bridge.services.etl_services.etl_service import ETLService
+from config import get_csv_read_max_memory, get_csv_read_workers
 
 PREDICT_MEMORY_USAGE_BUFFER = 0.05
 MAX_MEMORY_USAGE_FOR_READ_FILE = 50_000_000  # 50MB
@@ -306,47 +313,37 @@ class EtlCsvService(ETLService):
         use_dummy_datetime = DATETIME_DUMMY in dic_use_cols
         loop_count = 0
         progress_percent = 0
-        df_multi_files = pd.DataFrame()
+        dedup_columns = None
+        if is_scan_master:
+            dedup_columns = list(dict.fromkeys(duplicate_columns + [DataGroupType.DATA_NAME.name]))
+        multi_files_chunks = ChunkAccumulator(dedup_columns=dedup_columns)
         file_paths = []
         csv_management_ids: list[int] = []
-        while target_files:
+        file_streams = self.read_target_files(
+            target_files,
+            dic_target_records,
+            dic_use_cols,
+            limit=first_nrows,
+            for_purpose=for_purpose,
+            is_parallel=is_pull_csv,
+        )
+        for csv_management_id, file_path, data_stream in file_streams:
             if is_pull_csv:
                 CfgConstant.force_running_job()
 
             loop_count += 1
             progress_percent = round(one_loop_percent * loop_count, 2)
-            csv_management_id, file_path = target_files.pop()
             file_paths.append(file_path)
             csv_management_ids.append(csv_management_id)
-            data_encoding = dic_target_records[csv_management_id].data_encoding
-            data_delimiter = dic_target_records[csv_management_id].data_delimiter
-            file_name = dic_target_records[csv_management_id].file_name
-            file_name = file_name.split('\\')[-1].split('.')[0]
-            data_stream = self.standard_csv(
-                dic_use_cols,
-                file_path,
-                data_encoding,
-                data_delimiter,
-                file_name=file_name,
-                limit=first_nrows,
-                for_purpose=for_purpose,
-            )
 
             for df_chunk_one_file in data_stream:
                 # TODO: recheck this function and gen datetime column function
                 self.tracking_group_csv(df_chunk_one_file, loop_count, use_dummy_datetime)
-                df_multi_files = df_multi_files.append(df_chunk_one_file, ignore_index=True)
-                if is_scan_master:
-                    drop_cols = [
-                        col
-                        for col in df_multi_files.columns
-                        if col in duplicate_columns or col in [DataGroupType.DATA_NAME.name]
-                    ]
-                    df_multi_files = df_multi_files.drop_duplicates(subset=drop_cols)
-
-                if len(df_multi_files) >= csv_chunk_record:
+                multi_files_chunks.append(df_chunk_one_file)
+
+                if len(multi_files_chunks) >= csv_chunk_record:
                     yield from self.preprocess_dataframe(
-                        df_multi_files,
+                        multi_files_chunks.pop(),
                         dic_use_cols,
                         use_dummy_datetime,
                         for_purpose,
@@ -360,7 +357,6 @@ class EtlCsvService(ETLService):
                     )
 
                     # reset status of loop's params
-                    df_multi_files = pd.DataFrame()
                     file_paths = [file_path]
                     csv_management_ids = [csv_management_id]
                     if is_scan_master and not self.cfg_data_table.is_has_auto_increment_col():
@@ -368,7 +364,7 @@ class EtlCsvService(ETLService):
                         break
 
         yield from self.preprocess_dataframe(
-            df_multi_files,
+            multi_files_chunks.pop(),
             dic_use_cols,
             use_dummy_datetime,
             for_purpose,
@@ -499,6 +495,24 @@ class EtlCsvService(ETLService):
     ):
         logger.info(f'[ReadFile] {file_path}')
 
+        params, dict_rename_columns, chunk_size = self.get_read_csv_params(
+            dic_use_cols,
+            file_path,
+            encoding,
+            delimiter,
+            limit=limit,
+        )
+        for data_chunk in self.read_csv_with_transpose(file_path, chunk_size=chunk_size, **params):
+            yield self.convert_csv_chunk(data_chunk, file_name, dict_rename_columns, for_purpose=for_purpose)
+
+    def get_read_csv_params(
+        self,
+        dic_use_cols,
+        file_path,
+        encoding,
+        delimiter,
+        limit=None,
+    ) -> tuple[dict[str, Any], dict[str, Any], int]:
         metadata = {'encoding': encoding, 'sep': delimiter}
         # force data type = True will raise error float64 to int32
         read_csv_param = self.build_read_csv_params(self.cfg_data_table, metadata, force_data_type=None)
@@ -517,19 +531,126 @@ class EtlCsvService(ETLService):
         )
         limit_row: int | None = params.get('nrows', None)
         chunk_size = limit_row if limit_row else DF_CHUNK_SIZE
-        for data_chunk in self.read_csv_with_transpose(file_path, chunk_size=chunk_size, **params):
-            if file_name:
-                data_chunk[DataGroupType.FileName.name] = file_name
+        return params, dict_rename_columns, chunk_size
 
-            if MasterDBType.is_v2_group(self.master_type):
-                from bridge.services.etl_services.etl_v2_measure_service import V2MeasureService
+    def convert_csv_chunk(
+        self,
+        data_chunk: DataFrame,
+        file_name=None,
+        dict_rename_columns=None,
+        for_purpose: TransactionForPurpose = None,
+    ) -> DataFrame:
+        if file_name:
+            data_chunk[DataGroupType.FileName.name] = file_name
 
-                self: V2MeasureService
-                yield self.convert_to_standard_v2(data_chunk, for_purpose=for_purpose)
-            else:
-                if dict_rename_columns:
-                    data_chunk.rename(columns=dict_rename_columns, inplace=True)
-                yield data_chunk
+        if MasterDBType.is_v2_group(self.master_type):
+            from bridge.services.etl_services.etl_v2_measure_service import V2MeasureService
+
+            self: V2MeasureService
+            return self.convert_to_standard_v2(data_chunk, for_purpose=for_purpose)
+
+        if dict_rename_columns:
+            data_chunk.rename(columns=dict_rename_columns, inplace=True)
+        return data_chunk
+
+    def read_target_files(
+        self,
+        target_files: list[tuple[int, str]],
+        dic_target_records: dict,
+        dic_use_cols: dict,
+        limit=None,
+        for_purpose: TransactionForPurpose = None,
+        is_parallel=False,
+    ) -> Iterator[tuple[int, str, Iterator[DataFrame]]]:
+        """
+        Yield (csv_management_id, file_path, chunks of file) of target files, last file first.
+        When `is_parallel`, files are read ahead by a process pool (pyarrow csv reader if possible) and yielded in
+        the same order. Read ahead is bounded by worker count and estimated memory (CSV_READ_MAX_MEMORY_ENV).
+        A file that can not be read by the pool is read again here, so errors are the same as sequential reading.
+        """
+        target_files = list(reversed(target_files))
+
+        def _get_file_info(_csv_management_id):
+            _record = dic_target_records[_csv_management_id]
+            _file_name = _record.file_name.split('\\')[-1].split('.')[0]
+            return _record.data_encoding, _record.data_delimiter, _file_name
+
+        def _read_in_this_process(_csv_management_id, _file_path):
+            _encoding, _delimiter, _file_name = _get_file_info(_csv_management_id)
+            return self.standard_csv(
+                dic_use_cols,
+                _file_path,
+                _encoding,
+                _delimiter,
+                file_name=_file_name,
+                limit=limit,
+                for_purpose=for_purpose,
+            )
+
+        def _convert_chunks(_data_chunks, _file_name, _dict_rename_columns):
+            for _data_chunk in _data_chunks:
+                yield self.convert_csv_chunk(_data_chunk, _file_name, _dict_rename_columns, for_purpose=for_purpose)
+
+        workers = get_csv_read_workers()
+        if not is_parallel or workers <= 1 or len(target_files) <= 1 or self.cfg_data_source.csv_detail.is_transpose:
+            for csv_management_id, file_path in target_files:
+                yield csv_management_id, file_path, _read_in_this_process(csv_management_id, file_path)
+            return
+
+        max_memory = get_csv_read_max_memory()
+        next_files = deque(target_files)
+        # (csv_management_id, file_path, future, dict_rename_columns, estimated_memory)
+        pending_files = deque()
+        reserved_memory = 0
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while next_files or pending_files:
+                while next_files and len(pending_files) < workers * 2:
+                    csv_management_id, file_path = next_files[0]
+                    estimated_memory = get_file_size(file_path) * CSV_READ_MEMORY_FACTOR
+                    if pending_files and reserved_memory + estimated_memory > max_memory:
+                        break
+
+                    next_files.popleft()
+                    encoding, delimiter, _ = _get_file_info(csv_management_id)
+                    try:
+                        params, dict_rename_columns, chunk_size = self.get_read_csv_params(
+                            dic_use_cols,
+                            file_path,
+                            encoding,
+                            delimiter,
+                            limit=limit,
+                        )
+                        if callable(params.get('usecols')):
+                            # can not be sent to worker process
+                            future = None
+                        else:
+                            future = executor.submit(read_csv_file, file_path, chunk_size, **params)
+                            logger.info(f'[ReadFile] {file_path} (worker)')
+                    except Exception as e:
+                        logger.info(e)
+                        future, dict_rename_columns = None, None
+
+                    reserved_memory += estimated_memory
+                    pending_files.append((csv_management_id, file_path, future, dict_rename_columns, estimated_memory))
+
+                csv_management_id, file_path, future, dict_rename_columns, estimated_memory = pending_files.popleft()
+                reserved_memory -= estimated_memory
+                data_chunks = None
+                if future is not None:
+                    try:
+                        data_chunks = future.result()
+                    except Exception as e:
+                        logger.info(e)
+
+                if data_chunks is None:
+                    yield csv_management_id, file_path, _read_in_this_process(csv_management_id, file_path)
+                    continue
+
+                _, _, file_name = _get_file_info(csv_management_id)
+                yield csv_management_id, file_path, _convert_chunks(data_chunks, file_name, dict_rename_columns)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def get_limit_records(self, user_limit: int | None = None) -> int | None:
         nrows = get_number_of_reading_lines(self.cfg_data_source.csv_detail.n_rows, user_limit)
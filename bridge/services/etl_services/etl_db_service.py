@@ -366,12 +366,13 @@ class EtlDbService(ETLService):
         return cnt
 
     @log_execution_time()
-    def get_transaction_data(self, factory_db_instance, start_dt: str, end_dt: str):
+    def get_transaction_data(self, factory_db_instance, start_dt: str, end_dt: str, fetch_size=FETCH_MANY_SIZE):
         """
         Gets raw data from data source
         :param factory_db_instance:
         :param start_dt:
         :param end_dt:
+        :param fetch_size: rows per fetch, or function returning it (read before each fetch)
         :return:
         """
         self.check_db_connection()
@@ -391,6 +392,7 @@ class EtlDbService(ETLService):
             start_dt,
             end_dt,
             table_names,
+            fetch_size=fetch_size,
         )
         cols = next(data)
         if not cols:
@@ -401,17 +403,28 @@ class EtlDbService(ETLService):
 
         yield from data
 
-    def base_gen_df_transaction(self, cols, rows):
+    def base_gen_df_transaction(self, cols, rows, seen_row_hashes: set = None):
+        """
+        :param seen_row_hashes: hashes of rows of previous chunks of the same pull, rows in this set are dropped as
+        duplicates and hashes of new rows are added to it
+        """
         df = pd.DataFrame(rows, columns=cols, dtype='object')
         df = format_df(df)
         df_origin = df.copy()
         df.drop_duplicates(inplace=True)
+        if seen_row_hashes is not None and len(df):
+            row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+            is_seen = np.fromiter((row_hash in seen_row_hashes for row_hash in row_hashes.tolist()), dtype=bool)
+            seen_row_hashes.update(row_hashes[~is_seen].tolist())
+            if is_seen.any():
+                df = df[~is_seen]
+
         df_duplicate: DataFrame = df_origin[~df_origin.index.isin(df.index)]
         self.export_duplicate_data_to_file(df_duplicate, self.cfg_data_table.name)
         return df
 
-    def gen_df_transaction(self, cols, rows, convert_col, dict_config):
-        df = self.base_gen_df_transaction(cols, rows)
+    def gen_df_transaction(self, cols, rows, convert_col, dict_config, seen_row_hashes: set = None):
+        df = self.base_gen_df_transaction(cols, rows, seen_row_hashes=seen_row_hashes)
 
         # no records
         if not len(df):
@@ -1102,6 +1115,7 @@ def get_factory_data_partitions(
     end_time: str,
     partition_table_names,
     is_count=False,
+    fetch_size=FETCH_MANY_SIZE,
 ):
     """generate select statement and get data from factory db
 
@@ -1124,6 +1138,7 @@ def get_factory_data_partitions(
             end_time,
             sql_limit,
             is_count=is_count,
+            fetch_size=fetch_size,
         )
         if not data:
             return None
@@ -1147,6 +1162,7 @@ def get_data_by_range_time_partitions(
     end_time: str,
     sql_limit: int,
     is_count: bool = False,
+    fetch_size=FETCH_MANY_SIZE,
 ):
     # remove datetime column here since we will insert it back later
     cols = [sa.Column(col) for col in column_names if col != get_date_col]
@@ -1167,7 +1183,7 @@ def get_data_by_range_time_partitions(
     stmt = stmt.select_from(table).where(condition).limit(sql_limit)
 
     sql, params = db_instance.gen_sql_and_params(stmt)
-    data = db_instance.fetch_many(sql, FETCH_MANY_SIZE, params=params)
+    data = db_instance.fetch_many(sql, fetch_size, params=params)
 
     if not data:
         return None
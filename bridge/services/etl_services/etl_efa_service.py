@@ -6,6 +6,7 @@ from pandas import DataFrame
 from ap.common.common_utils import format_df, merge_list_in_list_to_one_list
 from ap.common.constants import (
     DEFAULT_NONE_VALUE,
+    FETCH_MANY_SIZE,
     SQL_LIMIT_SCAN_DATA_TYPE,
     DataGroupType,
     EFAMasterColumn,
@@ -40,13 +41,21 @@ from bridge.services.utils import get_well_known_columns
 
 class EFAService(EtlDbService):
     @log_execution_time()
-    def get_transaction_data(self, factory_db_instance, start_dt, end_dt, is_only_pull_sample_data=False):
+    def get_transaction_data(
+        self,
+        factory_db_instance,
+        start_dt,
+        end_dt,
+        is_only_pull_sample_data=False,
+        fetch_size=FETCH_MANY_SIZE,
+    ):
         """
         Gets raw data from data source
         :param factory_db_instance:
         :param is_only_pull_sample_data:
         :param start_dt:
         :param end_dt:
+        :param fetch_size: rows per fetch, or function returning it (read before each fetch)
         :return:
         """
         self.check_db_connection()
@@ -67,6 +76,7 @@ class EFAService(EtlDbService):
             end_dt,
             table_names,
             is_only_pull_sample_data,
+            fetch_size=fetch_size,
         )
         cols = next(data)
         if not cols:
@@ -106,8 +116,8 @@ class EFAService(EtlDbService):
 
         self.set_done_status_for_scan_master_job(db_instance=db_instance)
 
-    def gen_df_transaction(self, cols, rows, convert_col, dict_config):
-        df = self.base_gen_df_transaction(cols, rows)
+    def gen_df_transaction(self, cols, rows, convert_col, dict_config, seen_row_hashes: set = None):
+        df = self.base_gen_df_transaction(cols, rows, seen_row_hashes=seen_row_hashes)
 
         # add col in df when user not select scan master
         master_type = self.master_type
@@ -1,3 +1,4 @@
+from itertools import chain
 from typing import Union
 
 import numpy as np
@@ -25,6 +26,8 @@ from ap.common.constants import (
     JOB_ID,
     NEW_COLUMN_PROCESS_IDS_KEY,
     PROC_PART_ID_COL,
+    PULL_DB_FIRST_CHUNK_ROWS,
+    PULL_DB_ROW_HASH_MEMORY,
     SQL_FACTORY_LIMIT,
     CfgConstantType,
     DataGroupType,
@@ -76,6 +79,7 @@ from bridge.services.etl_services.etl_v2_multi_history_service import V2MultiHis
 from bridge.services.etl_services.etl_v2_multi_measure_service import V2MultiMeasureService
 from bridge.services.master_data_import import scan_master
 from bridge.services.scan_data_type import scan_data_type
+from config import get_pull_db_chunk_memory
 
 
 def pull_db(
@@ -98,34 +102,65 @@ def pull_db(
     job_info.job_type = job_type
     job_info.detail = f'{start_dt} - {end_dt}'
 
-    data = etl.get_transaction_data(factory_db_instance, start_dt, end_dt)
+    # process rows chunk by chunk to keep memory bounded, chunk size is estimated from the first (small) chunk
+    chunk_memory = get_pull_db_chunk_memory()
+    chunk_row_limit = PULL_DB_FIRST_CHUNK_ROWS
+    memory_per_row = None
+    # rows are fetched from factory db by chunk size too, at most one chunk of raw rows is waiting to be processed
+    data = etl.get_transaction_data(factory_db_instance, start_dt, end_dt, fetch_size=lambda: chunk_row_limit)
 
     cols = next(data)
+    start_dt_str = convert_time(start_dt, format_str=DATE_FORMAT_STR_ONLY_DIGIT_SHORT)
+    end_dt_str = convert_time(end_dt, format_str=DATE_FORMAT_STR_ONLY_DIGIT_SHORT)
+    binary_file_prefix = f'{start_dt_str}_{end_dt_str}'
+
+    # hashes of imported rows to drop duplicates across chunks, bounded by chunk memory.
+    # when it is full, older hashes are forgotten: duplicates left are removed by DUPLICATE_DATA_HANDLE job
+    seen_row_hashes = set()
+    max_seen_row_hashes = max(chunk_memory // PULL_DB_ROW_HASH_MEMORY, PULL_DB_FIRST_CHUNK_ROWS)
+    auto_increment_max_values = []
+    data_len = 0
     rows = []
-    for _rows in data:
-        if _rows is None:
-            continue
+    for _rows in chain(data, [None]):
+        if _rows is not None:
+            rows.extend(_rows)
+            data_len += len(_rows)
+            job_info.calc_percent(data_len, SQL_FACTORY_LIMIT)
+            yield job_info.percent
+
+        is_last = _rows is None
+        offset = 0
+        while len(rows) - offset >= chunk_row_limit or (is_last and offset < len(rows)):
+            chunk_rows = rows[offset : offset + chunk_row_limit]
+            offset += len(chunk_rows)
+            if len(seen_row_hashes) > max_seen_row_hashes:
+                logger.info(f'[PULL_DB] {len(seen_row_hashes)} row hashes, forget them to keep memory bounded')
+                seen_row_hashes.clear()
+
+            df = etl.gen_df_transaction(cols, chunk_rows, convert_col, dict_config, seen_row_hashes=seen_row_hashes)
+            del chunk_rows
+            if df is None or df.empty:
+                continue
 
-        rows.extend(_rows)
-        job_info.calc_percent(len(rows), SQL_FACTORY_LIMIT)
-        yield job_info.percent
+            if memory_per_row is None:
+                memory_per_row = max(df.memory_usage(deep=True).sum() / len(df), 1)
+                chunk_row_limit = max(PULL_DB_FIRST_CHUNK_ROWS, int(chunk_memory // memory_per_row))
+
+            auto_increment_max_values.append(df[etl.auto_increment_col].max())
+            convert_db_timezone(df, etl, dic_tz_info)
+            job_info = gen_master_and_pull_data_vertical_holding(
+                df,
+                etl.cfg_data_table,
+                job_info,
+                binary_file_suffix=binary_file_prefix,
+            )
 
-    data_len = len(rows)
-    if data_len:
-        df = etl.gen_df_transaction(cols, rows, convert_col, dict_config)
+        del rows[:offset]
+
+    if auto_increment_max_values:
         job_info.auto_increment_start_tm = start_dt
-        job_info.auto_increment_end_tm = str(df[etl.auto_increment_col].max())
-        convert_db_timezone(df, etl, dic_tz_info)
+        job_info.auto_increment_end_tm = str(pd.Series(auto_increment_max_values).max())
 
-        start_dt_str = convert_time(start_dt, format_str=DATE_FORMAT_STR_ONLY_DIGIT_SHORT)
-        end_dt_str = convert_time(end_dt, format_str=DATE_FORMAT_STR_ONLY_DIGIT_SHORT)
-        binary_file_prefix = f'{start_dt_str}_{end_dt_str}'
-        job_info = gen_master_and_pull_data_vertical_holding(
-            df,
-            etl.cfg_data_table,
-            job_info,
-            binary_file_suffix=binary_file_prefix,
-        )
     job_info.status = JobStatus.DONE
     job_info.committed_count = data_len
     yield job_info
@@ -113,13 +113,21 @@ child_equip_meas_items_table = sa.Table(
 class SoftwareWorkshopService(EtlDbService):
     @log_execution_time(prefix='etl_software_workshop_service')
     @log_execution_time()
-    def get_transaction_data(self, factory_db_instance, start_dt, end_dt, is_only_pull_sample_data=False):
+    def get_transaction_data(
+        self,
+        factory_db_instance,
+        start_dt,
+        end_dt,
+        is_only_pull_sample_data=False,
+        fetch_size=FETCH_MANY_SIZE,
+    ):
         """
         Gets raw data from data source
         :param factory_db_instance:
         :param is_only_pull_sample_data:
         :param start_dt:
         :param end_dt:
+        :param fetch_size: rows per fetch, or function returning it (read before each fetch)
         :return:
         """
         self.check_db_connection()
@@ -130,7 +138,7 @@ class SoftwareWorkshopService(EtlDbService):
             limit=SOFTWARE_WORKSHOP_LIMIT_PULL_DB,
         )
         sql, params = factory_db_instance.gen_sql_and_params(stmt)
-        data = factory_db_instance.fetch_many(sql, FETCH_MANY_SIZE, params=params)
+        data = factory_db_instance.fetch_many(sql, fetch_size, params=params)
         cols = next(data)
         if not cols:
             yield None
@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from apscheduler.triggers.date import DateTrigger
+from pytz import utc
+
+from ap import scheduler
+from ap.api.common.services.show_graph_database import ShowGraphConfigData, get_process_config_data
+from ap.common.common_utils import gen_sql_label
+from ap.common.constants import (
+    FUNCTION_COLUMN_BACKFILL_DAYS,
+    FUNCTION_COLUMN_PREFIX,
+    DataGroupType,
+    JobType,
+    dict_function_column_data_type_db,
+)
+from ap.common.logger import log_execution_time, logger
+from ap.common.pydn.dblib.postgresql import PostgreSQL
+from ap.common.scheduler import scheduler_app_context
+from ap.equations.core import EQUATION_DEFINITION
+from ap.equations.error import FunctionFieldError
+from ap.equations.utils import get_function_class_by_id
+from ap.setting_module.services.background_process import send_processing_info
+from bridge.models.bridge_station import BridgeStationModel
+from bridge.models.transaction_model import TransactionData
+from config import is_persist_function_columns
+
+# change it when evaluation of stored columns changes, stored columns of other versions are evaluated again
+FUNCTION_COLUMN_FORMAT_VERSION = 1
+
+# state of a stored column is kept as comment of the column, no comment: being filled by backfill job
+STORED_COLUMN_COMPLETE = 'complete'
+STORED_COLUMN_FAILED = 'failed'
+
+FUNCTION_DETAIL_FIELDS = ('function_id', 'process_column_id', 'var_x', 'var_y', 'a', 'b', 'c', 'n', 'k', 's', 't')
+
+
+@dataclasses.dataclass
+class StorableFunctionColumn:
+    """
+    Function column whose value can be evaluated at import time and stored in transaction table
+    """
+
+    column_id: int
+    # label of column in graph data
+    label: str
+    # column in transaction table, changes when definition of function or its inputs changes
+    name: str
+    output_type: str
+    # details of column and function columns it depends on, in evaluation order
+    function_details: list
+    # columns read from transaction table
+    input_columns: list
+
+
+def is_chain_of_me_functions(cfg_col) -> bool:
+    return all(detail.process_column_id in (detail.var_x, detail.var_y) for detail in cfg_col.function_details)
+
+
+def is_storable_input_column(cfg_col) -> bool:
+    """
+    Input must be read from transaction table as is: not joined with master / data source, not a category factor
+    """
+    if DataGroupType.is_data_source_name(cfg_col.column_type):
+        return False
+
+    if DataGroupType.is_master_data_column(cfg_col.column_type) and not cfg_col.function_details:
+        return False
+
+    return cfg_col.raw_data_type in dict_function_column_data_type_db
+
+
+def get_function_output_type(cfg_proc: ShowGraphConfigData, function_detail) -> Optional[str]:
+    cfg_col_x = cfg_proc.get_col(function_detail.var_x)
+    cfg_col_y = cfg_proc.get_col(function_detail.var_y)
+    try:
+        equation_class = get_function_class_by_id(function_detail.function_id)
+        equation = equation_class.from_kwargs(**function_detail.as_dict())
+        output_type = equation.get_output_type(
+            x_data_type=cfg_col_x.raw_data_type if cfg_col_x else None,
+            y_data_type=cfg_col_y.raw_data_type if cfg_col_y else None,
+        )
+    except (KeyError, FunctionFieldError):
+        return None
+
+    return output_type.value
+
+
+def gen_stored_column_name(cfg_col, function_details: list, dependent_columns: list, output_type: str) -> str:
+    definition = {
+        'version': FUNCTION_COLUMN_FORMAT_VERSION,
+        'output_type': output_type,
+        'functions': [[getattr(detail, field, None) for field in FUNCTION_DETAIL_FIELDS] for detail in function_details],
+        'columns': [[col.id, col.bridge_column_name, col.raw_data_type] for col in dependent_columns],
+    }
+    fingerprint = hashlib.md5(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return f'{FUNCTION_COLUMN_PREFIX}{cfg_col.id}_{fingerprint}'
+
+
+def gen_storable_function_column(cfg_proc: ShowGraphConfigData, cfg_col) -> Optional[StorableFunctionColumn]:
+    if not cfg_col.function_details or is_chain_of_me_functions(cfg_col):
+        return None
+
+    dic_cols = {col.id: col for col in cfg_proc.columns}
+    function_details = []
+    dependent_columns = []
+    input_columns = []
+    visited = set()
+    remain_col_ids = [cfg_col.id]
+    while remain_col_ids:
+        col_id = remain_col_ids.pop()
+        if col_id in visited:
+            continue
+        visited.add(col_id)
+
+        col = dic_cols.get(col_id)
+        if col is None:
+            return None
+
+        dependent_columns.append(col)
+        if not col.function_details or is_chain_of_me_functions(col):
+            if not is_storable_input_column(col):
+                return None
+            input_columns.append(col)
+
+        for function_detail in col.function_details:
+            equation_class = EQUATION_DEFINITION.get(function_detail.function_id)
+            if equation_class is None or not equation_class.ROW_WISE:
+                return None
+
+            function_details.append(function_detail)
+            remain_col_ids.extend(var for var in (function_detail.var_x, function_detail.var_y) if var is not None)
+
+    # same order as `sorted_function_details` of graph data
+    function_details.sort(key=lambda detail: detail.order)
+    dependent_columns.sort(key=lambda col: col.id)
+
+    own_details = [detail for detail in function_details if detail.process_column_id == cfg_col.id]
+    output_type = get_function_output_type(cfg_proc, own_details[-1])
+    if output_type not in dict_function_column_data_type_db:
+        return None
+
+    return StorableFunctionColumn(
+        column_id=cfg_col.id,
+        label=gen_sql_label(cfg_col.id, cfg_col.column_name),
+        name=gen_stored_column_name(cfg_col, function_details, dependent_columns, output_type),
+        output_type=output_type,
+        function_details=function_details,
+        input_columns=input_columns,
+    )
+
+
+def get_storable_function_columns(cfg_proc: ShowGraphConfigData, col_ids=None) -> Dict[int, StorableFunctionColumn]:
+    """
+    :param cfg_proc: process config of graph data (function columns are preprocessed)
+    :param col_ids: only these columns, all columns if None
+    :return: column id -> storable function column
+    """
+    storable_columns = {}
+    for cfg_col in cfg_proc.columns:
+        if col_ids is not None and cfg_col.id not in col_ids:
+            continue
+
+        storable_column = gen_storable_function_column(cfg_proc, cfg_col)
+        if storable_column is not None:
+            storable_columns[cfg_col.id] = storable_column
+
+    return storable_columns
+
+
+def get_stored_column_states(db_instance: PostgreSQL, table_name) -> Dict[str, Optional[str]]:
+    """
+    :return: stored function column name -> state
+    """
+    param_marker = BridgeStationModel.get_parameter_marker()
+    sql = f'''
+        SELECT attribute.attname, col_description(attribute.attrelid, attribute.attnum)
+        FROM pg_attribute attribute
+        JOIN pg_class cls ON cls.oid = attribute.attrelid
+        JOIN pg_namespace nmsp ON nmsp.oid = cls.relnamespace
+        WHERE nmsp.nspname = {param_marker}
+          AND cls.relname = {param_marker}
+          AND attribute.attnum > 0
+          AND NOT attribute.attisdropped
+          AND left(attribute.attname, {len(FUNCTION_COLUMN_PREFIX)}) = {param_marker}
+    '''
+    params = [db_instance.schema, table_name, FUNCTION_COLUMN_PREFIX]
+    _, rows = db_instance.run_sql(sql, params=params, row_is_dict=False)
+    return {name: state for name, state in rows}
+
+
+def set_stored_column_state(db_instance: PostgreSQL, table_name, column_name, state: Optional[str]):
+    state_sql = f"'{state}'" if state else 'NULL'
+    db_instance.execute_sql(f'COMMENT ON COLUMN {table_name}.{column_name} IS {state_sql}')
+
+
+def clear_stored_column_states(db_instance: PostgreSQL, table_name):
+    """
+    Stored columns are not complete after rows are imported without filling them,
+    backfill job fills them when storing function columns is turned on again
+    """
+    for name, state in get_stored_column_states(db_instance, table_name).items():
+        if state is not None:
+            set_stored_column_state(db_instance, table_name, name, None)
+
+
+def get_stored_function_columns(db_instance: PostgreSQL, end_procs) -> Dict[int, Dict[int, StorableFunctionColumn]]:
+    """
+    Function columns of graph whose stored values are complete and match current definition
+    :return: process id -> {column id -> stored function column}
+    """
+    if not is_persist_function_columns():
+        return {}
+
+    stored_function_columns = {}
+    for end_proc in end_procs:
+        storable_columns = get_storable_function_columns(end_proc.cfg_proc, end_proc.col_ids)
+        if not storable_columns:
+            continue
+
+        stored_states = get_stored_column_states(db_instance, end_proc.cfg_proc.table_name)
+        stored_columns = {
+            col_id: storable_column
+            for col_id, storable_column in storable_columns.items()
+            if stored_states.get(storable_column.name) == STORED_COLUMN_COMPLETE
+        }
+        if stored_columns:
+            stored_function_columns[end_proc.proc_id] = stored_columns
+
+    return stored_function_columns
+
+
+def to_utc_naive(value) -> pd.Timestamp:
+    # transaction time columns are `timestamp` (without time zone) in UTC
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(utc).tz_localize(None)
+    return timestamp
+
+
+def evaluate_stored_column(df: pd.DataFrame, cfg_proc: ShowGraphConfigData, storable_column: StorableFunctionColumn):
+    # evaluate by the same code as graph data, stored values must be the same as evaluated ones
+    from ap.api.common.services.show_graph_services import add_equation_column_to_df
+
+    df = df.copy()
+    for function_detail in storable_column.function_details:
+        df = add_equation_column_to_df(df, function_detail, cfg_proc)
+
+    return df[storable_column.label]
+
+
+@log_execution_time()
+def fill_stored_columns(
+    db_instance: PostgreSQL,
+    cfg_proc: ShowGraphConfigData,
+    trans_data: TransactionData,
+    storable_columns: List[StorableFunctionColumn],
+    start_tm,
+    end_tm,
+) -> List[StorableFunctionColumn]:
+    """
+    Evaluate stored columns of rows in [start_tm, end_tm] that have empty stored values, write them to table
+    :return: columns that can not be evaluated, their values are not written
+    """
+    table_name = trans_data.table_name
+    id_col = trans_data.id_col_name
+    time_col = trans_data.getdate_column.bridge_column_name
+    param_marker = BridgeStationModel.get_parameter_marker()
+    params = [to_utc_naive(start_tm).to_pydatetime(), to_utc_naive(end_tm).to_pydatetime()]
+
+    input_columns = {col.id: col for storable_column in storable_columns for col in storable_column.input_columns}
+    select_cols = [id_col] + [
+        f'{col.bridge_column_name} AS "{gen_sql_label(col.id, col.column_name)}"' for col in input_columns.values()
+    ]
+    null_conditions = ' OR '.join(f'{storable_column.name} IS NULL' for storable_column in storable_columns)
+    sql = f'''
+        SELECT {', '.join(select_cols)}
+        FROM {table_name}
+        WHERE {time_col} >= {param_marker}
+          AND {time_col} <= {param_marker}
+          AND ({null_conditions})
+    '''
+    df = db_instance.run_sql_to_frame(sql, params=params)
+    if df is None or df.empty:
+        return []
+
+    failed_columns = []
+    df_values = df[[id_col]].copy()
+    for storable_column in storable_columns:
+        try:
+            df_values[storable_column.name] = evaluate_stored_column(df, cfg_proc, storable_column)
+        except Exception as e:
+            logger.warning(f'[FUNCTION_COLUMN] can not evaluate {storable_column.name} of {table_name}: {e}')
+            failed_columns.append(storable_column)
+
+    evaluated_columns = [col for col in storable_columns if col not in failed_columns]
+    if not evaluated_columns:
+        return failed_columns
+
+    temp_table = f'tmp_{FUNCTION_COLUMN_PREFIX}{table_name}'
+    temp_cols = [f'{id_col} integer'] + [
+        f'{col.name} {dict_function_column_data_type_db[col.output_type]}' for col in evaluated_columns
+    ]
+    set_cols = [f'{col.name} = {temp_table}.{col.name}' for col in evaluated_columns]
+    update_sql = f'''
+        UPDATE {table_name}
+        SET {', '.join(set_cols)}
+        FROM {temp_table}
+        WHERE {table_name}.{id_col} = {temp_table}.{id_col}
+          AND {table_name}.{time_col} >= {param_marker}
+          AND {table_name}.{time_col} <= {param_marker}
+    '''
+    db_instance.execute_sql(f'DROP TABLE IF EXISTS {temp_table}')
+    db_instance.execute_sql(f'CREATE TEMP TABLE {temp_table} ({", ".join(temp_cols)}) ON COMMIT DROP')
+    db_instance.bulk_copy(temp_table, df_values[[id_col] + [col.name for col in evaluated_columns]])
+    db_instance.execute_sql(update_sql, params=params)
+    db_instance.execute_sql(f'DROP TABLE {temp_table}')
+
+    return failed_columns
+
+
+def is_backfill_required(storable_columns: Dict[int, StorableFunctionColumn], stored_states: Dict[str, Optional[str]]):
+    storable_names = {storable_column.name for storable_column in storable_columns.values()}
+    if any(name not in storable_names for name in stored_states):
+        return True
+
+    return any(stored_states.get(name, None) is None for name in storable_names)
+
+
+@log_execution_time()
+def fill_imported_function_columns(db_instance: PostgreSQL, trans_data: TransactionData, start_tm, end_tm):
+    """
+    Evaluate stored function columns of rows just imported, in the transaction of import.
+    Stored columns that are not complete yet are filled too, backfill job does not revisit rows of this import.
+    Schedule backfill job when stored columns do not match current function definitions
+    :param db_instance:
+    :param trans_data:
+    :param start_tm: min time of imported rows
+    :param end_tm: max time of imported rows
+    :return:
+    """
+    if not is_persist_function_columns():
+        # rows of this import are empty in stored columns
+        clear_stored_column_states(db_instance, trans_data.table_name)
+        return
+
+    cfg_proc = get_process_config_data(trans_data.process_id)
+    storable_columns = get_storable_function_columns(cfg_proc) if cfg_proc else {}
+    # after insert, a stored column can not be added by backfill job until this import is committed
+    stored_states = get_stored_column_states(db_instance, trans_data.table_name)
+    if not storable_columns and not stored_states:
+        return
+
+    fill_columns = [
+        storable_column
+        for storable_column in storable_columns.values()
+        if storable_column.name in stored_states and stored_states[storable_column.name] != STORED_COLUMN_FAILED
+    ]
+    failed_columns = []
+    if fill_columns:
+        db_instance.execute_sql(f'SAVEPOINT {FUNCTION_COLUMN_PREFIX}import')
+        try:
+            failed_columns = fill_stored_columns(db_instance, cfg_proc, trans_data, fill_columns, start_tm, end_tm)
+        except Exception as e:
+            logger.exception(e)
+            db_instance.execute_sql(f'ROLLBACK TO SAVEPOINT {FUNCTION_COLUMN_PREFIX}import')
+            failed_columns = fill_columns
+        else:
+            db_instance.execute_sql(f'RELEASE SAVEPOINT {FUNCTION_COLUMN_PREFIX}import')
+
+    # rows of this import are empty in failed columns, they are not complete anymore
+    for storable_column in failed_columns:
+        set_stored_column_state(db_instance, trans_data.table_name, storable_column.name, None)
+
+    if failed_columns or is_backfill_required(storable_columns, stored_states):
+        add_backfill_function_columns_job(trans_data.process_id)
+
+
+def backfill_function_columns_gen(process_id):
+    """
+    Make stored function columns of a process match current function definitions:
+    drop outdated stored columns, add new ones and evaluate them for all imported data
+    """
+    yield 0
+    cfg_proc = get_process_config_data(process_id)
+    if cfg_proc is None:
+        yield 100
+        return
+
+    trans_data = TransactionData(process_id)
+    storable_columns = get_storable_function_columns(cfg_proc) if is_persist_function_columns() else {}
+    storable_names = {storable_column.name for storable_column in storable_columns.values()}
+    table_name = trans_data.table_name
+    with BridgeStationModel.get_db_proxy() as db_instance:
+        if not trans_data.is_table_exist(db_instance):
+            yield 100
+            return
+
+        stored_states = get_stored_column_states(db_instance, table_name)
+        outdated_names = [name for name in stored_states if name not in storable_names]
+        if outdated_names:
+            trans_data.delete_columns(db_instance, outdated_names)
+
+        new_columns = [col for col in storable_columns.values() if col.name not in stored_states]
+        if new_columns:
+            add_cols = [
+                f'ADD COLUMN IF NOT EXISTS {col.name} {dict_function_column_data_type_db[col.output_type]}'
+                for col in new_columns
+            ]
+            db_instance.execute_sql(f'ALTER TABLE {table_name} {", ".join(add_cols)}')
+
+        db_instance.connection.commit()
+        yield 10
+
+        fill_columns = [col for col in storable_columns.values() if stored_states.get(col.name) is None]
+        time_col = trans_data.getdate_column.bridge_column_name
+        _, rows = db_instance.run_sql(f'SELECT MIN({time_col}), MAX({time_col}) FROM {table_name}', row_is_dict=False)
+        min_tm, max_tm = rows[0] if rows else (None, None)
+        if fill_columns and min_tm is not None:
+            start_tm = pd.Timestamp(min_tm)
+            end_tm = pd.Timestamp(max_tm)
+            total_seconds = max((end_tm - start_tm).total_seconds(), 1)
+            while fill_columns and start_tm <= end_tm:
+                window_end_tm = start_tm + pd.Timedelta(days=FUNCTION_COLUMN_BACKFILL_DAYS)
+                failed_columns = fill_stored_columns(
+                    db_instance,
+                    cfg_proc,
+                    trans_data,
+                    fill_columns,
+                    start_tm,
+                    window_end_tm,
+                )
+                for storable_column in failed_columns:
+                    set_stored_column_state(db_instance, table_name, storable_column.name, STORED_COLUMN_FAILED)
+                    fill_columns.remove(storable_column)
+
+                db_instance.connection.commit()
+                start_tm = window_end_tm
+                yield 10 + 85 * min((start_tm - pd.Timestamp(min_tm)).total_seconds() / total_seconds, 1)
+
+        for storable_column in fill_columns:
+            set_stored_column_state(db_instance, table_name, storable_column.name, STORED_COLUMN_COMPLETE)
+        db_instance.connection.commit()
+
+    yield 100
+
+
+def add_backfill_function_columns_job(process_id):
+    """
+    add job to evaluate stored function columns of a process again
+    """
+    job_name = JobType.BACKFILL_FUNCTION_COLUMNS.name
+    job_id = f'{job_name}_{process_id}'
+    run_time = datetime.now().astimezone(utc)
+    scheduler.add_job(
+        job_id,
+        backfill_function_columns_job,
+        trigger=DateTrigger(run_date=run_time, timezone=utc),
+        replace_existing=True,
+        kwargs={'_job_id': job_id, '_job_name': job_name, 'process_id': process_id},
+    )
+
+
+@scheduler_app_context
+def backfill_function_columns_job(_job_id=None, _job_name=None, process_id=None, **kwargs):
+    """
+    stored function columns backfill job
+    """
+    gen = backfill_function_columns_gen(process_id)
+    send_processing_info(gen, JobType.BACKFILL_FUNCTION_COLUMNS, process_id=process_id, **kwargs)
@@ -1,22 +1,134 @@
-from typing import Optional
+import dataclasses
+import hashlib
+import json
+from typing import Optional, Tuple
 
-from ap.common.logger import log_execution_time
+from ap.common.logger import log_execution_time, logger
 from ap.common.pydn.dblib.postgresql import PostgreSQL
+from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.cfg_trace import CfgTrace
 from bridge.models.transaction_model import TransactionData
 from bridge.services.sql.sql_generator import gen_sql_proc_link_count
 from bridge.services.sql.utils import gen_sql_and_params
 
 
+@dataclasses.dataclass
+class ProcLinkWatermark:
+    """
+    Rows of id <= max id of both processes were counted with trace config of `trace_fingerprint`
+    """
+
+    trace_fingerprint: str
+    self_max_id: int
+    self_row_count: int
+    target_max_id: int
+    target_row_count: int
+
+
 @log_execution_time('gen_proc_link')
 def gen_proc_link_of_edge(db_instance: PostgreSQL, trace: CfgTrace, limit: Optional[int] = None):
+    create_edge_tables(db_instance, trace)
+    return count_proc_link(db_instance, trace, limit)
+
+
+@log_execution_time('gen_proc_link')
+def gen_proc_link_of_edge_incremental(
+    db_instance: PostgreSQL,
+    trace: CfgTrace,
+    watermark: Optional[ProcLinkWatermark] = None,
+    counted: Optional[int] = None,
+) -> Tuple[int, ProcLinkWatermark]:
+    """
+    Count rows of self process linked with target process, same as gen_proc_link_of_edge without limit.
+    If links up to `watermark` are still valid, only rows imported after it are joined:
+        new self rows x all target rows
+        + old self rows linked with new target rows but not with old target rows
+    Full count if trace config was changed, rows up to watermark were deleted/restored or link is by master id.
+    :param db_instance:
+    :param trace:
+    :param watermark: watermark of previous count
+    :param counted: previous count
+    :return: count, new watermark
+    """
+    create_edge_tables(db_instance, trace)
+    self_trans_data = TransactionData(trace.self_process_id)
+    target_trans_data = TransactionData(trace.target_process_id)
+    fingerprint = gen_trace_fingerprint(trace)
+
+    # max ids and counts must be read from one snapshot, rows committed meanwhile belong to next count
+    db_instance.connection.commit()
+    db_instance.run_sql('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+    try:
+        self_max_id = get_max_id(db_instance, self_trans_data)
+        target_max_id = get_max_id(db_instance, target_trans_data)
+        is_incremental = (
+            watermark is not None
+            and counted is not None
+            and watermark.trace_fingerprint == fingerprint
+            and self_max_id >= watermark.self_max_id
+            and target_max_id >= watermark.target_max_id
+            and not is_master_link_edge(trace)
+            and count_rows_by_id(db_instance, self_trans_data, None, watermark.self_max_id) == watermark.self_row_count
+            and count_rows_by_id(db_instance, target_trans_data, None, watermark.target_max_id)
+            == watermark.target_row_count
+        )
+
+        if not is_incremental:
+            logger.info(f'[ProcLinkCount] Full count {trace.self_process_id} - {trace.target_process_id}')
+            count = count_proc_link(
+                db_instance,
+                trace,
+                self_id_range=(None, self_max_id),
+                target_id_range=(None, target_max_id),
+            )
+            watermark = ProcLinkWatermark(
+                trace_fingerprint=fingerprint,
+                self_max_id=self_max_id,
+                self_row_count=count_rows_by_id(db_instance, self_trans_data, None, self_max_id),
+                target_max_id=target_max_id,
+                target_row_count=count_rows_by_id(db_instance, target_trans_data, None, target_max_id),
+            )
+            return count, watermark
+
+        count = counted
+        self_row_count = watermark.self_row_count
+        target_row_count = watermark.target_row_count
+        if self_max_id > watermark.self_max_id:
+            count += count_proc_link(
+                db_instance,
+                trace,
+                self_id_range=(watermark.self_max_id, self_max_id),
+                target_id_range=(None, target_max_id),
+            )
+            self_row_count += count_rows_by_id(db_instance, self_trans_data, watermark.self_max_id, self_max_id)
+
+        if target_max_id > watermark.target_max_id:
+            count += count_proc_link(
+                db_instance,
+                trace,
+                self_id_range=(None, watermark.self_max_id),
+                target_id_range=(watermark.target_max_id, target_max_id),
+                excluded_target_id_range=(None, watermark.target_max_id),
+            )
+            target_row_count += count_rows_by_id(db_instance, target_trans_data, watermark.target_max_id, target_max_id)
+
+        watermark = ProcLinkWatermark(fingerprint, self_max_id, self_row_count, target_max_id, target_row_count)
+        return count, watermark
+    finally:
+        db_instance.connection.commit()
+
+
+def create_edge_tables(db_instance: PostgreSQL, trace: CfgTrace):
     # create table if not exist
     for proc_id in (trace.self_process_id, trace.target_process_id):
         trans_data = TransactionData(proc_id)
         if not trans_data.is_table_exist(db_instance):
             trans_data.create_table(db_instance)
             db_instance.connection.commit()
-    sql_stmt = gen_sql_proc_link_count(trace, limit)
+
+
+def count_proc_link(db_instance: PostgreSQL, trace: CfgTrace, limit: Optional[int] = None, **id_ranges) -> int:
+    sql_stmt = gen_sql_proc_link_count(trace, limit, **id_ranges)
     sql, params = gen_sql_and_params(sql_stmt)
     _, rows = db_instance.run_sql(sql, row_is_dict=False, params=params)
     count = rows[0][0]
@@ -29,3 +141,61 @@ def convert_datetime_to_integer(dt):
     if isinstance(dt, str):
         return int(dt[0:4]) * 100 + int(dt[5:7])
     return dt.year * 100 + dt.month
+
+
+def gen_trace_fingerprint(trace: CfgTrace) -> str:
+    """
+    Hash of link keys of trace, counted links are outdated if it is changed
+    """
+    self_trans_data = TransactionData(trace.self_process_id)
+    target_trans_data = TransactionData(trace.target_process_id)
+    keys = [trace.self_process_id, trace.target_process_id]
+    for trace_key in trace.trace_keys:
+        keys.append(
+            [
+                trace_key.self_column_id,
+                self_trans_data.get_cfg_column_by_id(trace_key.self_column_id).raw_data_type,
+                trace_key.self_column_substr_from,
+                trace_key.self_column_substr_to,
+                trace_key.delta_time,
+                trace_key.cut_off,
+                trace_key.target_column_id,
+                target_trans_data.get_cfg_column_by_id(trace_key.target_column_id).raw_data_type,
+                trace_key.target_column_substr_from,
+                trace_key.target_column_substr_to,
+            ],
+        )
+    return hashlib.md5(json.dumps(keys, default=str).encode()).hexdigest()
+
+
+def is_master_link_edge(trace: CfgTrace) -> bool:
+    """
+    Links by master id change when master data is mapped again, without any new transaction row
+    """
+    self_trans_data = TransactionData(trace.self_process_id)
+    return any(
+        self_trans_data.get_cfg_column_by_id(trace_key.self_column_id).is_master_data_column()
+        for trace_key in trace.trace_keys
+    )
+
+
+def get_max_id(db_instance: PostgreSQL, trans_data: TransactionData) -> int:
+    sql = f'SELECT max({trans_data.id_col_name}) FROM {trans_data.table_name}'
+    _, rows = db_instance.run_sql(sql, row_is_dict=False)
+    return rows[0][0] or 0
+
+
+def count_rows_by_id(
+    db_instance: PostgreSQL,
+    trans_data: TransactionData,
+    after_id: Optional[int],
+    until_id: int,
+) -> int:
+    param_marker = BridgeStationModel.get_parameter_marker()
+    sql = f'SELECT count(*) FROM {trans_data.table_name} WHERE {trans_data.id_col_name} <= {param_marker}'
+    params = [until_id]
+    if after_id is not None:
+        sql += f' AND {trans_data.id_col_name} > {param_marker}'
+        params.append(after_id)
+    _, rows = db_instance.run_sql(sql, row_is_dict=False, params=params)
+    return rows[0][0]
@@ -9,6 +9,7 @@ from pandas.core.dtypes.common import is_datetime64_ns_dtype, is_int64_dtype
 from ap import multiprocessing_lock
 from ap.api.setting_module.services.filter_settings import insert_default_filter_config_raw_sql
 from ap.common.common_utils import (
+    ChunkAccumulator,
     format_df,
     get_current_timestamp,
     get_nayose_path,
@@ -153,9 +154,10 @@ def scan_data_type(
 
         data_name_sys = dict_m_data.get(data_id)
         if data_id in dic_data_series:
-            dic_data_series[data_id] = dic_data_series[data_id].append(series)
+            dic_data_series[data_id].append(series)
         else:
-            dic_data_series[data_id] = series
+            dic_data_series[data_id] = ChunkAccumulator(ignore_index=False)
+            dic_data_series[data_id].append(series)
             # get preview data
             if process_id in dict_process_series:
                 dict_process_series[process_id][data_name_sys] = series.tail(PREVIEW_DATA_RECORDS).reset_index(
@@ -176,6 +178,7 @@ def scan_data_type(
 
     yield 50
 
+    dic_data_series = {data_id: series_chunks.concat() for data_id, series_chunks in dic_data_series.items()}
     dic_data_types = {
         data_id: guess_data_type(db_instance, dic_data_series.get(data_id), data_id, data_table_id)
         for data_id in set(all_data_ids + list(dic_data_series))
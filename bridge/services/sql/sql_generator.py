@@ -304,6 +304,11 @@ class SqlProcLink:
                     column=cfg_col.bridge_column_name,
                     label=cfg_col.gen_sql_label(),
                 )
+            elif cfg_col.id in self.trans_data.stored_function_columns:
+                query_builder.add_column(
+                    column=self.trans_data.stored_function_columns[cfg_col.id],
+                    label=cfg_col.gen_sql_label(),
+                )
 
         link_cols = []
         for cfg_col in self.link_cfg_columns:
@@ -729,7 +734,22 @@ def gen_cte_show_category(
     return stmt.cte(table_alias)
 
 
-def gen_sql_proc_link_count(trace: CfgTrace, limit: Optional[int] = None) -> Select:
+def gen_sql_proc_link_count(
+    trace: CfgTrace,
+    limit: Optional[int] = None,
+    self_id_range: Optional[tuple[Optional[int], Optional[int]]] = None,
+    target_id_range: Optional[tuple[Optional[int], Optional[int]]] = None,
+    excluded_target_id_range: Optional[tuple[Optional[int], Optional[int]]] = None,
+) -> Select:
+    """
+    Count rows of self process linked with target process
+    :param trace:
+    :param limit:
+    :param self_id_range: (after_id, until_id) of self rows, all rows if None
+    :param target_id_range: (after_id, until_id) of target rows, all rows if None
+    :param excluded_target_id_range: self rows linked with target rows of this range are not counted
+    :return:
+    """
     self_proc_link_keys: list[SqlProcLinkKey] = []
     target_proc_link_keys: list[SqlProcLinkKey] = []
 
@@ -763,14 +783,25 @@ def gen_sql_proc_link_count(trace: CfgTrace, limit: Optional[int] = None) -> Sel
         self_proc_link_keys,
         table_alias='self',
         limit=limit,
+        id_range=self_id_range,
     )
     target_query_builder = TransactionDataProcLinkQueryBuilder(
         target_trans_data,
         target_proc_link_keys,
         table_alias='target',
         limit=limit,
+        id_range=target_id_range,
     )
-    return self_query_builder.build_count_query(target_query_builder)
+    excluded_query_builder = None
+    if excluded_target_id_range is not None:
+        excluded_query_builder = TransactionDataProcLinkQueryBuilder(
+            target_trans_data,
+            target_proc_link_keys,
+            table_alias='excluded_target',
+            limit=limit,
+            id_range=excluded_target_id_range,
+        )
+    return self_query_builder.build_count_query(target_query_builder, excluded=excluded_query_builder)
 
 
 def is_has_condition(proc_id, dict_cond_procs):
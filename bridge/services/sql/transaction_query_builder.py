@@ -141,6 +141,14 @@ class TransactionDataQueryBuilder:
         time_col = self.table_column(self.trans_model.getdate_column.bridge_column_name)
         self.where_clauses.append(sa.and_(time_col >= start_tm, time_col < end_tm))
 
+    def id_range(self, *, after_id: Optional[int] = None, until_id: Optional[int] = None) -> None:
+        """Rows of after_id < id <= until_id, no bound if None"""
+        id_col = self.table_column(TransactionData.id_col_name)
+        if after_id is not None:
+            self.where_clauses.append(id_col > after_id)
+        if until_id is not None:
+            self.where_clauses.append(id_col <= until_id)
+
     def build(self, limit: Optional[int] = None) -> Select:
         stmt = sa.select(self.selected_columns)
         if self.join_conditions is not None:
@@ -168,9 +176,12 @@ class TransactionDataProcLinkQueryBuilder:
         proc_link_keys: list[SqlProcLinkKey],
         table_alias: Optional[str] = None,
         limit: Optional[int] = None,
+        id_range: Optional[tuple[Optional[int], Optional[int]]] = None,
     ) -> None:
         self.trans_model = trans_model
         self.proc_link_keys = proc_link_keys
+        # (after_id, until_id): only rows of after_id < id <= until_id are linked
+        self.id_range = id_range
         if table_alias is not None:
             self.table_alias = table_alias
         else:
@@ -193,6 +204,9 @@ class TransactionDataProcLinkQueryBuilder:
                     data_group_type=DataGroupType(cfg_col.column_type),
                     master_id_column=cfg_col.master_data_column_id_label(),
                 )
+        if self.id_range is not None:
+            after_id, until_id = self.id_range
+            query_builder.id_range(after_id=after_id, until_id=until_id)
         stmt = query_builder.build(self.limit)
         self.cte = stmt.cte(self.table_alias)
         return self
@@ -244,7 +258,13 @@ class TransactionDataProcLinkQueryBuilder:
 
         return comparisons
 
-    def build_count_query(self, other: Self) -> Select:
+    def build_count_query(self, other: Self, excluded: Optional[Self] = None) -> Select:
+        """
+        Count rows of self linked with `other`
+        :param other:
+        :param excluded: rows of self linked with `excluded` are not counted
+        :return:
+        """
         if self.cte is None:
             self.build_proc_link_cte()
         if other.cte is None:
@@ -252,4 +272,11 @@ class TransactionDataProcLinkQueryBuilder:
         comparisons = self.make_link_comparison(other)
         exists_stmt = sa.exists([1]).where(sa.and_(*comparisons))
         count_stmt = sa.select([sa.func.count()]).select_from(self.cte)
-        return count_stmt.where(exists_stmt)
+        count_stmt = count_stmt.where(exists_stmt)
+        if excluded is not None:
+            if excluded.cte is None:
+                excluded.build_proc_link_cte()
+            excluded_stmt = sa.exists([1]).where(sa.and_(*self.make_link_comparison(excluded)))
+            count_stmt = count_stmt.where(~excluded_stmt)
+
+        return count_stmt
@@ -1,17 +1,20 @@
 import pickle
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from pandas import DataFrame
 
 from ap.common.common_utils import split_grpc_limitation, split_grpc_limitation_for_archived_cycle
-from ap.common.constants import COLS, FETCH_MANY_SIZE, ROWS, DataType, JobType
+from ap.common.constants import COLS, FETCH_MANY_SIZE, ROWS, SYNC_TRANSACTION_CHUNK_ROWS, DataType, JobType
 from ap.common.logger import log_execution_time
 from ap.common.pydn.dblib.db_common import SqlComparisonOperator
-from ap.common.pydn.dblib.postgresql import PostgreSQL
+from ap.common.pydn.dblib.postgresql import NULLABLE_TYPES_MAPPER, PostgreSQL
 from bridge.models.archived_cycle import ArchivedCycle
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.models.t_csv_import import CsvImport
 from bridge.models.t_factory_import import FactoryImport
 from bridge.models.t_job_management import JobManagement
 from bridge.models.t_process import Process
+from bridge.models.transaction_model import TransactionData
 from grpc_server.services.grpc_service_proxy import grpc_api_stream
 
 # (factory_imports:List[FactoryImport], cnt_imported_records:int, from_date:datetime, to_date:datetime)
@@ -36,14 +39,45 @@ def get_sync_order_table_name():
 
 
 @log_execution_time('get_transaction_data_by_range')
-def get_transaction_data_by_range(db_instance: PostgreSQL, t_proc_id, from_cycle, to_cycle):
-    outputs = []
-    for model_cls in ():
-        cols, rows = get_records_from_t_data(db_instance, t_proc_id, from_cycle, to_cycle, model_cls)
-        if rows:
-            outputs.append((model_cls, cols, rows))
+def get_transaction_data_by_range(db_instance: PostgreSQL, t_proc_id, from_cycle, to_cycle) -> Optional[DataFrame]:
+    """
+    Rows of transaction table of process whose cycle id is in (from_cycle, to_cycle], ordered by cycle id
+    :param from_cycle: None: from the first cycle
+    """
+    transaction_data = TransactionData(t_proc_id, db_instance)
+    if not transaction_data.is_table_exist(db_instance):
+        return None
 
-    return outputs
+    id_col = transaction_data.id_col_name
+    param_marker = BridgeStationModel.get_parameter_marker()
+    conditions = [f'{id_col} <= {param_marker}']
+    params = [to_cycle]
+    if from_cycle is not None:
+        conditions.append(f'{id_col} > {param_marker}')
+        params.append(from_cycle)
+
+    sql = f'SELECT * FROM {transaction_data.table_name} WHERE {" AND ".join(conditions)} ORDER BY {id_col}'
+    # nullable dtypes keep integer/boolean columns exact through arrow and COPY on edge server
+    return db_instance.run_sql_to_frame(sql, params=params, types_mapper=NULLABLE_TYPES_MAPPER)
+
+
+def split_factory_imports(factory_imports: List[FactoryImport], max_rows=SYNC_TRANSACTION_CHUNK_ROWS):
+    """
+    Group factory imports (ordered by imported_cycle_id) by about `max_rows` imported rows.
+    Transaction data of a group is synced and committed with its factory imports, edge server resumes after it.
+    """
+    chunk = []
+    cnt = 0
+    for factory_import in factory_imports:
+        chunk.append(factory_import)
+        cnt += factory_import.imported_row or 0
+        if cnt >= max_rows:
+            yield chunk
+            chunk = []
+            cnt = 0
+
+    if chunk:
+        yield chunk
 
 
 def get_import_metadata(db_instance, cfg_proc_id, request_from=None):
@@ -175,6 +209,13 @@ def build_grpc_response_msg(t_proc_id, column_names, data_type, imported_records
     return response
 
 
+def gen_frame_response(t_proc_id, data_type, df: DataFrame, imported_records=0, last_cycle_id=False):
+    """
+    DataFrame is sent as is, gRPC proxy encodes it as compressed arrow ipc and streams it in chunks
+    """
+    yield t_proc_id, list(df.columns), data_type, imported_records, last_cycle_id, df
+
+
 def gen_response(
     t_proc_id,
     column_names,
@@ -8,13 +8,29 @@ from sqlalchemy.pool import NullPool
 from ap import get_basic_yaml_obj, get_start_up_yaml_obj
 from ap.common.common_utils import resource_path
 from ap.common.constants import (
+    CSV_READ_MAX_MEMORY,
+    CSV_READ_MAX_MEMORY_ENV,
+    CSV_READ_MAX_WORKERS,
+    CSV_READ_WORKERS_ENV,
     DATABASE_HOST_ENV,
     DATABASE_NAME_ENV,
     DATABASE_PASSWORD_ENV,
+    DATABASE_POOL_SIZE_ENV,
     DATABASE_PORT_ENV,
     DATABASE_USERNAME_ENV,
+    DB_POOL_MAX_SIZE,
     DEFAULT_POSTGRES_SCHEMA,
+    PENALTY_PATH_MAX_WORKERS,
+    PENALTY_PATH_WORKERS_ENV,
+    PERSIST_FUNCTION_COLUMNS,
+    PERSIST_FUNCTION_COLUMNS_ENV,
+    PULL_DB_CHUNK_MEMORY,
+    PULL_DB_CHUNK_MEMORY_ENV,
     SCHEDULER_PROCESS_POOL_SIZE,
+    SYNC_TRANSACTION_DATA,
+    SYNC_TRANSACTION_DATA_ENV,
+    SYNC_TRANSACTION_MAX_WORKERS,
+    SYNC_TRANSACTION_WORKERS_ENV,
 )
 from ap.common.logger import logger
 
@@ -40,6 +56,95 @@ def get_db_mode(file_name=None) -> DbMode:
     return DbMode(dbname, host, port, username, password)
 
 
+def get_db_pool_size(file_name=None) -> int:
+    """
+    Max number of pooled connections to Bridge Station database (per process)
+    :return:
+    """
+    start_up_yaml = get_start_up_yaml_obj()
+    basic_config_yaml = get_basic_yaml_obj(file_name)
+
+    pool_size = (
+        os.environ.get(DATABASE_POOL_SIZE_ENV)
+        or start_up_yaml.get_db_pool_size()
+        or basic_config_yaml.get_db_pool_size()
+    )
+
+    return int(pool_size) if pool_size else DB_POOL_MAX_SIZE
+
+
+def get_csv_read_workers() -> int:
+    """
+    Number of worker processes reading csv files in parallel when pulling csv data. 1 means no worker process
+    :return:
+    """
+    workers = os.environ.get(CSV_READ_WORKERS_ENV)
+    workers = int(workers) if workers else min(CSV_READ_MAX_WORKERS, os.cpu_count() or 1)
+    return max(workers, 1)
+
+
+def get_penalty_path_workers() -> int:
+    """
+    Number of worker processes fitting penalty factors of (group) lasso in parallel. 1 means no worker
+    :return:
+    """
+    workers = os.environ.get(PENALTY_PATH_WORKERS_ENV)
+    workers = int(workers) if workers else min(PENALTY_PATH_MAX_WORKERS, os.cpu_count() or 1)
+    return max(workers, 1)
+
+
+def get_sync_transaction_workers() -> int:
+    """
+    Number of processes whose transaction data is synced from bridge station at the same time
+    :return:
+    """
+    workers = os.environ.get(SYNC_TRANSACTION_WORKERS_ENV)
+    workers = int(workers) if workers else SYNC_TRANSACTION_MAX_WORKERS
+    return max(workers, 1)
+
+
+def is_sync_transaction_data() -> bool:
+    """
+    Copy transaction rows from bridge station to edge server in transaction sync, only factory imports are synced if off
+    :return:
+    """
+    is_sync = os.environ.get(SYNC_TRANSACTION_DATA_ENV)
+    if is_sync is not None and is_sync != '':
+        return is_sync.lower() == str(True).lower()
+
+    return SYNC_TRANSACTION_DATA
+
+
+def get_csv_read_max_memory() -> int:
+    """
+    Max estimated memory (bytes) of csv files being read ahead by worker processes
+    :return:
+    """
+    max_memory = os.environ.get(CSV_READ_MAX_MEMORY_ENV)
+    return int(max_memory) if max_memory else CSV_READ_MAX_MEMORY
+
+
+def get_pull_db_chunk_memory() -> int:
+    """
+    Max estimated memory (bytes) of one chunk of factory data processed at a time when pulling db data
+    :return:
+    """
+    chunk_memory = os.environ.get(PULL_DB_CHUNK_MEMORY_ENV)
+    return int(chunk_memory) if chunk_memory else PULL_DB_CHUNK_MEMORY
+
+
+def is_persist_function_columns() -> bool:
+    """
+    Store values of function columns in transaction tables at import time, graphs read them instead of evaluating
+    :return:
+    """
+    persist = os.environ.get(PERSIST_FUNCTION_COLUMNS_ENV)
+    if persist is not None and persist != '':
+        return persist.lower() == str(True).lower()
+
+    return PERSIST_FUNCTION_COLUMNS
+
+
 def get_current_mode_db_url(file_name=None):
     """
     Bridge Station database
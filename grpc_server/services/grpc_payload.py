@@ -0,0 +1,104 @@
+import pickle
+from typing import Any, Iterable, Iterator, List
+
+from ap.common.cache_codec import COLUMNAR_CACHE_MAGIC, decode_cache_bytes, encode_cache_value
+from ap.common.constants import (
+    GRPC_RESULT_CHUNK_SIZE,
+    GRPC_RESULT_ENCODING_COLUMNAR,
+    GRPC_RESULT_ENCODING_KEY,
+    GRPC_RESULT_MODE_KEY,
+    GRPC_RESULT_MODE_VALUE,
+)
+
+# first byte of a streamed columnar message: more chunks of the same value follow, or the value is complete
+CHUNK_MORE = b'\x00'
+CHUNK_LAST = b'\x01'
+
+# metadata of a client that reads columnar results
+COLUMNAR_METADATA = ((GRPC_RESULT_ENCODING_KEY, GRPC_RESULT_ENCODING_COLUMNAR),)
+# metadata of a client that calls a unary function via stream method
+COLUMNAR_VALUE_METADATA = COLUMNAR_METADATA + ((GRPC_RESULT_MODE_KEY, GRPC_RESULT_MODE_VALUE),)
+
+
+def get_metadata_value(metadata, key):
+    for metadata_key, value in metadata or ():
+        if metadata_key == key:
+            return value
+
+    return None
+
+
+def is_columnar_metadata(metadata) -> bool:
+    """
+    Old clients send no metadata and read pickled results only
+    """
+    return get_metadata_value(metadata, GRPC_RESULT_ENCODING_KEY) == GRPC_RESULT_ENCODING_COLUMNAR
+
+
+def is_value_mode_metadata(metadata) -> bool:
+    return get_metadata_value(metadata, GRPC_RESULT_MODE_KEY) == GRPC_RESULT_MODE_VALUE
+
+
+def is_columnar_payload(data: bytes) -> bool:
+    """
+    Arrow ipc payload (its buffers are LZ4 compressed already, gzip on top only costs cpu) or pickled one
+    """
+    return data[: len(COLUMNAR_CACHE_MAGIC)] == COLUMNAR_CACHE_MAGIC
+
+
+def encode_result(value) -> bytes:
+    """
+    Encode a result as one payload. DataFrames are arrow ipc, the rest is pickled (see encode_cache_value)
+    """
+    chunks, _ = encode_cache_value(value, is_columnar=True)
+    return b''.join(chunks)
+
+
+def decode_result(data: bytes) -> Any:
+    """
+    Decode a columnar or pickled payload, pickled payloads are sent by old bridge stations
+    """
+    return decode_cache_bytes(data)
+
+
+def iter_result_chunks(value, chunk_size=GRPC_RESULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Split encoded value into messages of at most `chunk_size` bytes (plus a flag byte)
+    Arrow buffers are sliced without joining them into one bytes object first.
+    """
+    chunks, _ = encode_cache_value(value, is_columnar=True)
+    pieces: List[memoryview] = []
+    for chunk in chunks:
+        view = memoryview(chunk)
+        pieces.extend(view[start : start + chunk_size] for start in range(0, len(view), chunk_size))
+
+    # small pieces (header, sidecar) are merged into the next message
+    buffer = bytearray()
+    for idx, piece in enumerate(pieces):
+        if buffer and len(buffer) + len(piece) > chunk_size:
+            yield CHUNK_MORE + bytes(buffer)
+            buffer.clear()
+
+        buffer += piece
+        if idx == len(pieces) - 1:
+            yield CHUNK_LAST + bytes(buffer)
+
+
+def iter_results(payloads: Iterable[bytes], is_columnar: bool) -> Iterator[Any]:
+    """
+    Reassemble values from streamed messages
+    :param is_columnar: False: each message is one pickled value (old bridge station)
+    """
+    if not is_columnar:
+        for payload in payloads:
+            yield pickle.loads(payload)
+        return
+
+    pieces: List[bytes] = []
+    for payload in payloads:
+        flag, piece = payload[:1], payload[1:]
+        pieces.append(piece)
+        if flag == CHUNK_LAST:
+            yield decode_result(b''.join(pieces))
+            pieces = []
+
@@ -1,5 +1,8 @@
+import contextlib
 import inspect
+import os
 import pickle
+import threading
 from functools import wraps
 from inspect import signature
 
@@ -8,9 +11,22 @@ from grpc._channel import _InactiveRpcError
 
 from ap import get_basic_yaml_obj
 from ap.common.common_utils import end_of_minute, start_of_minute
-from ap.common.constants import GRPCResponseStatus, ServerType
+from ap.common.constants import (
+    GRPC_KEEPALIVE_TIME_MS,
+    GRPC_KEEPALIVE_TIMEOUT_MS,
+    GRPC_MAX_MESSAGE_LENGTH,
+    GRPCResponseStatus,
+    ServerType,
+)
 from ap.common.logger import logger
 from bridge.common.server_config import ServerConfig
+from grpc_server.services.grpc_payload import (
+    COLUMNAR_METADATA,
+    COLUMNAR_VALUE_METADATA,
+    decode_result,
+    is_columnar_metadata,
+    iter_results,
+)
 from grpc_src.connection.services_pb2_grpc import ConnectionStub
 from grpc_src.models.common_pb2 import GenericRequestParams
 from grpc_src.models.connection_pb2 import RequestCheckConnection
@@ -62,20 +78,29 @@ def grpc_api(stub_class=None, method_name=None, show_graph=False):
             request_msg = GenericRequestParams(method=fn_fully_qualname, binParams=pickle.dumps(request_content))
             # see GenericGrpcMethod
             _cls = stub_class or SettingStub
-            _method = method_name or SettingServicer.GenericGrpcMethod.__name__
             try:
                 with get_grpc_channel() as channel:
                     stub_instance = _cls(channel)
-                    method = getattr(stub_instance, _method)
-                    response = method(request_msg)
+                    if show_graph and not method_name:
+                        # graph data can be large, it comes back in chunks instead of one message
+                        responses = stub_instance.GenericGrpcMethodStream(
+                            request_msg,
+                            metadata=COLUMNAR_VALUE_METADATA,
+                        )
+                        if is_columnar_metadata(responses.initial_metadata()):
+                            return next(iter_results((res.binResponse for res in responses), is_columnar=True))
+
+                        # old bridge station iterates the result instead of sending it (graph queries are read only)
+                        responses.cancel()
+
+                    method = getattr(stub_instance, method_name or SettingServicer.GenericGrpcMethod.__name__)
+                    response = method(request_msg, metadata=COLUMNAR_METADATA)
+                    return decode_result(response.binResponse)
             except _InactiveRpcError as e:
                 logger.error('Error Occurred on Bridge Station')
                 logger.error(e.details())
                 raise e
 
-            result = pickle.loads(response.binResponse)
-            return result
-
         return wrapper
 
     return decorator
@@ -109,9 +134,9 @@ def grpc_api_stream(stub_class=None, method_name=None):
                 with get_grpc_channel() as channel:
                     stub_instance = _cls(channel)
                     method = getattr(stub_instance, _method)
-                    response = method(request_msg)
-                    for res in response:
-                        yield pickle.loads(res.binResponse)
+                    responses = method(request_msg, metadata=COLUMNAR_METADATA)
+                    is_columnar = is_columnar_metadata(responses.initial_metadata())
+                    yield from iter_results((res.binResponse for res in responses), is_columnar)
 
         return wrapper
 
@@ -209,10 +234,87 @@ def check_connection_to_server():
     return bridge_connection_status
 
 
-def get_grpc_channel():
+class GrpcChannelPool:
+    """
+    Long-lived channel to bridge station shared by all calls of a process.
+    Channel keeps its connection alive by pings and is re-created when bridge station address changes,
+    connection fails or the process is forked (grpc channels can not be used across fork).
+    """
+
+    UNHEALTHY_STATES = (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channel = None
+        self.url = None
+        self.pid = None
+        self.state = None
+
+    def get(self, url) -> grpc.Channel:
+        with self.lock:
+            is_healthy = self.state not in self.UNHEALTHY_STATES
+            if self.channel is not None and self.url == url and self.pid == os.getpid() and is_healthy:
+                return self.channel
+
+            if self.pid == os.getpid():
+                self._close()
+
+            channel = grpc.insecure_channel(
+                url,
+                options=[
+                    ('grpc.max_send_message_length', GRPC_MAX_MESSAGE_LENGTH),
+                    ('grpc.max_receive_message_length', GRPC_MAX_MESSAGE_LENGTH),
+                    ('grpc.keepalive_time_ms', GRPC_KEEPALIVE_TIME_MS),
+                    ('grpc.keepalive_timeout_ms', GRPC_KEEPALIVE_TIMEOUT_MS),
+                    ('grpc.keepalive_permit_without_calls', 1),
+                    ('grpc.http2.max_pings_without_data', 0),
+                ],
+                # pickled requests / responses, arrow results are not compressed again by server
+                compression=grpc.Compression.Gzip,
+            )
+            self.channel, self.url, self.pid, self.state = channel, url, os.getpid(), None
+            channel.subscribe(lambda state: self._on_state_change(channel, state))
+            return channel
+
+    def _on_state_change(self, channel, state):
+        with self.lock:
+            if channel is self.channel:
+                self.state = state
+
+    def reset(self, channel):
+        """
+        Drop a failed channel, next call connects again
+        """
+        with self.lock:
+            if channel is self.channel:
+                self._close()
+
+    def _close(self):
+        if self.channel is not None:
+            self.channel.close()
+        self.channel, self.url, self.pid, self.state = None, None, None, None
+
+
+grpc_channel_pool = GrpcChannelPool()
+
+
+def get_bridge_station_url():
     # Basic yaml config information ( bridge station host, port ...)
     basic_yaml = get_basic_yaml_obj()
     bridge_station_host = basic_yaml.get_bridge_station_host()
     bridge_station_port = basic_yaml.get_bridge_station_port()
-    bridge_station_url = f'{bridge_station_host}:{bridge_station_port}'
-    return grpc.insecure_channel(bridge_station_url)
+    return f'{bridge_station_host}:{bridge_station_port}'
+
+
+@contextlib.contextmanager
+def get_grpc_channel():
+    """
+    Pooled channel to bridge station, it is not closed after the block
+    """
+    channel = grpc_channel_pool.get(get_bridge_station_url())
+    try:
+        yield channel
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.UNAVAILABLE:
+            grpc_channel_pool.reset(channel)
+        raise e
@@ -1,4 +1,14 @@
+from typing import Iterable
+
+import pandas as pd
+from pandas import DataFrame
+
+from ap.common.logger import log_execution_time, logger
+from ap.common.pydn.dblib.postgresql import PostgreSQL
+from ap.setting_module.models import CfgProcess
 from bridge.models.bridge_station import BridgeStationModel
+from bridge.models.transaction_model import TransactionData
+from bridge.services.transaction_data_import import gen_transaction_partition_table
 
 
 def bulk_insert_sync_data(db_instance, table_name, cols, rows):
@@ -20,8 +30,69 @@ def bulk_insert_sync_data(db_instance, table_name, cols, rows):
     #     if is_exist:
     #         return False
 
-    db_instance.bulk_insert(table_name, cols, rows)
+    if isinstance(db_instance, PostgreSQL):
+        # keep python values as they are (object), same as inserting rows by execute_values
+        db_instance.bulk_copy(table_name, pd.DataFrame(rows, columns=cols, dtype='object'))
+    else:
+        db_instance.bulk_insert(table_name, cols, rows)
+
+    return True
+
+
+@log_execution_time()
+def import_sync_transaction_data(db_instance: PostgreSQL, process_id, df: DataFrame) -> int:
+    """
+    Insert a chunk of transaction rows synced from bridge station by COPY, cycle ids (`id`) of bridge station are kept.
+    Rows in id range of the chunk are deleted first, a chunk committed before its checkpoint can be synced again.
+    :param df: rows of bridge station's transaction table of process, ordered by id
+    :return: number of inserted rows
+    """
+    if df is None or df.empty:
+        return 0
+
+    transaction_data = TransactionData(process_id)
+    table_name = transaction_data.create_table(db_instance)
+    table_columns = db_instance.list_table_colnames(table_name)
+    # columns that edge server does not have (yet) are not synced
+    df = df[[col for col in df.columns if col in table_columns]]
+
+    time_col = transaction_data.getdate_column.bridge_column_name
+    gen_transaction_partition_table(db_instance, df, transaction_data, time_col)
+
+    id_col = transaction_data.id_col_name
+    min_id, max_id = int(df[id_col].min()), int(df[id_col].max())
+    param_marker = BridgeStationModel.get_parameter_marker()
+    sql = f'DELETE FROM {table_name} WHERE {id_col} >= {param_marker} AND {id_col} <= {param_marker}'
+    db_instance.execute_sql(sql, params=(min_id, max_id))
+    inserted_rows = db_instance.bulk_copy(table_name, df)
+
+    # keep sequence ahead of synced ids
+    sequence_name = f'{table_name}_id_seq'
+    sql = f"SELECT setval('{sequence_name}', GREATEST(last_value, {param_marker})) FROM {sequence_name}"
+    db_instance.execute_sql(sql, params=(max_id,))
+
+    return inserted_rows
+
+
+def delete_transaction_cycles(db_instance: PostgreSQL, process_id, cycle_ids: Iterable[int]) -> bool:
+    """
+    Delete rows of cycle ids from transaction table of process by one statement
+    """
+    cycle_ids = sorted({int(cycle_id) for cycle_id in cycle_ids})
+    if not cycle_ids:
+        return False
+
+    cfg_process = CfgProcess.get_by_id(process_id)
+    if not cfg_process or not cfg_process.table_name:
+        logger.info(f'[SYNC] process {process_id} does not exist, archived cycles are skipped')
+        return False
+
+    if cfg_process.table_name not in db_instance.list_tables():
+        return False
 
+    param_marker = BridgeStationModel.get_parameter_marker()
+    sql = f'DELETE FROM {cfg_process.table_name} WHERE {TransactionData.id_col_name} = ANY({param_marker})'
+    db_instance.execute_sql(sql, params=(cycle_ids,))
     return True
 
 
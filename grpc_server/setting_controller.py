@@ -1,12 +1,22 @@
 import importlib
 import pickle
 
+import grpc
+
 from ap.common.constants import GRPCResponseStatus
 from ap.common.logger import logger
 from bridge.common.disk_usage import get_disk_capacity
 from bridge.services.data_import import check_db_con
 from bridge.services.decorators import api_middleware, api_middleware_stream
 from bridge.services.process_config import query_database_tables
+from grpc_server.services.grpc_payload import (
+    COLUMNAR_METADATA,
+    encode_result,
+    is_columnar_metadata,
+    is_columnar_payload,
+    is_value_mode_metadata,
+    iter_result_chunks,
+)
 from grpc_src.models.common_pb2 import GenericRequestParams, GenericResponse
 from grpc_src.models.setting_pb2 import (
     GetDataBaseTableRequest,
@@ -93,6 +103,13 @@ class SettingController(SettingServicer):
         if 'db_instance' in params:
             params['db_instance'] = context.db_instance
         response_content = fn(**params)
+        if is_columnar_metadata(context.invocation_metadata()):
+            payload = encode_result(response_content)
+            if is_columnar_payload(payload):
+                # server compresses pickled responses only
+                context.set_compression(grpc.Compression.NoCompression)
+            return GenericResponse(binResponse=payload)
+
         return GenericResponse(binResponse=pickle.dumps(response_content))
 
     @api_middleware_stream()
@@ -113,6 +130,23 @@ class SettingController(SettingServicer):
         params = pickle.loads(request.binParams)
         if 'db_instance' in params:
             params['db_instance'] = context.db_instance
-        response_content = fn(**params)
+        metadata = context.invocation_metadata()
+        if not is_columnar_metadata(metadata):
+            for response in fn(**params):
+                yield GenericResponse(binResponse=pickle.dumps(response))
+            return
+
+        # tell client that messages are columnar chunks, old bridge stations send pickled messages without this
+        context.send_initial_metadata(COLUMNAR_METADATA)
+        # grpc_api: whole return value of a unary function, grpc_api_stream: each yielded value
+        response_content = [fn(**params)] if is_value_mode_metadata(metadata) else fn(**params)
         for response in response_content:
-            yield GenericResponse(binResponse=pickle.dumps(response))
+            is_columnar = None
+            for chunk in iter_result_chunks(response):
+                if is_columnar is None:
+                    # first message of a value starts with its header (after flag byte)
+                    is_columnar = is_columnar_payload(chunk[1:])
+                if is_columnar:
+                    # server compresses pickled messages only
+                    context.disable_next_message_compression()
+                yield GenericResponse(binResponse=chunk)
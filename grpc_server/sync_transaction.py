@@ -8,7 +8,7 @@ from apscheduler.triggers.date import DateTrigger
 from pytz import utc
 
 from ap import scheduler
-from ap.common.common_utils import chunks, get_current_timestamp
+from ap.common.common_utils import get_current_timestamp
 from ap.common.constants import COLS, REQUEST_MAX_TRIED, ROWS, JobType
 from ap.common.logger import log_execution_time
 from ap.common.scheduler import scheduler_app_context
@@ -16,13 +16,22 @@ from ap.setting_module.models import CfgProcess, CfgTrace, FactoryImport, make_s
 from ap.setting_module.services.background_process import JobInfo, send_processing_info
 from bridge.models.bridge_station import BridgeStationModel
 from bridge.services.sync_transaction_data import (
+    TRANSACTION_DATA,
+    gen_frame_response,
     gen_response,
     get_archived_cycle,
     get_import_metadata,
+    get_transaction_data_by_range,
+    split_factory_imports,
 )
+from config import is_sync_transaction_data
 from grpc_server.connection import check_connection_to_server
 from grpc_server.services.grpc_service_proxy import grpc_api_stream
-from grpc_server.services.import_transaction_data import bulk_insert_sync_data
+from grpc_server.services.import_transaction_data import (
+    bulk_insert_sync_data,
+    delete_transaction_cycles,
+    import_sync_transaction_data,
+)
 
 
 def sync_transaction_jobs():
@@ -68,63 +77,69 @@ def request_transaction_data(process_id, number_of_try_if_failed=1):
     job_info = JobInfo()
     yield job_info
 
-    # sync_order_table_name = get_sync_order_table_name()
-    # request grpc
-    with BridgeStationModel.get_db_proxy() as db_instance:
-        last_import = FactoryImport.get_last_import(process_id, JobType.TRANSACTION_IMPORT.name, only_synced=True)
-        request_from = last_import.imported_cycle_id if last_import else None
-        response_stream = SyncBridgeToEdge(process_id, request_from)
-        _imported_records = None
-        is_end = None
-        job_ids = []
-        for (
-            t_proc_id,
-            column_names,
-            data_type,
-            imported_records,
-            last_cycle_id,
-            data,
-        ) in response_stream:
-            if job_info.percent < 97:
-                job_info.percent += 3
-            data = pickle.loads(data)
-            if not data:
-                continue
-            if not imported_records:
-                _imported_records = imported_records
-            if data_type == FactoryImport.get_original_table_name():
-                with make_session() as meta_session:
-                    row = data[0]
-                    if isinstance(row, dict):
-                        cols = list(row)
-                        rows = [list(dic_row.values()) for dic_row in data]
-                    if isinstance(row, BridgeStationModel):
-                        cols = row.Columns.get_column_names()
-                        rows = [row.convert_to_list_of_values() for row in data]
-                    FactoryImport.insert_records(cols, rows, meta_session)
-            else:
-                bulk_insert_sync_data(db_instance, data_type, column_names, data)
-
-            if data_type == FactoryImport.get_original_table_name():
-                job_ids.extend([row.job_id for row in data])
-                if last_cycle_id > data[-1].imported_cycle_id:
-                    is_end = False  # continue request if last_cycle_id is not FactoryImport.imported_cycle_id
+    # resume after the last chunk whose factory imports were committed
+    last_import = FactoryImport.get_last_import(process_id, JobType.TRANSACTION_IMPORT.name, only_synced=True)
+    request_from = last_import.imported_cycle_id if last_import else None
+    response_stream = SyncBridgeToEdge(process_id, request_from)
+    is_end = None
+    job_ids = []
+    for (
+        t_proc_id,
+        column_names,
+        data_type,
+        imported_records,
+        last_cycle_id,
+        data,
+    ) in response_stream:
+        if job_info.percent < 97:
+            job_info.percent += 3
+
+        if data_type == TRANSACTION_DATA:
+            # a chunk of transaction data is committed before its factory imports (checkpoint) are received
+            with BridgeStationModel.get_db_proxy() as db_instance:
+                import_sync_transaction_data(db_instance, process_id, data)
 
             yield job_info
+            continue
+
+        data = pickle.loads(data)
+        if not data:
+            continue
+
+        if data_type == FactoryImport.get_original_table_name():
+            with make_session() as meta_session:
+                row = data[0]
+                if isinstance(row, dict):
+                    cols = list(row)
+                    rows = [list(dic_row.values()) for dic_row in data]
+                if isinstance(row, BridgeStationModel):
+                    cols = row.Columns.get_column_names()
+                    rows = [row.convert_to_list_of_values() for row in data]
+                FactoryImport.insert_records(cols, rows, meta_session)
+
+            job_ids.extend([row.job_id for row in data])
+            if last_cycle_id > data[-1].imported_cycle_id:
+                is_end = False  # continue request if last_cycle_id is not FactoryImport.imported_cycle_id
+        else:
+            with BridgeStationModel.get_db_proxy() as db_instance:
+                bulk_insert_sync_data(db_instance, data_type, column_names, data)
 
-        # sync expired cycles
-        chunk_cycles = []
-        if job_ids:
-            chunk_cycles = get_archived_cycle(job_ids)
+        yield job_info
 
-        cols = []
-        rows = []
-        for dic_archived_cycles in chunk_cycles:
-            cols = dic_archived_cycles.get(COLS, [])
-            rows.extend(dic_archived_cycles.get(ROWS, []))
+    # sync expired cycles
+    chunk_cycles = []
+    if job_ids:
+        chunk_cycles = get_archived_cycle(job_ids)
 
-        # delete archived cycle ids
-        if cols and rows:
+    cols = []
+    rows = []
+    for dic_archived_cycles in chunk_cycles:
+        cols = dic_archived_cycles.get(COLS, [])
+        rows.extend(dic_archived_cycles.get(ROWS, []))
+
+    # delete archived cycle ids, only from transaction rows copied by sync
+    if cols and rows and is_sync_transaction_data():
+        with BridgeStationModel.get_db_proxy() as db_instance:
             delete_archived_cycles(db_instance, cols, rows)
 
     yield job_info
@@ -134,7 +149,7 @@ def request_transaction_data(process_id, number_of_try_if_failed=1):
 
 def delete_archived_cycles(db_instance, columns, rows):
     """
-    delete archived transaction cycle_ids
+    delete archived transaction cycle_ids, one statement per process
     :param db_instance:
     :param columns:
     :param rows:
@@ -143,20 +158,13 @@ def delete_archived_cycles(db_instance, columns, rows):
     if not columns or not rows:
         return
 
-    dic_cycles = defaultdict(list)
-    dic_updated_at = defaultdict(list)
-    for proc_id, cycle_ids, updated_at in rows:
+    dic_cycles = defaultdict(set)
+    for proc_id, cycle_ids, _ in rows:
         cycle_ids = pickle.loads(codecs.decode(cycle_ids.encode(), 'base64'))
-        dic_cycles[proc_id].extend(cycle_ids)
-        dic_updated_at[proc_id].append(updated_at)
+        dic_cycles[proc_id].update(cycle_ids)
 
     for proc_id, cycle_ids in dic_cycles.items():
-        data_types = []
-        for cls in data_types:
-            for _cycle_ids in chunks(cycle_ids, 32_000):
-                # TODO: add column to archived table to delete faster
-                sql, params = cls.get_delete_cycles_sql(proc_id, _cycle_ids)  # TODO:performance add start_tm and end_tm
-                db_instance.execute_sql(sql, params=params)
+        delete_transaction_cycles(db_instance, proc_id, cycle_ids)
 
     return True
 
@@ -277,10 +285,10 @@ def request_for_proclink(self_process_id, target_process_id, is_reset=None, numb
 
 @grpc_api_stream()
 def SyncBridgeToEdge(process_id, request_from):
-    # NOTE: Returning order is DaiJi. Please make sure you adapt consumer method when you change order
-    # Order: ColumnGroup, DataInt, DataFloat, DataDatetime, DataText, JobManagement, CsvImport, FactoryImport
-    # This part [Process, ColumnGroup, DataInt, DataFloat, DataDatetime, DataText] is one group to commit
-    # This part [JobManagement, CsvImport, FactoryImport] is one group to commit
+    # NOTE: Consumer is request_transaction_data. Please make sure you adapt it when you change order
+    # Per chunk of factory imports: transaction data of its cycle range (DataFrame), then its factory imports.
+    # Edge server commits transaction data of a chunk first, its factory imports are the checkpoint to resume from
+    # Transaction data is sent only if is_sync_transaction_data (off by default), otherwise only factory imports
 
     cfg_proc_id = process_id
     with BridgeStationModel.get_db_proxy() as db_instance:
@@ -294,40 +302,29 @@ def SyncBridgeToEdge(process_id, request_from):
             cnt_imported_records,
             last_cycle_id,
             from_cycle,
-            to_cycle,
+            _,
         ) = meta_data  # unpack tuple
-        # get transaction data
-        trans_tuples = None  # get_transaction_data_by_range(db_instance, cfg_proc_id, from_cycle, to_cycle)
-        if trans_tuples:
-            # send column group first
-            col_groups = []  # ColumnGroup.get_column_groups_by_process_id(db_instance, cfg_proc_id)
-            response = gen_response(
-                cfg_proc_id, None, 't_column_group', col_groups, cnt_imported_records, last_cycle_id
+        for chunk_factory_imports in split_factory_imports(factory_imports):
+            to_cycle = chunk_factory_imports[-1].imported_cycle_id
+            if to_cycle is not None and is_sync_transaction_data():
+                df = get_transaction_data_by_range(db_instance, cfg_proc_id, from_cycle, to_cycle)
+                if df is not None and not df.empty:
+                    yield from gen_frame_response(
+                        cfg_proc_id,
+                        TRANSACTION_DATA,
+                        df,
+                        cnt_imported_records,
+                        last_cycle_id,
+                    )
+                from_cycle = to_cycle
+
+            for factory_import in chunk_factory_imports:
+                factory_import.synced = True
+            yield from gen_response(
+                cfg_proc_id,
+                None,
+                FactoryImport.get_original_table_name(),
+                chunk_factory_imports,
+                cnt_imported_records,
+                last_cycle_id,
             )
-            yield from response
-
-            # send transaction data
-            for model_cls, cols, data_list in trans_tuples:
-                response = gen_response(
-                    cfg_proc_id,
-                    cols,
-                    model_cls.get_original_table_name(),
-                    data_list,
-                    cnt_imported_records,
-                    last_cycle_id,
-                )
-                yield from response
-
-    if factory_imports:
-        for factory_import in factory_imports:
-            factory_import.synced = True
-        response = gen_response(
-            cfg_proc_id,
-            None,
-            FactoryImport.get_original_table_name(),
-            factory_imports,
-            cnt_imported_records,
-            last_cycle_id,
-        )
-
-        yield from response
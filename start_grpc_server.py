@@ -10,6 +10,7 @@ def serve_grpc_server(app: Flask, port: int):
     import grpc
 
     from ap import init_db
+    from ap.common.constants import GRPC_KEEPALIVE_TIME_MS
     from ap.common.logger import logger
     from grpc_server.connection_controller import ConnectionController
     from grpc_src.connection.services_pb2_grpc import add_ConnectionServicer_to_server
@@ -22,7 +23,12 @@ def serve_grpc_server(app: Flask, port: int):
         options=[
             ('grpc.max_send_message_length', MAX_MESSAGE_LENGTH),
             ('grpc.max_receive_message_length', MAX_MESSAGE_LENGTH),
+            # accept keepalive pings of edge servers' long-lived channels
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.min_ping_interval_without_data_ms', GRPC_KEEPALIVE_TIME_MS),
         ],
+        # arrow results are sent without compression, see SettingController
+        compression=grpc.Compression.Gzip,
     )
     host = '0.0.0.0'
     port = port or 8000
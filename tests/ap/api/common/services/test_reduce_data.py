@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ap.api.common.services.show_graph_services import calc_min_med_max_by_group, gen_min_med_max_df
+from ap.common.services.statistics import calc_group_modes, get_mode, mask_infinity_by_group
+
+GROUP_COL = '__group_col__'
+LABEL = 'value'
+ROWS = 1_000
+AGG_METHODS = ['min', 'median', 'max']
+
+
+def gen_group_ids(rows=ROWS, n_groups=50, seed=0):
+    return np.random.default_rng(seed).integers(0, n_groups, rows)
+
+
+def gen_df(values, group_ids):
+    # reduce_data aggregates a DataFrame indexed by group
+    values = np.asarray(values)
+    return pd.DataFrame({LABEL: values}, index=pd.Index(group_ids, name=GROUP_COL), dtype=values.dtype)
+
+
+def old_modes(df):
+    return df.groupby(GROUP_COL).agg(get_mode)[LABEL]
+
+
+def new_modes(df):
+    group_idxs, group_ids = pd.factorize(df.index.values, sort=True)
+    return calc_group_modes(df[LABEL], group_idxs, pd.Index(group_ids, name=GROUP_COL))
+
+
+def new_min_med_max(df):
+    group_idxs, group_ids = pd.factorize(df.index.values, sort=True)
+    masked_values, has_finite = mask_infinity_by_group(df[LABEL].values, group_idxs, len(group_ids))
+    df_aggs = pd.DataFrame({LABEL: masked_values}, index=df.index).groupby(GROUP_COL).agg(AGG_METHODS)
+    return gen_min_med_max_df(df_aggs[LABEL], has_finite)
+
+
+def gen_mode_values(kind, rows=ROWS):
+    rng = np.random.default_rng(1)
+    if kind == 'int':
+        return rng.integers(0, 5, rows)
+    if kind == 'float_nan':
+        values = rng.integers(0, 5, rows).astype(float)
+        values[::3] = np.nan
+        return values
+    if kind == 'bool':
+        return rng.random(rows) > 0.5
+    if kind == 'str_none':
+        values = rng.choice(['line_a', 'line_b', 'line_c'], rows).astype(object)
+        values[::4] = None
+        return values
+    if kind == 'int_float_object':
+        values = rng.integers(0, 3, rows).astype(object)
+        values[::2] = 1.5
+        return values
+    if kind == 'all_none':
+        return np.full(rows, None, dtype=object)
+    if kind == 'many_uniques':
+        # more (group, value) pairs than rows: sparse counting
+        return rng.integers(0, rows, rows)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize(
+    'kind',
+    ['int', 'float_nan', 'bool', 'str_none', 'int_float_object', 'all_none', 'many_uniques'],
+)
+def test_modes_match_groupby_get_mode(kind):
+    df = gen_df(gen_mode_values(kind), gen_group_ids())
+    pd.testing.assert_series_equal(new_modes(df), old_modes(df), check_names=False)
+
+
+def test_mode_ties_take_smallest_value():
+    df = gen_df(np.array(['b', 'a', 'a', 'b', 'c'], dtype=object), [0, 0, 0, 0, 1])
+    pd.testing.assert_series_equal(new_modes(df), old_modes(df), check_names=False)
+    assert new_modes(df).tolist() == ['a', 'c']
+
+
+def gen_min_med_max_values(kind, group_ids):
+    rng = np.random.default_rng(2)
+    values = rng.normal(size=len(group_ids))
+    if kind == 'finite':
+        return values
+    if kind == 'int':
+        return rng.integers(-100, 100, len(group_ids))
+    if kind == 'float32':
+        return values.astype(np.float32)
+    if kind == 'mixed':
+        # groups with finite values and inf, groups with only inf / -inf / NaN
+        values[::5] = np.inf
+        values[1::7] = -np.inf
+        values[2::11] = np.nan
+        only_infinity = group_ids % 10 == 0
+        values[only_infinity] = np.where(rng.random(only_infinity.sum()) > 0.5, np.inf, -np.inf)
+        values[group_ids % 10 == 1] = np.nan
+        return values
+    if kind == 'all_infinity':
+        return np.where(rng.random(len(group_ids)) > 0.5, np.inf, -np.inf)
+    if kind == 'all_nan':
+        return np.full(len(group_ids), np.nan)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize('kind', ['finite', 'int', 'float32', 'mixed', 'all_infinity', 'all_nan'])
+def test_min_med_max_match_replace_concat(kind):
+    group_ids = gen_group_ids()
+    df = gen_df(gen_min_med_max_values(kind, group_ids), group_ids)
+    pd.testing.assert_frame_equal(new_min_med_max(df), calc_min_med_max_by_group(df, LABEL, GROUP_COL))
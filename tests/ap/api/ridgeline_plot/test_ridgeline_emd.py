@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from ap.api.ridgeline_plot.services import calc_emd_for_ridgeline
+
+NUM_BINS = 32
+MODES = [(True, False), (True, True), (False, False), (False, True)]
+MODE_IDS = ['signed_drift', 'signed_diff', 'unsigned_drift', 'unsigned_diff']
+
+
+def old_calc_emd_for_ridgeline(data, group_id, num_bins, signed=True, diff=False):
+    # implementation before vectorized histograms
+    if len(data.shape) == 1:
+        data = data.reshape(-1, 1)
+
+    num_groups = len(np.unique(group_id))
+    num_sensors = data.shape[1]
+    emd_mat = np.zeros((num_groups, num_sensors))
+
+    for sensor in np.arange(num_sensors):
+        dens_mat = np.zeros((num_groups, num_bins))
+        x = data[:, sensor]
+
+        x_wo_none = x[x != None]  # noqa: E711
+
+        if not len(x_wo_none):
+            continue
+
+        group_id_wo_none = np.delete(group_id, np.where(x == None))  # noqa: E711
+
+        x_min = np.nanmin(x_wo_none)
+        x_max = np.nanmax(x_wo_none)
+        if x_min == x_max:
+            x_min -= 4
+            x_max += 4
+        bins = np.linspace(x_min, x_max, num=num_bins + 1)
+
+        for g, grp in enumerate(np.unique(group_id_wo_none)):
+            bin_count, _ = np.histogram(x_wo_none[group_id_wo_none == grp], bins=bins)
+            dens_mat[g, :] = bin_count / np.sum(bin_count)
+
+        if diff:
+            ref_density = np.vstack([dens_mat[0, :], dens_mat[: (num_groups - 1), :]])
+        else:
+            ref_density = np.tile(dens_mat[0, :], (num_groups, 1))
+
+        if signed:
+            emd = (dens_mat - ref_density) @ np.arange(1, num_bins + 1).reshape(-1, 1)
+        else:
+            emd = np.zeros(num_groups)
+            for g, _ in enumerate(np.unique(group_id_wo_none)):
+                emd_1d = np.zeros(num_bins + 1)
+                for bin_idx in range(1, num_bins + 1):
+                    emd_1d[bin_idx] = ref_density[g, bin_idx - 1] - dens_mat[g, bin_idx - 1] + emd_1d[bin_idx - 1]
+                emd[g] = np.sum(np.abs(emd_1d))
+
+        emd = emd / (num_bins - 1) * (x_max - x_min)
+        emd_mat[:, sensor] = emd.reshape(-1)
+
+    return emd_mat
+
+
+def assert_same_as_old(data, group_id, signed, diff, num_bins=NUM_BINS):
+    emd_mat = calc_emd_for_ridgeline(data, group_id, num_bins, signed=signed, diff=diff)
+    old_emd_mat = old_calc_emd_for_ridgeline(data, group_id, num_bins, signed=signed, diff=diff)
+
+    assert emd_mat.shape == old_emd_mat.shape
+    np.testing.assert_allclose(emd_mat, old_emd_mat, rtol=1e-9, atol=1e-12)
+
+
+def gen_data_with_none(seed, num_rows=500, num_sensors=3, none_ratio=0.2):
+    rng = np.random.default_rng(seed)
+    # drift by group, so emd is not 0
+    group_id = np.sort(rng.integers(0, 12, num_rows))
+    data = (rng.normal(size=(num_rows, num_sensors)) + group_id.reshape(-1, 1) * 0.3).astype(object)
+    data[rng.random((num_rows, num_sensors)) < none_ratio] = None
+    return data, group_id
+
+
+@pytest.mark.parametrize('signed, diff', MODES, ids=MODE_IDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_none_values(seed, signed, diff):
+    data, group_id = gen_data_with_none(seed)
+
+    assert_same_as_old(data, group_id, signed, diff)
+
+
+@pytest.mark.parametrize('signed, diff', MODES, ids=MODE_IDS)
+def test_group_without_value(signed, diff):
+    data, group_id = gen_data_with_none(0)
+    # every value of one group and of the last group is None
+    data[(group_id == 3) | (group_id == group_id.max()), 0] = None
+
+    assert_same_as_old(data, group_id, signed, diff)
+
+
+@pytest.mark.parametrize('signed, diff', MODES, ids=MODE_IDS)
+def test_constant_data(signed, diff):
+    group_id = np.repeat(np.arange(5), 20)
+    data = np.full((len(group_id), 2), 7.5)
+    # values on bin edges of constant range (min - 4, max + 4)
+    data[::10, 1] = 3.5
+    data[::15, 1] = 11.5
+
+    assert_same_as_old(data, group_id, signed, diff)
+
+
+@pytest.mark.parametrize('signed, diff', MODES, ids=MODE_IDS)
+def test_one_sensor_float_data(signed, diff):
+    rng = np.random.default_rng(1)
+    group_id = np.array([f'term_{idx:02d}' for idx in np.sort(rng.integers(0, 20, 1000))])
+    data = rng.exponential(size=1000)
+
+    assert_same_as_old(data, group_id, signed, diff, num_bins=128)
+
+
+@pytest.mark.parametrize('signed, diff', MODES, ids=MODE_IDS)
+def test_sensor_without_value(signed, diff):
+    data, group_id = gen_data_with_none(2)
+    data[:, 1] = None
+
+    emd_mat = calc_emd_for_ridgeline(data, group_id, NUM_BINS, signed=signed, diff=diff)
+
+    assert not emd_mat[:, 1].any()
+    assert_same_as_old(data, group_id, signed, diff)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from ap.common.pydn.dblib.postgresql import PostgreSQL
+
+
+class FakeCursor:
+    def __init__(self, copied):
+        self.copied = copied
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def copy_expert(self, sql, buffer, size=None):
+        self.copied.append((sql, buffer.read()))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.copied = []
+
+    def cursor(self):
+        return FakeCursor(self.copied)
+
+
+def bulk_copy(df, chunk_size=1000):
+    db_instance = PostgreSQL('localhost', 'db', 'user', 'password')
+    db_instance.connection = FakeConnection()
+    db_instance.is_connected = True
+    db_instance._check_connection = lambda: True
+    db_instance.bulk_copy('t_process', df, chunk_size=chunk_size)
+    return db_instance.connection.copied
+
+
+def test_null_is_unquoted_and_text_is_quoted():
+    df = pd.DataFrame(
+        {
+            'text_col': ['a', None, '\\N', '', 'x,"y'],
+            'real_col': [1.5, np.nan, 2.0, 3.0, 4.0],
+            'int_col': pd.array([1, None, 3, 4, 5], dtype='Int64'),
+        },
+    )
+
+    ((sql, text),) = bulk_copy(df)
+
+    assert "NULL ''" in sql
+    assert text.splitlines() == [
+        '"a",1.5,1',
+        ',,',
+        '"\\N",2.0,3',
+        '"",3.0,4',
+        '"x,""y",4.0,5',
+    ]
+
+
+def test_rows_are_copied_by_chunk():
+    df = pd.DataFrame({'text_col': ['a', 'b', None]})
+
+    copied = bulk_copy(df, chunk_size=2)
+
+    assert [text for _, text in copied] == ['"a"\n"b"\n', '\n']
@@ -0,0 +1,171 @@
+import contextvars
+import threading
+
+import psycopg2.extensions
+import pytest
+
+from ap.common.pydn.dblib.postgresql import PostgreSQL
+from ap.common.services.request_time_out_handler import (
+    CancelReason,
+    RequestTimeOutAPI,
+    cancel_request,
+    cancellable_connection,
+    check_abort_process,
+    current_cancel_token,
+    end_cancel_token,
+    start_cancel_token,
+)
+
+THREAD_ID = 'request_1'
+WAIT_SECONDS = 5
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def execute(self, sql, params=None):
+        # a long query: runs until database server cancels it
+        self.connection.executing.set()
+        if not self.connection.cancelled.wait(WAIT_SECONDS):
+            raise AssertionError('query was not cancelled')
+        raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self):
+        self.executing = threading.Event()
+        self.cancelled = threading.Event()
+        self.cancel_count = 0
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def cancel(self):
+        self.cancel_count += 1
+        self.cancelled.set()
+
+
+@pytest.fixture
+def token():
+    token = start_cancel_token(THREAD_ID)
+    yield token
+    end_cancel_token()
+
+
+def run_query_in_thread(connection):
+    """
+    Run a query by PostgreSQL.run_sql in another thread of the same request, like graph thread pools do
+    :return: thread, list that gets error raised by run_sql
+    """
+    db_instance = PostgreSQL('localhost', 'db', 'user', 'password')
+    db_instance.connection = connection
+    db_instance.is_connected = True
+    errors = []
+
+    def run():
+        try:
+            db_instance.run_sql('SELECT pg_sleep(60)')
+        except Exception as e:
+            errors.append(e)
+
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(run,))
+    thread.start()
+    assert connection.executing.wait(WAIT_SECONDS)
+    return thread, errors
+
+
+@pytest.mark.parametrize(
+    'cancel, error_type',
+    [
+        (lambda token: cancel_request(THREAD_ID), BrokenPipeError),
+        (lambda token: token.cancel(CancelReason.TIMEOUT), RequestTimeOutAPI),
+    ],
+    ids=['abort', 'timeout'],
+)
+def test_cancel_running_query(token, cancel, error_type):
+    connection = StubConnection()
+    thread, errors = run_query_in_thread(connection)
+
+    cancel(token)
+    thread.join(WAIT_SECONDS)
+
+    assert connection.cancel_count == 1
+    assert [type(e) for e in errors] == [error_type]
+    with pytest.raises(error_type):
+        check_abort_process()
+
+
+def test_connection_is_not_cancelled_after_query(token):
+    connection = StubConnection()
+    with cancellable_connection(connection):
+        pass
+
+    token.cancel()
+
+    assert connection.cancel_count == 0
+    with pytest.raises(BrokenPipeError):
+        check_abort_process()
+
+
+def test_query_end_waits_for_cancel_request(token):
+    connection = StubConnection()
+    sending, sent = threading.Event(), threading.Event()
+    query_end, released = threading.Event(), threading.Event()
+
+    def send_cancel():
+        # cancel request of a slow network
+        sending.set()
+        assert sent.wait(WAIT_SECONDS)
+        StubConnection.cancel(connection)
+
+    connection.cancel = send_cancel
+
+    def run():
+        with cancellable_connection(connection):
+            connection.executing.set()
+            assert query_end.wait(WAIT_SECONDS)
+        released.set()
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(run,))
+    thread.start()
+    assert connection.executing.wait(WAIT_SECONDS)
+    cancel_thread = threading.Thread(target=token.cancel)
+    cancel_thread.start()
+    assert sending.wait(WAIT_SECONDS)
+
+    # query ends while cancel request is being sent: connection is released only after it is sent
+    query_end.set()
+    assert not released.wait(0.2)
+    sent.set()
+    assert released.wait(WAIT_SECONDS)
+    thread.join(WAIT_SECONDS)
+    cancel_thread.join(WAIT_SECONDS)
+    assert connection.cancel_count == 1
+
+
+def test_query_is_not_started_after_cancel(token):
+    connection = StubConnection()
+    token.cancel()
+
+    with pytest.raises(BrokenPipeError), cancellable_connection(connection):
+        raise AssertionError('query must not run')
+
+    # nothing runs on connection yet, no cancel request is sent
+    assert connection.cancel_count == 0
+
+
+def test_no_token_outside_request():
+    assert current_cancel_token.get() is None
+    connection = StubConnection()
+
+    with cancellable_connection(connection):
+        pass
+
+    check_abort_process()
+    assert connection.cancel_count == 0
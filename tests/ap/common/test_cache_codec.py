@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from ap.common.cache_codec import decode_cache_bytes, encode_cache_value, is_columnar_frame
+
+
+def round_trip(value):
+    chunks, is_columnar = encode_cache_value(value, is_columnar=True)
+    return decode_cache_bytes(b''.join(chunks)), is_columnar
+
+
+@pytest.mark.parametrize(
+    'df',
+    [
+        pd.DataFrame({'col': pd.Series([1, None, 3], dtype=object)}),
+        pd.DataFrame({'col': pd.Series([1, 2, 3], dtype=object)}),
+        pd.DataFrame({5: [1.0, 2.0, 3.0]}),
+        pd.DataFrame({'col': [1.0, 2.0, 3.0]}, index=[10, 11, 12]),
+    ],
+    ids=['int_none_object', 'int_object', 'int_label', 'custom_index'],
+)
+def test_lossy_frame_falls_back_to_pickle(df):
+    assert not is_columnar_frame(df)
+
+    (restored,), is_columnar = round_trip((df,))
+
+    assert not is_columnar
+    pd.testing.assert_frame_equal(restored, df)
+    assert list(map(type, restored.iloc[:, 0])) == list(map(type, df.iloc[:, 0]))
+    assert list(map(type, restored.columns)) == list(map(type, df.columns))
+
+
+def test_exact_frame_is_columnar():
+    df = pd.DataFrame(
+        {
+            'time': pd.date_range('2024-01-01', periods=3, freq='s'),
+            'serial': ['a', None, 'c'],
+            'int_col': pd.array([1, None, 3], dtype='Int64'),
+            'real_col': [1.0, float('nan'), 3.0],
+            'category_col': pd.Categorical(['x', 'y', 'x']),
+        },
+    )
+
+    (restored, count), is_columnar = round_trip((df, 3))
+
+    assert is_columnar
+    assert count == 3
+    pd.testing.assert_frame_equal(restored, df)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ap.common.common_utils import ChunkAccumulator
+
+DEDUP_COLUMNS = ['a', 'b']
+
+
+def gen_chunks(seed):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for _ in range(rng.integers(1, 6)):
+        size = rng.integers(0, 20)
+        chunks.append(
+            pd.DataFrame(
+                {
+                    'a': rng.choice(np.array(['x', 'y', None, np.nan], dtype=object), size),
+                    'b': rng.integers(0, 3, size),
+                    'c': np.arange(size),
+                },
+            ),
+        )
+    return chunks
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_dedup_same_as_drop_duplicates(seed):
+    chunks = gen_chunks(seed)
+    accumulator = ChunkAccumulator(dedup_columns=DEDUP_COLUMNS)
+    for chunk in chunks:
+        accumulator.append(chunk)
+
+    df = accumulator.pop().reset_index(drop=True)
+    expected = pd.concat(chunks, ignore_index=True).drop_duplicates(subset=DEDUP_COLUMNS, ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_hash_collision_does_not_drop_distinct_rows(monkeypatch):
+    # every row gets the same hash
+    monkeypatch.setattr(pd.util, 'hash_pandas_object', lambda df, index: pd.Series(np.zeros(len(df), dtype='uint64')))
+    accumulator = ChunkAccumulator(dedup_columns=DEDUP_COLUMNS)
+
+    accumulator.append(pd.DataFrame({'a': ['x', 'y', 'x'], 'b': [1, 1, 1], 'c': [1, 2, 3]}))
+    accumulator.append(pd.DataFrame({'a': ['y', 'z', None], 'b': [1, 1, 1], 'c': [4, 5, 6]}))
+    accumulator.append(pd.DataFrame({'a': [None, np.nan], 'b': [1, 1], 'c': [7, 8]}))
+
+    df = accumulator.pop()
+
+    assert df['c'].tolist() == [1, 2, 5, 6]
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ap.common.memoize import entry_value, freeze_value, is_read_only
+
+
+def test_read_only_frame_is_shared_without_copy():
+    df = freeze_value(pd.DataFrame({'a': [1, 2], 'b': [1.5, 2.5]}))
+    assert is_read_only(df)
+
+    value = entry_value({'value': df, 'is_read_only': True})
+    assert value is not df
+    assert np.shares_memory(value['b'].to_numpy(), df['b'].to_numpy())
+
+    value['c'] = 1
+    assert list(df.columns) == ['a', 'b']
+
+
+def test_read_only_ndarray_can_not_be_written():
+    arr = freeze_value(np.arange(3))
+    value = entry_value({'value': arr, 'is_read_only': True})
+
+    with pytest.raises(ValueError):
+        value[0] = 5
+    assert arr.tolist() == [0, 1, 2]
+
+
+def test_writable_or_object_values_are_not_read_only():
+    assert not is_read_only(pd.DataFrame({'a': [1, 2]}))
+    assert not is_read_only(freeze_value(pd.DataFrame({'a': ['x', 'y']})))
+    assert not is_read_only([1, 2])
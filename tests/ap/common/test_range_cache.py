@@ -0,0 +1,56 @@
+import pandas as pd
+
+from ap.common import range_cache
+from ap.common.range_cache import TimeRangeCache
+
+KEY = 'trace'
+PROC_ID = 1
+TIME_COL = 'time'
+
+
+def gen_fetch(calls, on_fetch=None):
+    def fetch(start_tm, end_tm):
+        calls.append((start_tm, end_tm))
+        if on_fetch:
+            on_fetch()
+        times = pd.date_range(start_tm, end_tm, freq='h', inclusive='left', tz='UTC')
+        return pd.DataFrame({TIME_COL: times})
+
+    return fetch
+
+
+def get_range(cache, fetch, start_tm='2024-01-01T00:00:00Z', end_tm='2024-01-02T00:00:00Z'):
+    return cache.get_range(KEY, {PROC_ID}, TIME_COL, start_tm, end_tm, fetch)
+
+
+def test_segment_is_fetched_again_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(range_cache.time, 'time', lambda: now[0])
+    cache = TimeRangeCache(max_bytes=1 << 30, max_segments=10, ttl=60)
+    calls = []
+
+    get_range(cache, gen_fetch(calls))
+    get_range(cache, gen_fetch(calls))
+    assert len(calls) == 1
+
+    now[0] += 61
+    df = get_range(cache, gen_fetch(calls))
+
+    assert len(calls) == 2
+    assert len(df) == 24
+    assert cache.total_bytes == range_cache.estimate_df_size(df)
+
+
+def test_range_fetched_before_clear_is_not_stored():
+    cache = TimeRangeCache(max_bytes=1 << 30, max_segments=10, ttl=60)
+    calls = []
+
+    def clear_and_request_other_range():
+        # entry of same key is created again while first range is being fetched
+        cache.clear()
+        get_range(cache, gen_fetch([]), '2024-01-03T00:00:00Z', '2024-01-04T00:00:00Z')
+
+    get_range(cache, gen_fetch(calls, on_fetch=clear_and_request_other_range))
+    get_range(cache, gen_fetch(calls))
+
+    assert len(calls) == 2
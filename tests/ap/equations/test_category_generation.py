@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ap.common.constants import DataTypeEncode
+from ap.equations.core import CategoryGeneration
+
+SERIES_X = {
+    'float_signed_zero': pd.Series([0.0, -0.0, 1.5, np.nan, -0.0, 1.5]),
+    'mixed_object': pd.Series([1, 1.0, 'a', None, True, -0.0], dtype=object),
+    'nullable_int': pd.Series([1, None, 12, 1, None, 3], dtype='Int64'),
+    'string': pd.Series(['a', None, 'bb', 'a', '', 'c'], dtype=pd.StringDtype()),
+    'datetime': pd.Series(pd.to_datetime(['2024-01-02', None, '2024-03-04', '2024-01-02', None, '2024-05-06'])),
+}
+SERIES_Y = pd.Series(['x', None, 'y', 'x', np.nan, 'z'], dtype=object)
+TEMPLATES = [
+    '{}-{}',
+    '{0}_{1}',
+    '{1}{0}',
+    '{:>6}|{}',
+    '{:02d}:{}',
+    '{:.1f}:{}',
+    '{!r}-{!s}',
+    '{:%Y/%m}/{}',
+    # not parsed per field (mixed numbering): fallback to apply_format
+    '{0}-{}',
+]
+
+
+def old_format_series(category_generation, series_x, series_y):
+    # implementation before vectorized formatting
+    return pd.Series([category_generation.apply_format(x, y) for x, y in zip(series_x, series_y)])
+
+
+@pytest.mark.parametrize('template', TEMPLATES)
+@pytest.mark.parametrize('x_kind', list(SERIES_X))
+def test_format_series_matches_apply_format(x_kind, template):
+    category_generation = CategoryGeneration(s=template, t=DataTypeEncode.TEXT.value)
+    series_x = SERIES_X[x_kind]
+
+    result = category_generation.format_series(series_x, SERIES_Y)
+
+    assert result.tolist() == old_format_series(category_generation, series_x, SERIES_Y).tolist()
+
+
+def test_format_series_keeps_sign_of_zero():
+    category_generation = CategoryGeneration(s='{}/{}', t=DataTypeEncode.TEXT.value)
+    series_x = pd.Series([0.0, -0.0])
+
+    result = category_generation.format_series(series_x, pd.Series(['a', 'a']))
+
+    assert result.tolist() == ['0.0/a', '-0.0/a']
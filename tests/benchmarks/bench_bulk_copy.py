@@ -0,0 +1,80 @@
+"""
+Insert time of PostgreSQL.bulk_copy (COPY FROM STDIN) against bulk_insert (execute_values).
+Needs a postgres database, connection is read from environment:
+    PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD
+Run from repository root: python -m tests.benchmarks.bench_bulk_copy [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.common.pydn.dblib.postgresql import PostgreSQL  # noqa: E402
+
+TABLE_NAME = 'bench_bulk_copy'
+
+
+def gen_transaction_df(rows):
+    # columns of a t_process table: time, serial, integer/real/text with nulls, text that looks like null marker
+    rng = np.random.default_rng(0)
+    real_values = rng.random(rows)
+    real_values[::10] = np.nan
+    text_values = pd.Series(rng.choice(['OK', 'NG', '', '\\N'], rows), dtype=object)
+    text_values[::7] = None
+    return pd.DataFrame(
+        {
+            'time': pd.date_range('2024-01-01', periods=rows, freq='s'),
+            'serial': [f'S{idx:09d}' for idx in range(rows)],
+            'int_col': pd.array(rng.integers(0, 1000, rows), dtype='Int64'),
+            'real_col': real_values,
+            'text_col': text_values,
+        },
+    )
+
+
+def measure(db_instance, name, insert):
+    db_instance.execute_sql(f'TRUNCATE {TABLE_NAME}')
+    start = time.perf_counter()
+    insert()
+    db_instance.connection.commit()
+    duration = time.perf_counter() - start
+    print(f'{name:>14}: {duration:8.2f} s')
+
+
+def main(rows):
+    df = gen_transaction_df(rows)
+    db_instance = PostgreSQL(
+        os.environ.get('PGHOST', 'localhost'),
+        os.environ.get('PGDATABASE', 'postgres'),
+        os.environ.get('PGUSER', 'postgres'),
+        os.environ.get('PGPASSWORD', ''),
+        port=int(os.environ.get('PGPORT', 5432)),
+    )
+    db_instance.connect()
+    try:
+        db_instance.execute_sql(
+            f'CREATE TABLE IF NOT EXISTS {TABLE_NAME} '
+            '(time timestamp, serial text, int_col bigint, real_col double precision, text_col text)',
+        )
+        rows_values = df.astype('object').where(df.notna(), None).values.tolist()
+        measure(db_instance, 'execute_values', lambda: db_instance.bulk_insert(TABLE_NAME, df.columns, rows_values))
+        measure(db_instance, 'copy', lambda: db_instance.bulk_copy(TABLE_NAME, df))
+
+        # copy must keep empty and `\N` text apart from null
+        _, result = db_instance.run_sql(
+            f'SELECT COUNT(*) AS null_count FROM {TABLE_NAME} WHERE text_col IS NULL',
+            row_is_dict=True,
+        )
+        assert result[0]['null_count'] == df['text_col'].isna().sum()
+    finally:
+        db_instance.execute_sql(f'DROP TABLE IF EXISTS {TABLE_NAME}')
+        db_instance.disconnect()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,69 @@
+"""
+Cache hit latency of columnar cache files (memory-mapped arrow ipc) against pickle files.
+Run from repository root: python -m tests.benchmarks.bench_cache_codec [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.common.cache_codec import decode_cache_file, encode_cache_value  # noqa: E402
+
+REPEAT = 5
+
+
+def gen_graph_value(rows):
+    # same shape as result of gen_graph_df: trace DataFrame, record counts
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            'time': pd.date_range('2024-01-01', periods=rows, freq='s'),
+            'serial': [f'S{idx:09d}' for idx in range(rows)],
+            'int_col': pd.array(rng.integers(0, 1000, rows), dtype='Int64'),
+            'real_col': rng.random(rows),
+            'category_col': pd.Categorical(rng.choice(['line_a', 'line_b', 'line_c'], rows)),
+        },
+    )
+    return df, rows, rows
+
+
+def write_file(directory, name, chunks):
+    file_name = os.path.join(directory, name)
+    with open(file_name, 'wb') as file:
+        for chunk in chunks:
+            file.write(chunk)
+    return file_name
+
+
+def measure(file_name):
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        value, _ = decode_cache_file(file_name)
+        _ = value[0]['real_col'].sum()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main(rows):
+    value = gen_graph_value(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_chunks, _ = encode_cache_value(value, is_columnar=False)
+        columnar_chunks, is_columnar = encode_cache_value(value, is_columnar=True)
+        assert is_columnar
+        pickle_file = write_file(directory, 'pickle', pickle_chunks)
+        columnar_file = write_file(directory, 'columnar', columnar_chunks)
+
+        for name, file_name in (('pickle', pickle_file), ('columnar', columnar_file)):
+            size = os.path.getsize(file_name) / 1024 / 1024
+            print(f'{name:>8}: {measure(file_name) * 1000:8.1f} ms per hit, {size:8.1f} MB file')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,70 @@
+"""
+CategoryGeneration formatting: vectorized format_series against apply_format row by row.
+Run from repository root: python -m tests.benchmarks.bench_category_generation [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.common.constants import DataTypeEncode  # noqa: E402
+from ap.equations.core import CategoryGeneration  # noqa: E402
+
+CASES = [
+    # name, template, kind of x
+    ('float', '{}-{}', 'float'),
+    ('float spec', '{:.2f}_{}', 'float'),
+    ('float -0.0', '{}-{}', 'float_signed_zero'),
+    ('int', '{:05d}_{}', 'int'),
+    ('text', '{}/{}', 'text'),
+    ('mixed object', '{}-{}', 'mixed_object'),
+]
+
+
+def gen_series_x(kind, rows):
+    rng = np.random.default_rng(0)
+    if kind == 'float':
+        values = rng.integers(0, 1000, rows) / 10
+        values[::50] = np.nan
+        return pd.Series(values)
+    if kind == 'float_signed_zero':
+        # equal values with different texts are formatted row by row
+        values = rng.integers(-5, 5, rows) * 0.0
+        return pd.Series(values)
+    if kind == 'int':
+        return pd.Series(rng.integers(0, 1000, rows))
+    if kind == 'text':
+        return pd.Series(rng.choice(['line_a', 'line_b', 'line_c', None], rows), dtype=object)
+    if kind == 'mixed_object':
+        return pd.Series(rng.choice([1, 1.0, 'a', None], rows), dtype=object)
+    raise ValueError(kind)
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(rows):
+    series_y = pd.Series(np.random.default_rng(1).choice(['A', 'B', 'C'], rows), dtype=object)
+    print(f'rows: {rows:,}')
+    print(f'{"case":>14} {"apply_format":>13} {"format_series":>14}')
+    for name, template, kind in CASES:
+        series_x = gen_series_x(kind, rows)
+        category_generation = CategoryGeneration(s=template, t=DataTypeEncode.TEXT.value)
+        old_duration, old_result = measure(
+            lambda: pd.Series([category_generation.apply_format(x, y) for x, y in zip(series_x, series_y)]),
+        )
+        new_duration, new_result = measure(lambda: category_generation.format_series(series_x, series_y))
+        assert new_result.tolist() == old_result.tolist()
+        print(f'{name:>14} {old_duration:11.2f} s {new_duration:12.2f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,97 @@
+"""
+Scaling of one by one rows matching: hash join (match_rows_one_by_one, merge_rows_one_by_one,
+combine_rows_one_by_one) against the mask per distinct key implementations, whose cost is rows x distinct keys.
+Old implementations are skipped ('-') above OLD_MAX_CELLS.
+Run from repository root: python -m tests.benchmarks.bench_match_rows_one_by_one [rows ...]
+(default: 10000 100000 1000000)
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bridge.models.transaction_model import (  # noqa: E402
+    combine_rows_one_by_one,
+    match_rows_one_by_one,
+    merge_rows_one_by_one,
+)
+from tests.bridge.models.test_transaction_model_one_by_one import (  # noqa: E402
+    ON,
+    normalize,
+    old_combine_rows_one_by_one,
+    old_merge_rows_one_by_one,
+)
+
+# distinct keys: few (many duplicates), some, mostly unique (None: rows // 2)
+KEY_COUNTS = [10, 1000, None]
+OLD_MAX_CELLS = 10**7
+
+
+def gen_frames(rows, num_keys):
+    """
+    Right keys are a prefix of left keys (old implementations align rows by index label, results are comparable)
+    """
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, num_keys, rows)
+    left_df = pd.DataFrame({ON[0]: (keys % 7).astype(str).astype(object), ON[1]: keys.astype(str).astype(object)})
+    left_df.iloc[::101, 0] = None
+    right_df = left_df.iloc[: rows * 9 // 10].copy()
+    left_df['c'] = np.arange(rows).astype(str).astype(object)
+    left_df['d'] = None
+    right_df['c'] = None
+    right_df['d'] = np.arange(len(right_df)).astype(str).astype(object)
+    return left_df, right_df
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def format_duration(duration):
+    return '-' if duration is None else f'{duration:.3f} s'
+
+
+def main(rows):
+    print(f'rows: {rows:,}')
+    print(f'{"keys":>8} {"match":>9} {"merge":>9} {"combine":>9} {"old merge":>10} {"old combine":>12}')
+    for num_keys in KEY_COUNTS:
+        num_keys = num_keys or rows // 2
+        left_df, right_df = gen_frames(rows, num_keys)
+
+        match_duration, _ = measure(lambda: match_rows_one_by_one(left_df, right_df, ON))
+        merge_duration, df_merge = measure(
+            lambda: merge_rows_one_by_one(left_df[ON + ['c']].copy(), right_df, ON, right_columns=['d']),
+        )
+        combine_duration, (df_combine, *_) = measure(lambda: combine_rows_one_by_one(left_df, right_df, ON))
+
+        old_merge_duration = old_combine_duration = None
+        if rows * num_keys <= OLD_MAX_CELLS:
+            old_merge_duration, old_df_merge = measure(
+                lambda: old_merge_rows_one_by_one(left_df[ON + ['c']].copy(), right_df, ON, right_columns=['d']),
+            )
+            old_combine_duration, (old_df_combine, *_) = measure(
+                lambda: old_combine_rows_one_by_one(left_df, right_df, ON),
+            )
+            pd.testing.assert_frame_equal(normalize(df_merge), normalize(old_df_merge))
+            pd.testing.assert_frame_equal(
+                normalize(df_combine).sort_index(),
+                normalize(old_df_combine[df_combine.columns]).sort_index(),
+            )
+
+        print(
+            f'{num_keys:>8} {format_duration(match_duration):>9} {format_duration(merge_duration):>9} '
+            f'{format_duration(combine_duration):>9} {format_duration(old_merge_duration):>10} '
+            f'{format_duration(old_combine_duration):>12}',
+        )
+
+
+if __name__ == '__main__':
+    for arg in sys.argv[1:] or [10_000, 100_000, 1_000_000]:
+        main(int(arg))
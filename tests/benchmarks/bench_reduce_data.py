@@ -0,0 +1,113 @@
+"""
+Thin-mode aggregation of reduce_data: one-pass modes (calc_group_modes) and masked min/median/max
+(mask_infinity_by_group) against groupby().agg(get_mode) and the replace/concat path (calc_min_med_max_by_group).
+Run from repository root: python -m tests.benchmarks.bench_reduce_data [rows ...]   (default: 1000000 10000000)
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.api.common.services.show_graph_services import (  # noqa: E402
+    calc_min_med_max_by_group,
+    gen_min_med_max_df,
+    reduce_data,
+)
+from ap.common.common_utils import gen_sql_label  # noqa: E402
+from ap.common.constants import THIN_DATA_CHUNK, TIME_COL  # noqa: E402
+from ap.common.services.statistics import calc_group_modes, get_mode, mask_infinity_by_group  # noqa: E402
+
+GROUP_COL = '__group_col__'
+PROC_ID = 1
+SENSOR_IDS = [1, 2, 3, 4, 5]
+CATEGORY_IDS = [11, 12]
+RANK_ID = 21
+
+
+def gen_graph_df(rows):
+    # trace DataFrame of one process: 5 sensors (with inf and NaN), 2 categories, 1 rank column
+    rng = np.random.default_rng(0)
+    data = {TIME_COL: pd.date_range('2024-01-01', periods=rows, freq='s').astype(str)}
+    for col_id in SENSOR_IDS:
+        values = rng.normal(size=rows)
+        values[::97] = np.inf
+        values[::89] = np.nan
+        data[gen_sql_label(col_id, f'sensor_{col_id}')] = values
+    for col_id in CATEGORY_IDS:
+        categories = rng.choice(['line_a', 'line_b', 'line_c'], rows).astype(object)
+        data[gen_sql_label(col_id, f'category_{col_id}')] = categories
+    data[gen_sql_label(RANK_ID, 'rank')] = rng.integers(0, 20, rows)
+    return pd.DataFrame(data)
+
+
+def gen_graph_param():
+    col_ids = [*SENSOR_IDS, RANK_ID]
+    col_names = [*(f'sensor_{col_id}' for col_id in SENSOR_IDS), 'rank']
+    cate_names = [f'category_{col_id}' for col_id in CATEGORY_IDS]
+    return SimpleNamespace(
+        array_formval=[SimpleNamespace(proc_id=PROC_ID, col_ids=col_ids, col_names=col_names)],
+        common=SimpleNamespace(
+            cat_exp=None,
+            cate_procs=[SimpleNamespace(proc_id=PROC_ID, col_ids=CATEGORY_IDS, col_names=cate_names)],
+            x_option='TIME',
+        ),
+    )
+
+
+def measure(name, func):
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    print(f'{name:>24}: {duration:8.2f} s')
+
+
+def old_modes(df, cols):
+    return df[cols].groupby(GROUP_COL).agg(get_mode)
+
+
+def new_modes(df, cols):
+    group_idxs, group_ids = pd.factorize(df.index.values, sort=True)
+    group_index = pd.Index(group_ids, name=GROUP_COL)
+    return {col: calc_group_modes(df[col], group_idxs, group_index) for col in cols}
+
+
+def old_min_med_max(df, cols):
+    return {col: calc_min_med_max_by_group(df, col, GROUP_COL) for col in cols}
+
+
+def new_min_med_max(df, cols):
+    group_idxs, group_ids = pd.factorize(df.index.values, sort=True)
+    dic_masked_values = {}
+    dic_has_finite = {}
+    for col in cols:
+        dic_masked_values[col], dic_has_finite[col] = mask_infinity_by_group(df[col].values, group_idxs, len(group_ids))
+
+    df_aggs = pd.DataFrame(dic_masked_values, index=df.index).groupby(GROUP_COL).agg(['min', 'median', 'max'])
+    return {col: gen_min_med_max_df(df_aggs[col], dic_has_finite[col]) for col in cols}
+
+
+def main(rows):
+    print(f'rows: {rows:,}')
+    df_graph = gen_graph_df(rows)
+    df = df_graph.set_index(pd.Index(np.arange(rows) * THIN_DATA_CHUNK // rows, name=GROUP_COL))
+    cate_cols = [gen_sql_label(col_id, f'category_{col_id}') for col_id in CATEGORY_IDS]
+    str_cols = [*cate_cols, gen_sql_label(RANK_ID, 'rank')]
+    sensor_cols = [gen_sql_label(col_id, f'sensor_{col_id}') for col_id in SENSOR_IDS]
+
+    measure('modes groupby get_mode', lambda: old_modes(df, str_cols))
+    measure('modes one pass', lambda: new_modes(df, str_cols))
+    measure('min/med/max concat', lambda: old_min_med_max(df, sensor_cols))
+    measure('min/med/max one pass', lambda: new_min_med_max(df, sensor_cols))
+    dic_str_cols = {gen_sql_label(RANK_ID, 'rank'): True}
+    measure('reduce_data', lambda: reduce_data(df_graph, gen_graph_param(), dic_str_cols))
+
+
+if __name__ == '__main__':
+    for arg in sys.argv[1:] or [1_000_000, 10_000_000]:
+        main(int(arg))
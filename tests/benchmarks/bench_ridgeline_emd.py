@@ -0,0 +1,55 @@
+"""
+EMD of ridgeline plot: vectorized calc_emd_for_ridgeline against the histogram-per-group implementation.
+Run from repository root: python -m tests.benchmarks.bench_ridgeline_emd [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.api.ridgeline_plot.services import calc_emd_for_ridgeline  # noqa: E402
+from tests.ap.api.ridgeline_plot.test_ridgeline_emd import old_calc_emd_for_ridgeline  # noqa: E402
+
+# same as gen_emd_data
+NUM_BINS = 100
+CASES = [
+    # groups, sensors, diff (to previous group instead of first group)
+    (20, 1, False),
+    (1000, 1, False),
+    (1000, 1, True),
+    (100, 10, False),
+]
+
+
+def gen_data(rows, num_groups, num_sensors):
+    rng = np.random.default_rng(0)
+    # drift by group, gen_emd_data passes values without NA in group order
+    group_id = np.sort(rng.integers(0, num_groups, rows))
+    data = rng.normal(size=(rows, num_sensors)) + group_id.reshape(-1, 1) * 0.01
+    return data, group_id
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(rows):
+    print(f'rows: {rows:,}, bins: {NUM_BINS}')
+    print(f'{"groups":>7} {"sensors":>8} {"mode":>9} {"per group":>10} {"vectorized":>11}')
+    for num_groups, num_sensors, is_diff in CASES:
+        data, group_id = gen_data(rows, num_groups, num_sensors)
+        old_duration, old_emd = measure(lambda: old_calc_emd_for_ridgeline(data, group_id, NUM_BINS, diff=is_diff))
+        new_duration, new_emd = measure(lambda: calc_emd_for_ridgeline(data, group_id, NUM_BINS, diff=is_diff))
+        np.testing.assert_allclose(new_emd, old_emd, rtol=1e-9, atol=1e-12)
+        mode = 'diff' if is_diff else 'drift'
+        print(f'{num_groups:>7} {num_sensors:>8} {mode:>9} {old_duration:8.2f} s {new_duration:9.2f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
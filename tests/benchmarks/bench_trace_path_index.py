@@ -0,0 +1,98 @@
+"""
+Trace graph paths on synthetic dense graphs (layers of processes, each linked to every process of next layer):
+TraceGraph.has_path / get_all_paths (reachability index, pruned and cached enumeration) against the recursive
+enumeration they replaced. Undirected enumeration is not pruned (every process of a component reaches end proc),
+it stays exponential, only its result is cached.
+Run from repository root: python -m tests.benchmarks.bench_trace_path_index
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ap.api.common.services.utils import TraceGraph, dic_trace_path_indexes  # noqa: E402
+
+CASES = [
+    # layers, processes per layer, undirected
+    (6, 3, False),
+    (8, 3, False),
+    (5, 5, False),
+    (4, 8, False),
+    # simple undirected paths explode with size: 6x3 already has ~390k of them
+    (4, 3, True),
+    (5, 3, True),
+    (4, 4, True),
+]
+REPEAT = 10
+
+
+def gen_dense_edges(num_layers, width):
+    layers = [list(range(layer * width, (layer + 1) * width)) for layer in range(num_layers)]
+    return [
+        SimpleNamespace(self_process_id=start_proc, target_process_id=end_proc)
+        for left_layer, right_layer in zip(layers, layers[1:])
+        for start_proc in left_layer
+        for end_proc in right_layer
+    ]
+
+
+def old_get_all_paths(trace_graph, start_proc, path, paths, end_proc=None, undirected_graph=None):
+    # implementation before reachability index: every branch is enumerated on every call
+    if start_proc in path:
+        return paths
+    path = path + [start_proc]
+
+    dic_graph = trace_graph.dic_graph_undirected if undirected_graph else trace_graph.dic_graph
+
+    if start_proc == end_proc:
+        paths.append(path)
+    elif start_proc not in dic_graph:
+        if end_proc is None:
+            paths.append(path)
+    else:
+        for next_proc in dic_graph[start_proc]:
+            old_get_all_paths(trace_graph, next_proc, path, paths, end_proc, undirected_graph)
+
+    return paths
+
+
+def measure(func, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    print(f'{"graph":>8} {"mode":>10} {"paths":>8} {"old":>10} {"first call":>11} {"cached":>9} {"has_path":>9}')
+    for num_layers, width, undirected_graph in CASES:
+        edges = gen_dense_edges(num_layers, width)
+        start_proc, end_proc = 0, num_layers * width - 1
+        dic_trace_path_indexes.clear()
+        trace_graph = TraceGraph(edges)
+        old_duration, old_paths = measure(
+            lambda: old_get_all_paths(trace_graph, start_proc, [], [], end_proc, undirected_graph),
+            repeat=1,
+        )
+        # first call builds index and enumerates paths
+        first_duration, paths = measure(
+            lambda: trace_graph.get_all_paths(start_proc, end_proc, undirected_graph),
+            repeat=1,
+        )
+        cached_duration, _ = measure(lambda: trace_graph.get_all_paths(start_proc, end_proc, undirected_graph))
+        has_path_duration, _ = measure(lambda: trace_graph.has_path(start_proc, end_proc, undirected_graph))
+        assert sorted(paths) == sorted(old_paths)
+
+        graph = f'{num_layers}x{width}'
+        mode = 'undirected' if undirected_graph else 'directed'
+        print(
+            f'{graph:>8} {mode:>10} {len(paths):>8} {old_duration:8.2f}ms {first_duration:9.2f}ms '
+            f'{cached_duration:7.2f}ms {has_path_duration:7.4f}ms',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bridge.models.transaction_model import combine_rows_one_by_one, merge_rows_one_by_one
+
+ON = ['a', 'b']
+SEEDS = range(50)
+# few distinct values, so keys are duplicated; None and NaN never match
+KEY_VALUES = np.array(['x', 'y', 'z', None, np.nan], dtype=object)
+
+
+def old_merge_rows_one_by_one(left_df, right_df, on, right_columns):
+    # implementation before hash join
+    left_df[right_columns] = None
+
+    for keys in right_df[on].drop_duplicates().values:
+        left_mask = np.all([left_df[col] == value for col, value in zip(on, keys)], axis=0)
+        right_mask = np.all([right_df[col] == value for col, value in zip(on, keys)], axis=0)
+        left_df.loc[left_mask, right_columns] = right_df.loc[right_mask, right_columns]
+
+    return left_df
+
+
+def old_combine_rows_one_by_one(left_df, right_df, on):
+    # implementation before hash join
+    left_used = np.full(len(left_df), fill_value=False, dtype=bool)
+    right_used = np.full(len(right_df), fill_value=False, dtype=bool)
+
+    if left_df.empty or right_df.empty:
+        return left_df[left_used], left_used, right_used
+
+    combined_dfs = []
+
+    for keys in left_df[on].drop_duplicates().values:
+        left_mask = np.all([left_df[col] == value for col, value in zip(on, keys)], axis=0)
+        right_mask = np.all([right_df[col] == value for col, value in zip(on, keys)], axis=0)
+
+        left_mask_cum_sum = left_mask.cumsum()
+        right_mask_cum_sum = right_mask.cumsum()
+        total_true = min(left_mask_cum_sum[-1], right_mask_cum_sum[-1])
+        left_mask[left_mask_cum_sum.searchsorted(total_true) + 1 :] = False
+        right_mask[right_mask_cum_sum.searchsorted(total_true) + 1 :] = False
+
+        combined_dfs.append(right_df.loc[right_mask].combine_first(left_df.loc[left_mask]))
+        left_used |= left_mask
+        right_used |= right_mask
+    return pd.concat(combined_dfs), left_used, right_used
+
+
+def match_by_nth(left_df, right_df, on):
+    """
+    Reference: (left position, right position) of n-th rows of the same key, rows with null key are not matched
+    """
+    right_positions = defaultdict(list)
+    for pos, keys in enumerate(right_df[on].itertuples(index=False)):
+        if not any(pd.isna(key) for key in keys):
+            right_positions[tuple(keys)].append(pos)
+
+    pairs = []
+    nth = defaultdict(int)
+    for pos, keys in enumerate(left_df[on].itertuples(index=False)):
+        keys = tuple(keys)
+        if any(pd.isna(key) for key in keys):
+            continue
+        if nth[keys] < len(right_positions[keys]):
+            pairs.append((pos, right_positions[keys][nth[keys]]))
+        nth[keys] += 1
+
+    return pairs
+
+
+def gen_keys(rng, size):
+    return pd.DataFrame({col: rng.choice(KEY_VALUES, size) for col in ON})
+
+
+def gen_values(rng, size, prefix):
+    values = np.array([f'{prefix}{idx}' for idx in range(size)], dtype=object)
+    values[rng.random(size) < 0.3] = None
+    return values
+
+
+def gen_random_frames(seed):
+    rng = np.random.default_rng(seed)
+    left_df = gen_keys(rng, rng.integers(0, 30))
+    right_df = gen_keys(rng, rng.integers(0, 30))
+    left_df['c'] = gen_values(rng, len(left_df), 'left_')
+    right_df['c'] = gen_values(rng, len(right_df), 'right_')
+    right_df['d'] = gen_values(rng, len(right_df), 'd_')
+    return left_df, right_df
+
+
+def gen_aligned_frames(seed):
+    """
+    Old implementations align rows by index label, they match n-th rows when right keys are a prefix of left keys
+    and the other right rows have keys not in left
+    """
+    rng = np.random.default_rng(seed)
+    left_df = gen_keys(rng, rng.integers(1, 30))
+    prefix_size = rng.integers(1, len(left_df) + 1)
+    extra_size = rng.integers(0, 5)
+    extra_df = pd.DataFrame({col: [f'new_{idx}' for idx in range(extra_size)] for col in ON})
+    right_df = pd.concat([left_df.iloc[:prefix_size], extra_df], ignore_index=True)
+    left_df['c'] = gen_values(rng, len(left_df), 'left_')
+    right_df['c'] = gen_values(rng, len(right_df), 'right_')
+    right_df['d'] = gen_values(rng, len(right_df), 'd_')
+    return left_df, right_df
+
+
+def normalize(df):
+    # None and NaN are both null, old implementation writes NaN for not matched rows
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_merge_matches_nth_rows(seed):
+    left_df, right_df = gen_random_frames(seed)
+
+    df = merge_rows_one_by_one(left_df.copy(), right_df, on=ON, right_columns=['d'])
+
+    expected = [None] * len(left_df)
+    for left_pos, right_pos in match_by_nth(left_df, right_df, ON):
+        expected[left_pos] = right_df['d'].iloc[right_pos]
+    assert normalize(df['d']).tolist() == normalize(pd.Series(expected, dtype=object)).tolist()
+    pd.testing.assert_frame_equal(df[left_df.columns], left_df)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_merge_same_as_old(seed):
+    left_df, right_df = gen_aligned_frames(seed)
+
+    df = merge_rows_one_by_one(left_df.copy(), right_df, on=ON, right_columns=['d'])
+    old_df = old_merge_rows_one_by_one(left_df.copy(), right_df, on=ON, right_columns=['d'])
+
+    pd.testing.assert_frame_equal(normalize(df), normalize(old_df))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_combine_matches_nth_rows(seed):
+    left_df, right_df = gen_random_frames(seed)
+    left_df['d'] = gen_values(np.random.default_rng(seed), len(left_df), 'left_d_')
+    right_df.index = right_df.index + 100
+
+    df, left_used, right_used = combine_rows_one_by_one(left_df, right_df, on=ON)
+
+    pairs = match_by_nth(left_df, right_df, ON)
+    assert np.flatnonzero(left_used).tolist() == sorted(left_pos for left_pos, _ in pairs)
+    assert np.flatnonzero(right_used).tolist() == sorted(right_pos for _, right_pos in pairs)
+    assert sorted(df.index) == sorted(right_df.index[right_pos] for _, right_pos in pairs)
+    for left_pos, right_pos in pairs:
+        row = df.loc[right_df.index[right_pos]]
+        for col in ['c', 'd']:
+            right_value = right_df[col].iloc[right_pos]
+            expected = left_df[col].iloc[left_pos] if pd.isna(right_value) else right_value
+            assert row[col] == expected or (pd.isna(row[col]) and pd.isna(expected))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_combine_same_as_old(seed):
+    left_df, right_df = gen_aligned_frames(seed)
+    left_df['d'] = gen_values(np.random.default_rng(seed), len(left_df), 'left_d_')
+
+    df, left_used, right_used = combine_rows_one_by_one(left_df, right_df, on=ON)
+    old_df, old_left_used, old_right_used = old_combine_rows_one_by_one(left_df, right_df, on=ON)
+
+    np.testing.assert_array_equal(left_used, old_left_used)
+    np.testing.assert_array_equal(right_used, old_right_used)
+    pd.testing.assert_frame_equal(normalize(df), normalize(old_df[df.columns]))
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from bridge.services.etl_services.etl_csv_reader import can_read_by_pyarrow, read_csv_by_pyarrow, read_csv_file
+
+COLUMNS = ['serial', 'value']
+NA_VALUES = ['NA', '']
+
+
+def write_csv(tmp_path, text, encoding='utf-8'):
+    file_path = tmp_path / 'data.csv'
+    file_path.write_bytes(text.encode(encoding))
+    return str(file_path)
+
+
+def gen_params(**params):
+    # same keys as EtlCsvService.build_read_csv_params
+    return {
+        'sep': ',',
+        'usecols': COLUMNS,
+        'dtype': {col: pd.StringDtype() for col in COLUMNS},
+        'skipinitialspace': True,
+        'na_values': NA_VALUES,
+        'skip_blank_lines': True,
+        **params,
+    }
+
+
+def assert_same_as_pandas(file_path, params):
+    (df,) = read_csv_file(file_path, chunk_size=10, **params)
+
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), pd.read_csv(file_path, **params))
+
+
+@pytest.mark.parametrize(
+    'text',
+    [
+        'serial,value\nS1,  plain\n  S2,\tkept tab\nS3,   \nS4,  NA\n',
+        'serial,value\nS1,"a, b"\nS2,"x"\n  S3,  "inner "" quote"\n'.replace('  "inner', '"inner'),
+        'serial,value\r\nS1, crlf\r\n',
+    ],
+    ids=['unquoted', 'quoted_without_space', 'crlf'],
+)
+def test_trimmed_by_pyarrow(tmp_path, text):
+    file_path = write_csv(tmp_path, text)
+    params = gen_params()
+
+    assert can_read_by_pyarrow(file_path, params)
+    pd.testing.assert_frame_equal(read_csv_by_pyarrow(file_path, params), pd.read_csv(file_path, **params))
+
+
+@pytest.mark.parametrize(
+    'text',
+    [
+        'serial,value\nS1,  "a, b"\n',
+        'serial,value\nS1," quoted"\n',
+        'serial,value\n  "S1",x\n',
+        'serial,value\n" S1",x\n',
+    ],
+    ids=['quote_after_space', 'quoted_leading_space', 'first_field_quote_after_space', 'first_field_leading_space'],
+)
+def test_quote_with_space_is_read_by_pandas(tmp_path, text):
+    file_path = write_csv(tmp_path, text)
+    params = gen_params()
+
+    assert not can_read_by_pyarrow(file_path, params)
+    assert can_read_by_pyarrow(file_path, gen_params(skipinitialspace=False))
+    assert_same_as_pandas(file_path, params)
+
+
+def test_bom_before_first_field(tmp_path):
+    file_path = write_csv(tmp_path, 'serial,value\nS1, x\n', encoding='utf-8-sig')
+
+    assert can_read_by_pyarrow(file_path, gen_params(encoding='utf-8-sig'))
+    file_path = write_csv(tmp_path, '" serial",value\nS1,x\n', encoding='utf-8-sig')
+    assert not can_read_by_pyarrow(file_path, gen_params(encoding='utf-8-sig'))
+
+
+def test_not_ascii_compatible_encoding_is_read_by_pandas(tmp_path):
+    file_path = write_csv(tmp_path, 'serial,value\nS1, x\n', encoding='utf-16')
+
+    assert not can_read_by_pyarrow(file_path, gen_params(encoding='utf-16'))
@@ -0,0 +1,171 @@
+import contextlib
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from ap.api.common.services import show_graph_services
+from ap.common.constants import DataType, RawDataTypeDB
+from bridge.services import function_column_store
+from bridge.services.function_column_store import (
+    STORED_COLUMN_COMPLETE,
+    StorableFunctionColumn,
+    get_stored_function_columns,
+)
+
+PROC_ID = 1
+INPUT_COL_ID = 10
+FUNCTION_COL_ID = 11
+STORED_LABEL = 'fn_col__11'
+STORED_NAME = 'fn_11_0123456789ab'
+
+
+class FakeProcess:
+    table_name = 't_process_1'
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def get_cols(self, col_ids=None):
+        return [col for col in self.columns if col_ids is None or col.id in col_ids]
+
+    def get_col(self, col_id):
+        return next((col for col in self.columns if col.id == col_id), None)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    function_detail = SimpleNamespace(process_column_id=FUNCTION_COL_ID, var_x=INPUT_COL_ID, var_y=None, order=1)
+    input_col = SimpleNamespace(id=INPUT_COL_ID, column_name='x', data_type=DataType.REAL.value, function_details=[])
+    function_col = SimpleNamespace(
+        id=FUNCTION_COL_ID,
+        column_name='fn_col',
+        data_type=DataType.REAL.value,
+        function_details=[function_detail],
+    )
+    cfg_proc = FakeProcess([input_col, function_col])
+    end_proc = SimpleNamespace(proc_id=PROC_ID, cfg_proc=cfg_proc, col_ids=[INPUT_COL_ID, FUNCTION_COL_ID])
+    storable_column = StorableFunctionColumn(
+        column_id=FUNCTION_COL_ID,
+        label=STORED_LABEL,
+        name=STORED_NAME,
+        output_type=RawDataTypeDB.REAL.value,
+        function_details=[function_detail],
+        input_columns=[input_col],
+    )
+
+    monkeypatch.setattr(function_column_store, 'is_persist_function_columns', lambda: True)
+    monkeypatch.setattr(
+        function_column_store,
+        'get_storable_function_columns',
+        lambda _cfg_proc, col_ids=None: {FUNCTION_COL_ID: storable_column},
+    )
+    monkeypatch.setattr(
+        function_column_store,
+        'get_stored_column_states',
+        lambda _db_instance, _table_name: {STORED_NAME: STORED_COLUMN_COMPLETE},
+    )
+    return end_proc, storable_column
+
+
+def test_complete_stored_column_is_returned_as_storable_column(graph):
+    end_proc, storable_column = graph
+
+    stored_function_columns = get_stored_function_columns(None, [end_proc])
+
+    assert stored_function_columns == {PROC_ID: {FUNCTION_COL_ID: storable_column}}
+
+
+def test_graph_data_reads_complete_stored_column(graph, monkeypatch):
+    end_proc, _ = graph
+    stored_function_columns = get_stored_function_columns(None, [end_proc])
+
+    df_trace = pd.DataFrame({'fn_col__10': [1.0, 2.0], STORED_LABEL: [3.0, None]})
+    calls = []
+
+    def fake_gen_trace_procs_df(*args, stored_function_columns=None, **kwargs):
+        calls.append(stored_function_columns)
+        return df_trace.copy(), len(df_trace), len(df_trace)
+
+    def fail_to_evaluate(*args, **kwargs):
+        raise AssertionError('stored function column must not be evaluated again')
+
+    monkeypatch.setattr(show_graph_services, 'compute_key', lambda *args, **kwargs: None)
+    monkeypatch.setattr(show_graph_services, 'gen_trace_procs_df', fake_gen_trace_procs_df)
+    monkeypatch.setattr(show_graph_services, 'add_equation_column_to_df', fail_to_evaluate)
+
+    df, *_ = show_graph_services.gen_trace_procs_df_by_range(
+        None,
+        '2024-01-01T00:00:00',
+        '2024-01-02T00:00:00',
+        [],
+        [end_proc],
+        {},
+        [],
+        [PROC_ID],
+        None,
+        stored_function_columns=stored_function_columns,
+    )
+    df = show_graph_services.get_equation_data(df, end_proc, stored_function_columns.get(PROC_ID))
+
+    assert calls == [stored_function_columns]
+    assert df[STORED_LABEL].dtype == RawDataTypeDB.get_pandas_dtype(RawDataTypeDB.REAL.value)
+    assert df[STORED_LABEL].iloc[0] == 3.0
+    assert pd.isna(df[STORED_LABEL].iloc[1])
+
+
+def test_trace_sql_selects_stored_column(graph, monkeypatch):
+    end_proc, _ = graph
+    stored_function_columns = get_stored_function_columns(None, [end_proc])
+
+    class FakeTransactionData:
+        instances = []
+
+        def __init__(self, proc_id):
+            self.process_id = proc_id
+            self.stored_function_columns = {}
+            FakeTransactionData.instances.append(self)
+
+    class StopBeforeQuery(Exception):
+        pass
+
+    def stop_before_query(*args, **kwargs):
+        raise StopBeforeQuery
+
+    monkeypatch.setattr(show_graph_services, 'TransactionData', FakeTransactionData)
+    monkeypatch.setattr(show_graph_services.BridgeStationModel, 'get_db_proxy', stop_before_query)
+
+    with contextlib.suppress(StopBeforeQuery):
+        show_graph_services.gen_trace_procs_sqls(
+            [PROC_ID],
+            {},
+            '2024-01-01T00:00:00',
+            '2024-01-02T00:00:00',
+            [end_proc],
+            [PROC_ID],
+            stored_function_columns=stored_function_columns,
+        )
+
+    (trans_data,) = FakeTransactionData.instances
+    assert trans_data.stored_function_columns == {FUNCTION_COL_ID: STORED_NAME}
+
+
+def test_import_while_persist_off_clears_complete_state(graph, monkeypatch):
+    end_proc, storable_column = graph
+    stored_states = {STORED_NAME: STORED_COLUMN_COMPLETE}
+    monkeypatch.setattr(function_column_store, 'get_stored_column_states', lambda *_args: dict(stored_states))
+    monkeypatch.setattr(
+        function_column_store,
+        'set_stored_column_state',
+        lambda _db_instance, _table_name, name, state: stored_states.update({name: state}),
+    )
+    trans_data = SimpleNamespace(process_id=PROC_ID, table_name=FakeProcess.table_name)
+
+    monkeypatch.setattr(function_column_store, 'is_persist_function_columns', lambda: False)
+    function_column_store.fill_imported_function_columns(None, trans_data, None, None)
+    monkeypatch.setattr(function_column_store, 'is_persist_function_columns', lambda: True)
+
+    # rows imported meanwhile have no stored value, they must be evaluated until backfill completes the column
+    assert stored_states == {STORED_NAME: None}
+    assert get_stored_function_columns(None, [end_proc]) == {}
+    assert function_column_store.is_backfill_required({FUNCTION_COL_ID: storable_column}, stored_states)
@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bridge.services import proc_link
+from bridge.services.proc_link import gen_proc_link_of_edge_incremental
+
+SELF_PROC_ID = 1
+TARGET_PROC_ID = 2
+FINGERPRINT = 'trace_keys'
+
+
+class FakeTables:
+    """
+    Rows of transaction tables as {id: link key}, proc link counted the same way as gen_sql_proc_link_count
+    """
+
+    def __init__(self):
+        self.rows = {SELF_PROC_ID: {}, TARGET_PROC_ID: {}}
+        self.full_count_calls = 0
+
+    def add(self, proc_id, *keys):
+        rows = self.rows[proc_id]
+        for key in keys:
+            rows[max(rows, default=0) + 1] = key
+
+    def delete(self, proc_id, row_id):
+        self.rows[proc_id].pop(row_id)
+
+    def select_keys(self, proc_id, id_range):
+        after_id, until_id = id_range or (None, None)
+        return [
+            key
+            for row_id, key in self.rows[proc_id].items()
+            if (after_id is None or row_id > after_id) and (until_id is None or row_id <= until_id)
+        ]
+
+    def count_proc_link(self, self_id_range=None, target_id_range=None, excluded_target_id_range=None):
+        target_keys = set(self.select_keys(TARGET_PROC_ID, target_id_range))
+        excluded_keys = set()
+        if excluded_target_id_range is not None:
+            excluded_keys = set(self.select_keys(TARGET_PROC_ID, excluded_target_id_range))
+        return sum(
+            key in target_keys and key not in excluded_keys
+            for key in self.select_keys(SELF_PROC_ID, self_id_range)
+        )
+
+    def full_count(self):
+        return self.count_proc_link()
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    tables = FakeTables()
+
+    def count_proc_link(_db_instance, _trace, limit=None, **id_ranges):
+        if id_ranges.get('self_id_range', (None,))[0] is None and 'excluded_target_id_range' not in id_ranges:
+            tables.full_count_calls += 1
+        return tables.count_proc_link(**id_ranges)
+
+    monkeypatch.setattr(proc_link, 'create_edge_tables', lambda *args: None)
+    monkeypatch.setattr(proc_link, 'TransactionData', lambda proc_id: SimpleNamespace(proc_id=proc_id))
+    monkeypatch.setattr(proc_link, 'gen_trace_fingerprint', lambda _trace: FINGERPRINT)
+    monkeypatch.setattr(proc_link, 'is_master_link_edge', lambda _trace: False)
+    monkeypatch.setattr(proc_link, 'count_proc_link', count_proc_link)
+    monkeypatch.setattr(
+        proc_link,
+        'get_max_id',
+        lambda _db, trans_data: max(tables.rows[trans_data.proc_id], default=0),
+    )
+    monkeypatch.setattr(
+        proc_link,
+        'count_rows_by_id',
+        lambda _db, trans_data, after_id, until_id: len(tables.select_keys(trans_data.proc_id, (after_id, until_id))),
+    )
+    return tables
+
+
+@pytest.fixture
+def db_instance():
+    connection = SimpleNamespace(commit=lambda: None)
+    return SimpleNamespace(connection=connection, run_sql=lambda *args, **kwargs: ([], []))
+
+
+@pytest.fixture
+def trace():
+    return SimpleNamespace(self_process_id=SELF_PROC_ID, target_process_id=TARGET_PROC_ID)
+
+
+def count_again(db_instance, trace, tables, previous):
+    tables.full_count_calls = 0
+    count, watermark = gen_proc_link_of_edge_incremental(db_instance, trace, previous[1], previous[0])
+    assert count == tables.full_count()
+    return count, watermark
+
+
+def test_first_count_is_full_count(db_instance, trace, tables):
+    tables.add(SELF_PROC_ID, 'a', 'b', 'c')
+    tables.add(TARGET_PROC_ID, 'a', 'c', 'x')
+
+    count, watermark = gen_proc_link_of_edge_incremental(db_instance, trace)
+
+    assert count == tables.full_count() == 2
+    assert tables.full_count_calls == 1
+    assert (watermark.self_max_id, watermark.self_row_count) == (3, 3)
+    assert (watermark.target_max_id, watermark.target_row_count) == (3, 3)
+
+
+def test_new_self_rows(db_instance, trace, tables):
+    tables.add(SELF_PROC_ID, 'a', 'b')
+    tables.add(TARGET_PROC_ID, 'a', 'c')
+    result = gen_proc_link_of_edge_incremental(db_instance, trace)
+
+    # new self rows link with old target rows and with each other's keys
+    tables.add(SELF_PROC_ID, 'c', 'c', 'd')
+    count, _ = count_again(db_instance, trace, tables, result)
+
+    assert count == 3
+    assert tables.full_count_calls == 0
+
+
+def test_new_target_rows_link_old_self_rows(db_instance, trace, tables):
+    tables.add(SELF_PROC_ID, 'a', 'b', 'c')
+    tables.add(TARGET_PROC_ID, 'a')
+    result = gen_proc_link_of_edge_incremental(db_instance, trace)
+    assert result[0] == 1
+
+    # 'a' is already linked, must not be counted again; 'b' is linked for the first time
+    tables.add(TARGET_PROC_ID, 'a', 'b', 'b')
+    count, _ = count_again(db_instance, trace, tables, result)
+
+    assert count == 2
+    assert tables.full_count_calls == 0
+
+
+def test_new_rows_of_both_processes(db_instance, trace, tables):
+    tables.add(SELF_PROC_ID, 'a', 'b')
+    tables.add(TARGET_PROC_ID, 'x')
+    result = gen_proc_link_of_edge_incremental(db_instance, trace)
+
+    for self_keys, target_keys in [(['c'], ['a', 'c']), (['x', 'd'], ['b', 'd']), ([], ['a']), (['a'], [])]:
+        tables.add(SELF_PROC_ID, *self_keys)
+        tables.add(TARGET_PROC_ID, *target_keys)
+        result = count_again(db_instance, trace, tables, result)
+        assert tables.full_count_calls == 0
+
+
+@pytest.mark.parametrize('proc_id', [SELF_PROC_ID, TARGET_PROC_ID])
+def test_deleted_row_forces_full_count(db_instance, trace, tables, proc_id):
+    tables.add(SELF_PROC_ID, 'a', 'b', 'c')
+    tables.add(TARGET_PROC_ID, 'a', 'b', 'z')
+    result = gen_proc_link_of_edge_incremental(db_instance, trace)
+    assert result[0] == 2
+
+    tables.delete(proc_id, 1)
+    tables.add(SELF_PROC_ID, 'z')
+    count, watermark = count_again(db_instance, trace, tables, result)
+
+    assert count == 2
+    assert tables.full_count_calls == 1
+    assert watermark.self_row_count == len(tables.rows[SELF_PROC_ID])
+    assert watermark.target_row_count == len(tables.rows[TARGET_PROC_ID])
+
+
+def test_changed_trace_forces_full_count(db_instance, trace, tables, monkeypatch):
+    tables.add(SELF_PROC_ID, 'a')
+    tables.add(TARGET_PROC_ID, 'a')
+    result = gen_proc_link_of_edge_incremental(db_instance, trace)
+
+    monkeypatch.setattr(proc_link, 'gen_trace_fingerprint', lambda _trace: 'other_trace_keys')
+    tables.add(SELF_PROC_ID, 'a')
+    count_again(db_instance, trace, tables, result)
+
+    assert tables.full_count_calls == 1